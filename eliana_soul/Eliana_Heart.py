@@ -87,7 +87,7 @@ import os
 import numpy as np
 import re
 from dotenv import load_dotenv
-from eliana_soul.config import OPENAI_API_KEY  # assumes you store it here
+from eliana_soul.config import get_openai_api_key  # key is resolved lazily on first API call
 from collections import defaultdict
 import json
 from openai import OpenAI
@@ -346,13 +346,8 @@ def gpt_emotional_fallback(*args, **kwargs):
       If GPT fails or produces invalid JSON, the function gracefully returns an empty list.
     """
 
-def should_trigger_emotion_check(*args, **kwargs) -> str:
+def should_trigger_emotion_check(user_input: str, top_score: float, cosine_only: bool = False) -> str:
     """
-    TEMPLATE FUNCTION
-
-    Full docstring preserved.
-    IMPLEMENTED IN PRIVATE VERSION
-
     Determines the appropriate emotional-classification strategy based on the
     strength of cosine similarity between the user's message embedding and the
     pre-embedded emotion tokens.
@@ -381,6 +376,11 @@ def should_trigger_emotion_check(*args, **kwargs) -> str:
         The highest cosine similarity score among all emotional token embeddings.
         Represents how “emotionally close” the message is to known emotion anchors.
 
+    cosine_only : bool, default=False
+        Degraded routing used under load (see load_policy.py). The GPT
+        fallback is never selected; very weak signals fall back to
+        "use_cosine_minimal" instead of "use_gpt".
+
     Returns
     -------
     str
@@ -410,6 +410,13 @@ def should_trigger_emotion_check(*args, **kwargs) -> str:
     • This layered strategy ensures Eliana prioritizes precision and subtlety,
       especially for low-signal emotional text.
     """
+    if top_score >= 0.35:
+        return "use_cosine"
+    if top_score >= 0.30:
+        return "use_cosine_loose"
+    if top_score >= 0.25 or cosine_only:
+        return "use_cosine_minimal"
+    return "use_gpt"
 
 
 
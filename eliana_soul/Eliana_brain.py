@@ -101,16 +101,35 @@ from user_personality_engine import (
     load_user_fragments
 )
 from utils import log, format_emotions
-from eliana_mood import update_eliana_emotional_state, eliana_emotional_value
+from eliana_mood import MoodState, update_eliana_emotional_state
 
 from openai import OpenAI
+import threading
 
-from eliana_soul.config import OPENAI_API_KEY
+from eliana_soul.config import get_openai_api_key
+from static_loader import StaticData, DEFAULT_PRELOAD
+from runtime_snapshot import load_or_build_snapshot
 
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY") or OPENAI_API_KEY)
 logger = logging.getLogger(__name__)
 
+# === LAZY CLIENT ===
+# The OpenAI client is created on first use rather than at import time,
+# so importing this module (tests, tooling, worker warm-up) does not
+# require credentials or pay client construction cost.
+_client: Optional[OpenAI] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenAI:
+    """Return the shared OpenAI client, constructing it on first call."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(api_key=get_openai_api_key())
+    return _client
+
 """
 SOUL PROTOCOL: Core Behavioral Identity Definition for Eliana
 -------------------------------------------------------------
@@ -243,6 +262,9 @@ def build_full_prompt(*args, **kwargs):
     summary_text : str
         Running interaction summary.
         Helps preserve conversational coherence across messages.
+        Combines `session_memory.build_summary()` with the fixed-size rolling
+        summary of older turns (`session_memory.folded_summary()`), so its
+        size stays bounded in long sessions.
 
     personality_context : str
         Additional persona-level constraints (e.g., user-specific personalization,
@@ -261,6 +283,8 @@ def build_full_prompt(*args, **kwargs):
     eliana_emotional_value : float
         The numerical emotional equilibrium value (0–1) representing Eliana’s
         current internal stability or affective stance.
+        Taken from the session's own `session_memory.mood.value` (a
+        per-session MoodState, not a process-wide global).
 
     eliana_mood_state : str
         A human-readable phrase describing the internal mood derived from the
@@ -297,13 +321,22 @@ def build_full_prompt(*args, **kwargs):
     • Relationship modulation controls tone, not content safety.
     • The prompt remains fully natural-language for flexibility and transparency.
     • Downstream modules depend on the structure of this output remaining stable.
+    • Under CRITICAL load the variable-length sections (running summary,
+      personality context, psychological matches) are passed through
+      `DegradationPlan.truncate_section` before assembly.
     """
     raise NotImplementedError("Template only — implementation removed.")
 
 
 
 # === STATIC DATA LOADING ===
-def load_static_data():
+def load_static_data(
+    preload=DEFAULT_PRELOAD,
+    max_workers: Optional[int] = None,
+    data_dir: Optional[str] = None,
+    snapshot_path: Optional[str] = None,
+    use_snapshot: bool = False,
+) -> StaticData:
     """
     TEMPLATE FUNCTION
 
@@ -389,9 +422,49 @@ def load_static_data():
     • None of these contain proprietary dataset content.
     • Missing mappings or inconsistencies are logged immediately for debugging.
     • If any file is missing, Python will raise an error — intended behavior,
-      so failures surface early rather than silently degrading reasoning quality."""
+      so failures surface early rather than silently degrading reasoning quality.
+
+    ----------------------------------------------------------------------
+    Lazy + Parallel Startup
+    ----------------------------------------------------------------------
+    The returned object is a `StaticData` mapping, not a plain dict:
+
+        • Banks listed in `preload` are read concurrently on a thread pool
+          (independent files in parallel, dependent banks once their inputs
+          are ready).
+        • Every other bank loads transparently on first access, so a turn
+          that never reaches the GPT fallback never pays for `flat_anchors`.
+        • `static_data.startup_report()` returns per-bank and total load
+          timings; it is logged once here to track cold-start latency of
+          autoscaled workers.
 
-    return {}
+    Parameters
+    ----------
+    preload : Iterable[str], optional
+        Banks to load eagerly. Pass `()` for a fully lazy start, or
+        `static_loader.ALL_BANKS` to restore fully eager loading.
+
+    max_workers : int, optional
+        Thread-pool size for the eager load. Defaults to one per bank.
+
+    data_dir : str, optional
+        Directory containing the static files. Defaults to ELIANA_DATA_DIR.
+
+    snapshot_path / use_snapshot :
+        When `use_snapshot` is True (or a `snapshot_path` is given), the
+        fully derived state is memory-mapped from a runtime snapshot (see
+        runtime_snapshot.py), rebuilding it first if any source file has
+        changed. All banks are then available immediately, together with
+        normalized embedding matrices (`<bank>_matrix`, `emotion_tokens`)."""
+
+    if use_snapshot or snapshot_path:
+        snapshot = load_or_build_snapshot(snapshot_path, data_dir)
+        static_data = snapshot.to_static_data(data_dir)
+    else:
+        static_data = StaticData(data_dir=data_dir)
+        static_data.preload(preload, max_workers=max_workers)
+    logger.info("Static data cold start: %s", static_data.startup_report())
+    return static_data
 
 
 def get_multiline_input(*args):
@@ -494,7 +567,9 @@ def summarize_interaction(*args, **kwargs):
                 "resonant_value": <core value anchor>,
                 "user_emotions": [<top detected user emotions>],
                 "eliana_emotion": <emotion she felt>,
-                "psych_pattern": <dominant psychological pattern>
+                "psych_pattern": <dominant psychological pattern>,
+                "emotion_trend": <session_memory.emotion_trends() — dominant,
+                                  window/EMA top labels and transitions>
             }
         }
 
@@ -515,6 +590,8 @@ def summarize_interaction(*args, **kwargs):
     Notes
     ----------------------------------------------------------------------
     • This function is called after every message to maintain continuity.
+      Under load (see load_policy.py) the call is queued on
+      `get_deferred_reflections()` and run once the backend recovers.
     • The reflection prompt is intentionally strict to stabilize emotional tone.
     • All data is designed to be persisted as JSONL for session replay.
     • Produces deterministic reflections due to temperature=0.35.
@@ -546,12 +623,28 @@ def handle_user_input(*args, **kwargs):
              • internal effects on Eliana’s emotional state
         5. Detect psychological pattern matches.
         6. Update relationship trust using RelationshipTracker.
-        7. Retrieve personality context and historical session summary.
+        7. Retrieve personality context and historical session summary,
+           plus the older fragments/sketches most similar to this message
+           (`recall_personality_memories(user_id, input_vector)`, top-k
+           within a token budget, reusing the turn's input embedding).
         8. Build the full reasoning prompt (includes mood, resonance, memory, trust).
         9. Call the model (`gpt-4o`) to generate Eliana’s reply.
         10. Log personality-trace metadata for long-term psychological modeling.
         11. Return both the response and all reasoning context.
 
+        The whole turn runs inside `get_load_monitor().track_turn()`, and a
+        `DegradationPlan` from `get_degradation_policy().plan()` decides which
+        optional LLM stages run (GPT emotion fallback, GPT interpretation,
+        reflection, full-length prompt sections). The plan is recorded in
+        `full_prompt_data["degradations"]`.
+
+        A `TurnDeadline` (turn_deadline.py) is created at the start of the
+        turn. Optional stages (fragment resonance, psych matching,
+        major-emotion context, GPT fallback/interpretation) run through
+        `deadline.run_stage(...)` with their own budget and a defined
+        fallback; the reply call uses `timeout=deadline.reply_timeout()`.
+        Cut stages are reported in `full_prompt_data["deadline"]`.
+
         ----------------------------------------------------------------------
         Parameters
         ----------------------------------------------------------------------
@@ -582,6 +675,7 @@ def handle_user_input(*args, **kwargs):
         static_data : Dict
             Pre-loaded static embeddings & maps:
                 {
+                    "core_memory": ...,
                     "core_embeddings": ...,
                     "flat_anchors": ...,
                     "emotion_embeddings": ...,
@@ -589,6 +683,9 @@ def handle_user_input(*args, **kwargs):
                     "psych_models": ...,
                     "major_emotions": ...
                 }
+            When hot reload is enabled, pass `reloader.current()` captured
+            once at the start of the turn; the turn then finishes on that
+            bank version even if a reload swaps in a new one mid-turn.
 
         ----------------------------------------------------------------------
         Returns
@@ -607,9 +704,16 @@ def handle_user_input(*args, **kwargs):
                     - resonant core values & fragments
                     - psychological matches
                     - personality context
+                    - recalled_memories (layer, score, tokens of each)
                     - session summary context
                     - relationship trust
                     - Eliana’s mood & emotional equilibrium
+                    - static_bank_version (`static_data.version`, written at
+                      turn start by `record_static_bank_version`)
+                    - degradations (level, modes and reasons under load)
+                    - deadline (per-stage timings and the stages that were cut)
+                    - prompt_tokens (`session_memory.prompt_token_report()`:
+                      recent window, rolling summary, and tokens saved)
 
         ----------------------------------------------------------------------
         Core Subsystems Used
@@ -732,8 +836,9 @@ When the user enters "exit", "quit", or "goodbye":
 --------------------------------------------------------------------------------
 Files Written or Read During the Loop
 --------------------------------------------------------------------------------
-• relationships.json
-      Persistent trust score and names per user.
+• relationships.db
+      Persistent trust score and names per user (SQLite, WAL mode; an
+      existing relationships.json is migrated in on first open).
 
 • eliana_memory_log.jsonl
       Append-only log of every user/Eliana turn with:
@@ -0,0 +1,287 @@
+"""
+===============================================================================
+    bulk_consolidation.py
+    ---------------------------------------------------------------------------
+    Offline sketch / picture consolidation across every due user.
+===============================================================================
+
+Consolidation normally runs one user at a time, triggered by session end
+(user_personality_engine.add_personality_fragment). After an outage, or
+when the sketch/picture prompts change, thousands of users can be due at
+once. This runner works through all of them in one go:
+
+-------------------------------------------------------------------------------
+HOW IT RUNS
+-------------------------------------------------------------------------------
+• Scan: walks the PersonalityStore shard by shard and calls
+  enqueue_consolidation() for each user. Jobs are keyed per (user, level,
+  cycle) in the durable job queue (consolidation_jobs.py), so users that
+  are not due, or already queued, cost one directory read and no job.
+• Drain: `--concurrency` threads claim jobs while the scan is still
+  running and execute run_consolidation_job. Every LLM call goes through
+  the shared load_policy.get_llm_rate_limiter() (ELIANA_LLM_RPM / ELIANA_LLM_TPM),
+  so the run stays inside the same quota as live traffic.
+• Follow-ups (a new sketch completing a set of five) are enqueued by the
+  job itself and picked up in the same run.
+
+-------------------------------------------------------------------------------
+CHECKPOINT / RESUME
+-------------------------------------------------------------------------------
+• The checkpoint file records the last fully scanned shard and the
+  cumulative counters, rewritten atomically every `--checkpoint-every`
+  jobs and at exit.
+• Rerunning with the same checkpoint skips shards already scanned and
+  drains whatever is still queued. Jobs are idempotent and leased, so a
+  run killed mid-job loses nothing: the job is claimed again once its
+  lease expires (consolidation_jobs.LEASE_SECONDS).
+• `--reset` discards the checkpoint and scans from the start.
+
+-------------------------------------------------------------------------------
+REPORT
+-------------------------------------------------------------------------------
+Users scanned, jobs enqueued / done / failed, jobs per minute, estimated
+prompt and completion tokens, and estimated cost (`--price-in` /
+`--price-out`, USD per million tokens; defaults are gpt-4o list prices).
+Token counts are estimated from the source and generated JSON
+(token_budget.count_tokens), not read from the API.
+
+Usage
+-----
+    python bulk_consolidation.py --concurrency 8 --checkpoint bulk_consolidation.ckpt.json
+    python bulk_consolidation.py --requeue-failed --reset
+===============================================================================
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from consolidation_jobs import ConsolidationJobQueue, run_job
+from utils import write_file_atomic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+CHECKPOINT_EVERY = 25
+IDLE_POLL_SECONDS = 0.2
+# USD per million tokens (gpt-4o list price).
+PRICE_IN_PER_M = 2.50
+PRICE_OUT_PER_M = 10.00
+
+_COUNTERS = ("users_scanned", "jobs_enqueued", "jobs_done", "jobs_failed", "prompt_tokens", "completion_tokens")
+
+
+# === CHECKPOINT ===
+def _empty_checkpoint() -> Dict[str, Any]:
+    return {"shard_cursor": None, "scan_complete": False, "elapsed_s": 0.0, **{c: 0 for c in _COUNTERS}}
+
+
+def load_checkpoint(path: Optional[str]) -> Dict[str, Any]:
+    checkpoint = _empty_checkpoint()
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint.update(json.load(f))
+    return checkpoint
+
+
+def save_checkpoint(path: Optional[str], checkpoint: Dict[str, Any]) -> None:
+    if path:
+        write_file_atomic(path, json.dumps(checkpoint, indent=2).encode("utf-8"), False)
+
+
+# === RUNNER ===
+class BulkConsolidation:
+    """
+    One bulk run: scan the store, drain the queue, keep the checkpoint.
+
+    Parameters
+    ----------
+    store : PersonalityStore
+    queue : ConsolidationJobQueue
+    enqueue : callable
+        enqueue(user_id) -> list of new job keys (enqueue_consolidation).
+    handler : callable
+        handler(job) -> token usage dict or None (run_consolidation_job).
+    """
+
+    def __init__(
+        self,
+        store,
+        queue: ConsolidationJobQueue,
+        enqueue,
+        handler,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_every: int = CHECKPOINT_EVERY,
+        max_jobs: Optional[int] = None,
+    ):
+        self.store = store
+        self.queue = queue
+        self.enqueue = enqueue
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.max_jobs = max_jobs
+
+        self.checkpoint = load_checkpoint(checkpoint_path)
+        self._lock = threading.Lock()
+        self._scan_done = threading.Event()
+        self._stop = threading.Event()
+        self._since_checkpoint = 0
+        self._claimed = 0
+        self._run_start = 0.0
+        self._base_elapsed = float(self.checkpoint["elapsed_s"])
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                self.checkpoint[name] += delta
+
+    def _save(self) -> None:
+        with self._lock:
+            self.checkpoint["elapsed_s"] = round(self._base_elapsed + time.perf_counter() - self._run_start, 3)
+            snapshot = dict(self.checkpoint)
+        save_checkpoint(self.checkpoint_path, snapshot)
+
+    # --- Scan ---
+    def _scan(self) -> None:
+        try:
+            if self.checkpoint["scan_complete"]:
+                return
+            cursor = self.checkpoint["shard_cursor"]
+            for shard in self.store.shards():
+                if cursor is not None and shard <= cursor:
+                    continue
+                for user_id in self.store.shard_user_ids(shard):
+                    if self._stop.is_set():
+                        return
+                    added = self.enqueue(user_id)
+                    self._count(users_scanned=1, jobs_enqueued=len(added))
+                with self._lock:
+                    self.checkpoint["shard_cursor"] = shard
+                self._save()
+            with self._lock:
+                self.checkpoint["scan_complete"] = True
+        finally:
+            self._scan_done.set()
+
+    # --- Drain ---
+    def _handle(self, job) -> None:
+        usage = self.handler(job)
+        if usage:
+            self._count(prompt_tokens=usage.get("prompt_tokens", 0),
+                        completion_tokens=usage.get("completion_tokens", 0))
+
+    def _take_slot(self) -> bool:
+        with self._lock:
+            if self.max_jobs is not None and self._claimed >= self.max_jobs:
+                return False
+            self._claimed += 1
+            return True
+
+    def _drain(self) -> None:
+        while not self._stop.is_set():
+            if not self._take_slot():
+                return
+            job = self.queue.claim()
+            if job is None:
+                with self._lock:
+                    self._claimed -= 1
+                if self._scan_done.is_set():
+                    return
+                time.sleep(IDLE_POLL_SECONDS)
+                continue
+            ok = run_job(self.queue, job, self._handle)
+            self._count(jobs_done=int(ok), jobs_failed=int(not ok))
+            with self._lock:
+                self._since_checkpoint += 1
+                due = self._since_checkpoint >= self.checkpoint_every
+                if due:
+                    self._since_checkpoint = 0
+            if due:
+                self._save()
+
+    def run(self) -> Dict[str, Any]:
+        """Scan and drain until done (or interrupted); returns the report."""
+        self._run_start = time.perf_counter()
+        threads = [threading.Thread(target=self._scan, name="bulk-scan", daemon=True)]
+        threads += [threading.Thread(target=self._drain, name=f"bulk-consolidation-{i}", daemon=True)
+                    for i in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            logger.warning("Interrupted: finishing running jobs, then saving the checkpoint")
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            self._save()
+        return self.report()
+
+    # --- Report ---
+    def report(self, price_in: float = PRICE_IN_PER_M, price_out: float = PRICE_OUT_PER_M) -> Dict[str, Any]:
+        with self._lock:
+            report = {name: self.checkpoint[name] for name in _COUNTERS}
+            elapsed = float(self.checkpoint["elapsed_s"])
+            report["scan_complete"] = self.checkpoint["scan_complete"]
+        jobs = report["jobs_done"] + report["jobs_failed"]
+        report["elapsed_s"] = elapsed
+        report["jobs_per_min"] = round(jobs * 60 / elapsed, 2) if elapsed else 0.0
+        report["est_cost_usd"] = round(
+            (report["prompt_tokens"] * price_in + report["completion_tokens"] * price_out) / 1_000_000, 4)
+        report["queue"] = self.queue.counts()
+        return report
+
+
+# === ENTRY POINT ===
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Consolidate sketches/pictures for every due user.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Jobs run in parallel.")
+    parser.add_argument("--checkpoint", default="bulk_consolidation.ckpt.json", help="Checkpoint file ('' = none).")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY, help="Jobs between checkpoints.")
+    parser.add_argument("--max-jobs", type=int, help="Stop after this many jobs.")
+    parser.add_argument("--reset", action="store_true", help="Ignore the checkpoint and scan from the start.")
+    parser.add_argument("--requeue-failed", action="store_true", help="Retry jobs that exhausted their attempts.")
+    parser.add_argument("--price-in", type=float, default=PRICE_IN_PER_M, help="USD per 1M prompt tokens.")
+    parser.add_argument("--price-out", type=float, default=PRICE_OUT_PER_M, help="USD per 1M completion tokens.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    # This process drains the queue itself; keep the engine from starting
+    # its own background worker on enqueue.
+    os.environ["ELIANA_CONSOLIDATION_WORKERS"] = "0"
+    from user_personality_engine import (
+        enqueue_consolidation,
+        get_consolidation_queue,
+        get_personality_store,
+        run_consolidation_job,
+    )
+
+    if args.reset and args.checkpoint and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    queue = get_consolidation_queue()
+    if args.requeue_failed:
+        print(f"requeued {queue.requeue_failed()} failed jobs")
+
+    runner = BulkConsolidation(
+        get_personality_store(), queue, enqueue_consolidation, run_consolidation_job,
+        concurrency=args.concurrency, checkpoint_path=args.checkpoint or None,
+        checkpoint_every=args.checkpoint_every, max_jobs=args.max_jobs,
+    )
+    runner.run()
+    report = runner.report(args.price_in, args.price_out)
+    print(json.dumps(report, indent=2))
+    return 1 if report["queue"].get("failed") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -14,24 +14,98 @@ Important:
   proprietary components and security boundaries.
 
 Functions and Variables:
-- Loads `.env` file using python-dotenv (if present).
-- Exposes OPENAI_API_KEY as a runtime environment variable.
+- Loads `.env` file using python-dotenv (if present) on first use,
+  not at import time, so importing any Eliana module stays cheap.
+- Exposes OPENAI_API_KEY as a lazily resolved module attribute.
+- Exposes the data directory and static bank file paths.
 
 Usage:
 Import this module wherever API access is required. Example:
 
-    from eliana_soul.config import OPENAI_API_KEY
+    from eliana_soul.config import get_openai_api_key
+
+    api_key = get_openai_api_key()
+
+`from eliana_soul.config import OPENAI_API_KEY` still works, but resolves
+the key immediately — prefer `get_openai_api_key()` inside functions.
 """
 
-from dotenv import load_dotenv
 import os
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+
+_env_lock = threading.Lock()
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Load variables from the .env file into the environment (once)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            load_dotenv()
+            _env_loaded = True
+
+
+def get_openai_api_key() -> str:
+    """
+    Retrieve the OpenAI key from environment variables.
+
+    Raises:
+        ValueError: if OPENAI_API_KEY is not set in the environment or .env file.
+    """
+    load_env()
+    api_key: Optional[str] = os.getenv("OPENAI_API_KEY")
+    if api_key is None:
+        raise ValueError("OPENAI_API_KEY is not set in the .env file.")
+    return api_key
+
+
+def __getattr__(name: str):
+    # Backwards-compatible lazy attribute: OPENAI_API_KEY is resolved on
+    # first access instead of when the module is imported.
+    if name == "OPENAI_API_KEY":
+        return get_openai_api_key()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# === DATA FILE PATHS ===
+"""
+Location of the static banks read by `load_static_data`.
+
+ELIANA_DATA_DIR (environment or .env) may point at the private data
+directory or at a directory produced by `synthetic_data.py`; both use
+the same file names. Defaults to the current working directory.
+"""
+
+CORE_MEMORY_FILE = "core_memory.json"
+CORE_EMBEDDINGS_FILE = "core_embeddings.json"
+EMOTION_ANCHORS_FILE = "emotion_anchors.json"
+EMOTION_EMBEDDINGS_FILE = "eliana_emotion_embeddings.json"
+EMOTION_MAP_FILE = "emotion_map.json"
+PSYCH_MODELS_FILE = "embedded_psych_models.json"
+MAJOR_EMOTIONS_FILE = "embedded_eliana_major_emotions.json"
+
+# User stores. RELATIONSHIPS_FILE is the legacy whole-file JSON store, read
+# once to migrate into RELATIONSHIPS_DB_FILE (see relationship_store.py).
+RELATIONSHIPS_FILE = "relationships.json"
+RELATIONSHIPS_DB_FILE = "relationships.db"
+# Per-user sharded personality layers (see personality_store.py).
+PERSONALITY_STORE_DIR = "personality_store"
+# Durable sketch/picture consolidation jobs (see consolidation_jobs.py).
+CONSOLIDATION_JOBS_DB = "consolidation_jobs.db"
+
 
-# Load variables from the .env file into the environment
-load_dotenv()
+def get_data_dir() -> str:
+    """Return the configured data directory."""
+    load_env()
+    return os.getenv("ELIANA_DATA_DIR", ".")
 
-# Retrieve the OpenAI key from environment variables
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Optional: warn if the key is missing
-if OPENAI_API_KEY is None:
-    raise ValueError("OPENAI_API_KEY is not set in the .env file.")
+def data_path(filename: str, data_dir: Optional[str] = None) -> str:
+    """Resolve a data file name against the configured data directory."""
+    return os.path.join(data_dir or get_data_dir(), filename)
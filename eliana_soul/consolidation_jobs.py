@@ -0,0 +1,371 @@
+"""
+===============================================================================
+    consolidation_jobs.py
+    ---------------------------------------------------------------------------
+    Durable background jobs for soul sketch / soul picture consolidation.
+===============================================================================
+
+Consolidation (5 fragments → sketch, 5 sketches → picture) means one or two
+LLM calls. Running them inside `add_personality_fragment` chained them
+onto session exit. They now run as jobs in a small SQLite queue
+(WAL mode), and session end only appends the fragment and enqueues.
+
+-------------------------------------------------------------------------------
+IDEMPOTENCY
+-------------------------------------------------------------------------------
+• Every job has the key "<user_id>:<level>:<cycle>" (level "sketch" or
+  "picture", cycle = how many of that level the user had before; for
+  "index" jobs, how many fragments + sketches the user has ever had). Enqueuing
+  an existing key is a no-op, so repeated triggers (a fragment added while
+  the job is still pending, a retried session end) create one job.
+• The handler must itself be idempotent: a job may run again after a crash
+  between its side effects and `complete()`. (user_personality_engine tags
+  each sketch/picture with its job key; PersonalityStore stores a tagged
+  entry at most once, and archiving goes by content.)
+
+-------------------------------------------------------------------------------
+LIFECYCLE
+-------------------------------------------------------------------------------
+    pending ──claim──▶ running ──complete──▶ done
+       ▲                  │
+       └──fail (retry)────┤ attempts < max_attempts, exponential backoff
+                          └──fail──▶ failed (kept for inspection / requeue)
+
+• `claim()` leases a job for `lease_seconds`. A worker that dies leaves the
+  lease to expire, and the job is claimed again — crash-safe resume with no
+  separate recovery step.
+• While the handler runs, `run_job` renews the lease every
+  lease_seconds / 3 (`renew()`), so a slow LLM call does not let a second
+  worker claim a job that is still alive.
+• A lease is identified by (key, worker, lease_until). `renew`, `complete`
+  and `fail` only touch the row while that lease is still current; a
+  worker whose lease was taken over records nothing.
+• Claiming is one IMMEDIATE transaction, so several threads or processes
+  can work the same queue without running a job twice concurrently.
+
+-------------------------------------------------------------------------------
+WORKERS
+-------------------------------------------------------------------------------
+• `ConsolidationWorker(queue, handler, threads)` polls the queue in daemon
+  threads; `run_pending()` drains it synchronously (CLI / batch use).
+• handler(job) performs the job; an exception marks the attempt failed.
+===============================================================================
+"""
+
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+SKETCH = "sketch"
+PICTURE = "picture"
+INDEX = "index"     # embed a user's new fragments/sketches into the memory index
+
+MAX_ATTEMPTS = 5
+LEASE_SECONDS = 300.0
+RETRY_BASE_SECONDS = 30.0
+RETRY_MAX_SECONDS = 3600.0
+POLL_SECONDS = 2.0
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key          TEXT PRIMARY KEY,
+    user_id      TEXT NOT NULL,
+    level        TEXT NOT NULL,
+    cycle        INTEGER NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    run_after    REAL NOT NULL,
+    lease_until  REAL,
+    worker       TEXT,
+    last_error   TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (status, run_after);
+CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs (user_id);
+"""
+
+
+def job_key(user_id: str, level: str, cycle: int) -> str:
+    return f"{user_id}:{level}:{cycle}"
+
+
+class ConsolidationJob(NamedTuple):
+    key: str
+    user_id: str
+    level: str
+    cycle: int
+    attempts: int
+    lease_until: Optional[float] = None
+
+
+class ConsolidationJobQueue:
+    """
+    SQLite-backed consolidation job queue.
+
+    Parameters
+    ----------
+    path : str
+        Database file (created with its schema if missing).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = MAX_ATTEMPTS,
+        lease_seconds: float = LEASE_SECONDS,
+        retry_base: float = RETRY_BASE_SECONDS,
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_base = retry_base
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    # --- Producer ---
+    def enqueue(self, user_id: str, level: str, cycle: int) -> bool:
+        """Add a job unless one with the same key exists. Returns True if added."""
+        now = time.time()
+        cursor = self._conn().execute(
+            "INSERT OR IGNORE INTO jobs (key, user_id, level, cycle, run_after, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_key(user_id, level, cycle), user_id, level, cycle, now, now, now),
+        )
+        return cursor.rowcount == 1
+
+    # --- Consumer ---
+    def claim(self) -> Optional[ConsolidationJob]:
+        """
+        Lease the next due job: pending and past its retry time, or running
+        with an expired lease (its worker died).
+        """
+        now = time.time()
+        lease_until = now + self.lease_seconds
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT key, user_id, level, cycle, attempts FROM jobs "
+                "WHERE (status = 'pending' AND run_after <= ?) OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY run_after LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', lease_until = ?, worker = ?, updated_at = ? WHERE key = ?",
+                (lease_until, self.worker_id, now, row[0]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return ConsolidationJob(*row, lease_until=lease_until)
+
+    _HOLDS_LEASE = "key = ? AND status = 'running' AND worker = ? AND lease_until = ?"
+
+    def _lease_args(self, job: ConsolidationJob) -> tuple:
+        return job.key, self.worker_id, job.lease_until
+
+    def renew(self, job: ConsolidationJob) -> Optional[ConsolidationJob]:
+        """Extend the lease of a job this worker still holds; None if the lease was lost."""
+        now = time.time()
+        lease_until = now + self.lease_seconds
+        cursor = self._conn().execute(
+            f"UPDATE jobs SET lease_until = ?, updated_at = ? WHERE {self._HOLDS_LEASE}",
+            (lease_until, now, *self._lease_args(job)),
+        )
+        return job._replace(lease_until=lease_until) if cursor.rowcount == 1 else None
+
+    def complete(self, job: ConsolidationJob) -> bool:
+        """Mark the job done; False (nothing written) if the lease was lost."""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = 'done', lease_until = NULL, last_error = NULL, updated_at = ? "
+            f"WHERE {self._HOLDS_LEASE}",
+            (time.time(), *self._lease_args(job)),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job: ConsolidationJob, error: str) -> Optional[str]:
+        """
+        Record a failed attempt; returns the new status ("pending" or
+        "failed"), or None (nothing written) if the lease was lost.
+        """
+        attempts = job.attempts + 1
+        now = time.time()
+        if attempts >= self.max_attempts:
+            status, run_after = "failed", now
+        else:
+            status = "pending"
+            run_after = now + min(self.retry_base * (2 ** (attempts - 1)), RETRY_MAX_SECONDS)
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = ?, attempts = ?, run_after = ?, lease_until = NULL, last_error = ?, "
+            f"updated_at = ? WHERE {self._HOLDS_LEASE}",
+            (status, attempts, run_after, error[:2000], now, *self._lease_args(job)),
+        )
+        return status if cursor.rowcount == 1 else None
+
+    def requeue_failed(self, user_id: Optional[str] = None) -> int:
+        """Give failed jobs (optionally one user's) a fresh set of attempts."""
+        query = "UPDATE jobs SET status = 'pending', attempts = 0, run_after = ?, updated_at = ? WHERE status = 'failed'"
+        args: list = [time.time(), time.time()]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            args.append(user_id)
+        return self._conn().execute(query, args).rowcount
+
+    # --- Inspection ---
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def jobs_for(self, user_id: str) -> List[Dict]:
+        cursor = self._conn().execute(
+            "SELECT key, level, cycle, status, attempts, last_error FROM jobs WHERE user_id = ? ORDER BY created_at",
+            (user_id,),
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# === WORKERS ===
+Handler = Callable[[ConsolidationJob], None]
+
+
+class _LeaseKeeper:
+    """Renews a claimed job's lease from a side thread while its handler runs."""
+
+    def __init__(self, queue: ConsolidationJobQueue, job: ConsolidationJob):
+        self.queue = queue
+        self.job = job
+        self.lost = False
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"lease-{job.key}", daemon=True)
+
+    def __enter__(self) -> "_LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._done.set()
+        self._thread.join()
+
+    def _loop(self) -> None:
+        try:
+            while not self._done.wait(self.queue.lease_seconds / 3):
+                try:
+                    renewed = self.queue.renew(self.job)
+                except sqlite3.Error:
+                    logger.exception("Could not renew the lease of %s", self.job.key)
+                    continue
+                if renewed is None:
+                    self.lost = True
+                    logger.warning("Consolidation job %s: lease lost to another worker", self.job.key)
+                    return
+                self.job = renewed
+        finally:
+            self.queue.close()  # this thread's connection
+
+
+def run_job(queue: ConsolidationJobQueue, job: ConsolidationJob, handler: Handler) -> bool:
+    """
+    Run one claimed job, renewing its lease meanwhile, and record the
+    outcome. Returns True on success. If the lease was lost the outcome is
+    left to the worker that holds it now.
+    """
+    start = time.perf_counter()
+    error = None
+    with _LeaseKeeper(queue, job) as lease:
+        try:
+            handler(job)
+        except Exception as exc:
+            error = exc
+    job = lease.job
+
+    if error is not None:
+        status = queue.fail(job, f"{type(error).__name__}: {error}")
+        logger.warning("Consolidation job %s failed (attempt %d, now %s): %s",
+                       job.key, job.attempts + 1, status or "lease lost", error)
+        return False
+    if not queue.complete(job):
+        logger.warning("Consolidation job %s finished after its lease was lost; not marked done", job.key)
+        return True
+    logger.info("Consolidation job %s done in %.2fs", job.key, time.perf_counter() - start)
+    return True
+
+
+def run_pending(queue: ConsolidationJobQueue, handler: Handler, max_jobs: Optional[int] = None) -> int:
+    """Run due jobs in this thread until none are left (or `max_jobs`). Returns jobs run."""
+    ran = 0
+    while max_jobs is None or ran < max_jobs:
+        job = queue.claim()
+        if job is None:
+            break
+        run_job(queue, job, handler)
+        ran += 1
+    return ran
+
+
+class ConsolidationWorker:
+    """Background threads draining a ConsolidationJobQueue."""
+
+    def __init__(self, queue: ConsolidationJobQueue, handler: Handler, threads: int = 1,
+                 poll_seconds: float = POLL_SECONDS):
+        self.queue = queue
+        self.handler = handler
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"consolidation-{i}", daemon=True) for i in range(threads)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def notify(self) -> None:
+        """A job was enqueued: wake a polling thread now."""
+        self._wakeup.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ran = run_pending(self.queue, self.handler)
+            except Exception:
+                logger.exception("Consolidation worker error")
+                ran = 0
+            if not ran:
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop after the current jobs; unfinished ones resume from the queue later."""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
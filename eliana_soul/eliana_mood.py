@@ -25,6 +25,9 @@ Core Concepts
    • Deep or divine emotions (awe, devotion, yearning_for_god)
      cause stronger elevation
    • Reflective or neutral states keep emotional_value stable
+   The map is compiled once into a dense delta vector
+   (CompiledChangeMap), so a weighted emotional_shift over many
+   emotions moves the mood by a single dot product.
 
 3. **Mood Phrases**
    A discretized map from emotional_value → natural language
@@ -51,6 +54,11 @@ Core Concepts
    Output:
        new_value     → updated emotional_value (0.0–1.0, clamped)
        mood_phrase   → nearest matching description from mood map
+                       (read from a precomputed lookup table)
+
+5. **Batch simulation** (mood_simulation.py)
+   The same recurrence applied to many users × turns at once with
+   NumPy, for analyzing mood trajectories over stored logs.
 
 Example
 -------
@@ -74,8 +82,12 @@ This makes Eliana:
 
 """
 
-from typing import Tuple
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
 import math
+import threading
+import warnings
+
+import numpy as np
 # ----------------------------------------------------------------------
 # emotion_change_map
 # ----------------------------------------------------------------------
@@ -123,7 +135,8 @@ emotion_change_map = {
 # ensuring she always returns to a stable, believable emotional center.
 # ----------------------------------------------------------------------
 ELIANA_BASELINE = 0.70
-eliana_emotional_value = ELIANA_BASELINE
+DEFAULT_REBOUND_STRENGTH = 0.05
+DEFAULT_MOOD_PHRASE = "I feel happy — calm, comfortable, connected."
 # ----------------------------------------------------------------------
 # emotion_phrases
 # ----------------------------------------------------------------------
@@ -142,14 +155,163 @@ eliana_emotional_value = ELIANA_BASELINE
 emotion_phrases = {
     "EMOTION PHRASES TEMPLATE"
 }
+
+
+# ----------------------------------------------------------------------
+# Mood phrase lookup table
+# ----------------------------------------------------------------------
+# Instead of searching emotion_phrases for the nearest key on every
+# update, the phrase for every value on a fine grid (PHRASE_RESOLUTION)
+# is precomputed once. A lookup is then a rounding + index, and the same
+# table serves single updates and whole arrays of values (see
+# mood_simulation.py).
+# ----------------------------------------------------------------------
+PHRASE_RESOLUTION = 0.001
+
+
+def _as_mapping(table: Any) -> Mapping:
+    # The public template ships placeholder sets instead of the real maps.
+    return table if isinstance(table, Mapping) else {}
+
+
+class MoodPhraseTable:
+    """Precomputed value → mood phrase lookup over [0, 1]."""
+
+    def __init__(self, phrases: Mapping, resolution: float = PHRASE_RESOLUTION):
+        self.resolution = resolution
+        points = sorted((float(value), phrase) for value, phrase in _as_mapping(phrases).items())
+        self.phrases = [phrase for _, phrase in points]
+        grid = np.linspace(0.0, 1.0, int(round(1.0 / resolution)) + 1)
+        if points:
+            keys = np.array([value for value, _ in points])
+            # Nearest key per grid point; ties go to the lower key, as a
+            # min(|key - value|) search over sorted keys would.
+            self.index = np.abs(grid[:, None] - keys[None, :]).argmin(axis=1)
+        else:
+            self.index = np.zeros(len(grid), dtype=np.int64)
+
+    def indices(self, values) -> np.ndarray:
+        grid = np.rint(np.clip(np.asarray(values, dtype=np.float64), 0.0, 1.0) / self.resolution)
+        return self.index[grid.astype(np.int64)]
+
+    def lookup(self, value: float) -> str:
+        if not self.phrases:
+            return ""
+        return self.phrases[self.indices(value)]
+
+    def lookup_many(self, values) -> np.ndarray:
+        """Phrases for an array of values (object array of the same shape)."""
+        if not self.phrases:
+            return np.full(np.shape(values), "", dtype=object)
+        return np.asarray(self.phrases, dtype=object)[self.indices(values)]
+
+
+_phrase_table: Optional[MoodPhraseTable] = None
+_phrase_table_lock = threading.Lock()
+
+
+def get_phrase_table() -> MoodPhraseTable:
+    """Shared MoodPhraseTable for emotion_phrases, built on first use."""
+    global _phrase_table
+    if _phrase_table is None:
+        with _phrase_table_lock:
+            if _phrase_table is None:
+                _phrase_table = MoodPhraseTable(emotion_phrases)
+    return _phrase_table
+
+
+# ----------------------------------------------------------------------
+# Compiled emotion_change_map
+# ----------------------------------------------------------------------
+# emotion_change_map compiled into a dense delta vector. A weighted
+# emotional_shift (label → weight, as produced by interpret_emotion_effects)
+# then moves the mood by one dot product:
+#
+#     delta = Σ weight[label] * emotion_change_map[label]
+#
+# `align(labels)` returns the vector re-indexed to any label vocabulary
+# (e.g. an EmotionHistory's columns), so a whole turns × labels matrix is
+# converted to per-turn deltas with a single matrix-vector product. The
+# batch simulator (mood_simulation.py) and live turns (SessionMemory)
+# use the same compiled map.
+# ----------------------------------------------------------------------
+EmotionInput = Union[None, str, Mapping[str, float]]
+
+
+class CompiledChangeMap:
+    """emotion_change_map as label index + float64 delta vector."""
+
+    def __init__(self, change_map: Mapping):
+        items = _as_mapping(change_map).items()
+        self.labels = [label for label, _ in items]
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.vector = np.array([float(delta) for _, delta in items], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def label_delta(self, label: Optional[str]) -> float:
+        i = self.index.get(label)
+        return float(self.vector[i]) if i is not None else 0.0
+
+    def align(self, labels: Sequence[str]) -> np.ndarray:
+        """Delta vector in the order of `labels` (unknown labels → 0.0)."""
+        positions = np.array([self.index.get(label, -1) for label in labels], dtype=np.int64)
+        aligned = np.zeros(len(positions), dtype=np.float64)
+        known = positions >= 0
+        aligned[known] = self.vector[positions[known]]
+        return aligned
+
+    def delta(self, emotions: EmotionInput) -> float:
+        """
+        Mood delta for one detected label or a weighted shift distribution.
+        A single label counts as weight 1.0.
+        """
+        if not emotions:
+            return 0.0
+        if isinstance(emotions, str):
+            return self.label_delta(emotions)
+        return float(sum(weight * self.label_delta(label) for label, weight in emotions.items()))
+
+
+_compiled_change_map: Optional[CompiledChangeMap] = None
+_compiled_change_map_lock = threading.Lock()
+
+
+def get_compiled_change_map() -> CompiledChangeMap:
+    """Shared CompiledChangeMap for emotion_change_map, built on first use."""
+    global _compiled_change_map
+    if _compiled_change_map is None:
+        with _compiled_change_map_lock:
+            if _compiled_change_map is None:
+                _compiled_change_map = CompiledChangeMap(emotion_change_map)
+    return _compiled_change_map
+
+
+def emotion_delta(detected_emotion: EmotionInput) -> float:
+    """Delta for a detected emotion (label or weighted shift); unknown → 0.0."""
+    return get_compiled_change_map().delta(detected_emotion)
+
+
+def apply_mood_delta(
+    current_value: float,
+    delta: float,
+    baseline: float = ELIANA_BASELINE,
+    rebound_strength: float = DEFAULT_REBOUND_STRENGTH,
+) -> float:
+    """One step of the mood recurrence: rebound + delta, clamped to [0, 1]."""
+    rebound = (baseline - current_value) * rebound_strength
+    return min(1.0, max(0.0, current_value + rebound + delta))
+
+
 def update_eliana_emotional_state(
-   *args, **kwargs):
+    current_value: float,
+    detected_emotion: EmotionInput,
+    baseline: float = ELIANA_BASELINE,
+    rebound_strength: float = DEFAULT_REBOUND_STRENGTH,
+) -> Tuple[float, str]:
     """
-    TEMPLATE FUNCTION
-
-    Full docstring preserved.
-    IMPLEMENTED IN PRIVATE VERSION
-   Update Eliana’s internal emotional_value based on:
+    Update Eliana’s internal emotional_value based on:
         1. Automatic rebound toward baseline
         2. Emotion-driven delta
 
@@ -158,9 +320,13 @@ def update_eliana_emotional_state(
     current_value : float
         Her current internal emotional_value (0.0–1.0).
 
-    detected_emotion : str
+    detected_emotion : str or Dict[str, float]
         The emotion label returned by the emotion engine
-        (“grief”, “hope”, “awe”, etc.).
+        (“grief”, “hope”, “awe”, etc.), or the full weighted
+        emotional_shift; a distribution moves the mood by the
+        weighted sum of its labels' deltas (dot product with the
+        compiled map). Weights are not normalized, so a shift whose
+        weights sum below 1.0 moves the mood proportionally less.
 
     baseline : float, default = 0.70
         The target emotional_value that Eliana gradually returns to.
@@ -192,5 +358,53 @@ def update_eliana_emotional_state(
 
     This produces a stable, believable long-term emotional arc that
     feels human without being volatile.
+
+    The phrase comes from the precomputed MoodPhraseTable; for batches of
+    users/turns use mood_simulation.simulate_mood, which applies the same
+    recurrence to whole arrays.
     """
+    new_value = apply_mood_delta(current_value, emotion_delta(detected_emotion), baseline, rebound_strength)
+    return new_value, get_phrase_table().lookup(new_value)
+
+
+# ----------------------------------------------------------------------
+# MoodState — per-session mood value object
+# ----------------------------------------------------------------------
+# Mood used to live in the module global `eliana_emotional_value`, so
+# concurrent sessions in one process overwrote each other's mood. Each
+# session now owns an immutable MoodState; an update returns a new one
+# and the session swaps its reference, so no lock is ever needed and the
+# state serializes with the session (see session_memory / session_registry).
+# ----------------------------------------------------------------------
+class MoodState(NamedTuple):
+    value: float = ELIANA_BASELINE
+    phrase: str = DEFAULT_MOOD_PHRASE
+    turns: int = 0
+
+    def advance(self, detected_emotion: EmotionInput, **kwargs) -> "MoodState":
+        """Next state after one detected emotion or shift (see update_eliana_emotional_state)."""
+        value, phrase = update_eliana_emotional_state(self.value, detected_emotion, **kwargs)
+        return MoodState(value, phrase, self.turns + 1)
+
+    def advance_by(self, delta: float, **kwargs) -> "MoodState":
+        """Next state for an already computed delta (e.g. a dot product)."""
+        value = apply_mood_delta(self.value, delta, **kwargs)
+        return MoodState(value, get_phrase_table().lookup(value), self.turns + 1)
+
+    def as_tuple(self) -> Tuple[float, str]:
+        """Historical (emotional_value, mood_phrase) shape."""
+        return self.value, self.phrase
+
+
+def __getattr__(name: str):
+    # `eliana_emotional_value` was a shared module global; mood is per
+    # session now (SessionMemory.mood). Old imports get the baseline.
+    if name == "eliana_emotional_value":
+        warnings.warn(
+            "eliana_mood.eliana_emotional_value is deprecated; use SessionMemory.mood",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return ELIANA_BASELINE
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -0,0 +1,280 @@
+"""
+===============================================================================
+    emotion_history.py
+    ---------------------------------------------------------------------------
+    Columnar per-source emotion history for vectorized mood and trend queries.
+===============================================================================
+
+Emotion entries arrive as `Dict[str, float]` (label → weight), one per
+turn. Aggregating them as dicts — moving averages, dominant emotion over
+the last N turns, transition detection — meant a Python loop over every
+entry. `EmotionHistory` stores the same data column-wise:
+
+-------------------------------------------------------------------------------
+1. LAYOUT
+-------------------------------------------------------------------------------
+• `labels` / `vocab`: emotion-label vocabulary, in first-seen order.
+• `values`: turns × labels float32 matrix (absent label = 0.0).
+• `present`: turns × labels bool mask, so "absent" and "weight 0" stay
+  distinguishable for dominant-label queries.
+• Both grow in chunks (ROW_CHUNK rows, LABEL_CHUNK columns), so appends are
+  amortized O(labels in the entry).
+
+-------------------------------------------------------------------------------
+2. BOUNDS
+-------------------------------------------------------------------------------
+• At most `max_rows` turns are kept as rows; when the buffer fills, the
+  oldest ROW_CHUNK rows are dropped in one block move (amortized O(1) per
+  append), so at least `max_rows - ROW_CHUNK` recent turns are always
+  available to window queries.
+• Session-wide aggregates survive eviction: float64 per-label `totals`,
+  the entry `count`, and the latest dominant-label `transitions`.
+
+-------------------------------------------------------------------------------
+3. QUERIES (vectorized over the stored rows)
+-------------------------------------------------------------------------------
+• window(n) / window_mean(n)     last n turns, raw or averaged per label
+• ema(alpha, n)                  exponential moving average per label
+• dominant(n)                    strongest label over the last n turns
+• dominant_sequence(n)           per-turn dominant labels
+• project(weights, n)            per-turn dot product with a label-weight
+                                 vector (mood deltas, see eliana_mood)
+• top_labels(k, n) / trend(...)  compact summaries for prompts and metadata
+
+Dominant-label ties resolve alphabetically (see `dominant_label`).
+===============================================================================
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ROW_CHUNK = 64
+LABEL_CHUNK = 16
+MAX_ROWS = 512
+TRANSITION_LIMIT = 5
+
+
+def dominant_label(emotions: Dict[str, float]) -> Optional[str]:
+    """Highest-weighted label of one entry; ties resolve alphabetically."""
+    if not emotions:
+        return None
+    return min(emotions, key=lambda label: (-emotions[label], label))
+
+
+class EmotionHistory:
+    """
+    Turns × labels emotion matrix for one source ("user" or "eliana").
+
+    Attributes:
+        count: entries appended over the whole session (evicted included).
+        totals: float64 per-label sums over the whole session.
+        transitions: latest "previous → current" dominant-label changes.
+    """
+
+    def __init__(self, max_rows: int = MAX_ROWS, transition_limit: int = TRANSITION_LIMIT):
+        self.max_rows = max_rows
+        self.transition_limit = transition_limit
+        self._reset()
+
+    def _reset(self) -> None:
+        rows = min(ROW_CHUNK, self.max_rows)
+        self.labels: List[str] = []
+        self.vocab: Dict[str, int] = {}
+        self._values = np.zeros((rows, LABEL_CHUNK), dtype=np.float32)
+        self._present = np.zeros((rows, LABEL_CHUNK), dtype=bool)
+        self._totals = np.zeros(LABEL_CHUNK, dtype=np.float64)
+        self._rank = np.zeros(0, dtype=np.int64)
+        self._rows = 0
+        self.count = 0
+        self.transitions: Deque[str] = deque(maxlen=self.transition_limit)
+        self.previous_dominant: Optional[str] = None
+        # (label-weight source, vector aligned to self.labels) for project()
+        self._aligned = None
+
+    # --- Storage ---
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def values(self) -> np.ndarray:
+        """View of the stored rows (oldest first); do not mutate."""
+        return self._values[:self._rows, :len(self.labels)]
+
+    @property
+    def present(self) -> np.ndarray:
+        return self._present[:self._rows, :len(self.labels)]
+
+    @property
+    def totals(self) -> Dict[str, float]:
+        return {label: float(self._totals[i]) for i, label in enumerate(self.labels)}
+
+    def _label_index(self, label: str) -> int:
+        index = self.vocab.get(label)
+        if index is not None:
+            return index
+        index = len(self.labels)
+        if index == self._values.shape[1]:
+            grow = ((0, 0), (0, LABEL_CHUNK))
+            self._values = np.pad(self._values, grow)
+            self._present = np.pad(self._present, grow)
+            self._totals = np.pad(self._totals, (0, LABEL_CHUNK))
+        self.vocab[label] = index
+        self.labels.append(label)
+        # Alphabetical rank per column, for deterministic tie-breaking.
+        self._rank = np.argsort(np.argsort(np.array(self.labels, dtype=object)))
+        return index
+
+    def _next_row(self) -> int:
+        if self._rows == self._values.shape[0]:
+            if self._rows >= self.max_rows:
+                keep = self.max_rows - ROW_CHUNK if self.max_rows > ROW_CHUNK else self.max_rows - 1
+                drop = self._rows - keep
+                self._values[:keep] = self._values[drop:self._rows]
+                self._present[:keep] = self._present[drop:self._rows]
+                self._values[keep:] = 0.0
+                self._present[keep:] = False
+                self._rows = keep
+            else:
+                grow = ((0, min(ROW_CHUNK, self.max_rows - self._rows)), (0, 0))
+                self._values = np.pad(self._values, grow)
+                self._present = np.pad(self._present, grow)
+        row = self._rows
+        self._rows += 1
+        return row
+
+    def append(self, emotions: Dict[str, float]) -> Optional[str]:
+        """Add one turn's emotions; returns that turn's dominant label."""
+        columns = [self._label_index(label) for label in emotions]
+        row = self._next_row()
+        for column, weight in zip(columns, emotions.values()):
+            self._values[row, column] = weight
+            self._present[row, column] = True
+            self._totals[column] += weight
+        self.count += 1
+
+        # Taken from the dict, not the float32 row, so ties match the
+        # reference computation exactly.
+        current = dominant_label(emotions)
+        if current and self.previous_dominant and current != self.previous_dominant:
+            self.transitions.append(f"{self.previous_dominant} → {current}")
+        self.previous_dominant = current or self.previous_dominant
+        return current
+
+    # --- Queries ---
+    def window(self, n: Optional[int] = None) -> np.ndarray:
+        """Last n rows (all stored rows if n is None)."""
+        values = self.values
+        return values if n is None else values[max(0, len(values) - n):]
+
+    def window_mean(self, n: Optional[int] = None) -> Dict[str, float]:
+        """Per-label mean over the last n turns (absent labels count as 0)."""
+        window = self.window(n)
+        if not len(window):
+            return {}
+        means = window.mean(axis=0, dtype=np.float64)
+        return {label: float(means[i]) for i, label in enumerate(self.labels)}
+
+    def ema(self, alpha: float = 0.5, n: Optional[int] = None) -> Dict[str, float]:
+        """
+        Exponential moving average per label over the last n turns; the
+        newest turn has weight `alpha`. Weights are normalized, so a short
+        window is not biased towards zero.
+        """
+        window = self.window(n)
+        if not len(window):
+            return {}
+        weights = (1.0 - alpha) ** np.arange(len(window) - 1, -1, -1, dtype=np.float64)
+        averaged = weights @ window / weights.sum()
+        return {label: float(averaged[i]) for i, label in enumerate(self.labels)}
+
+    def _dominant_of(self, values: np.ndarray, present: np.ndarray) -> List[Optional[str]]:
+        """Per-row dominant label; ties → alphabetically first; empty row → None."""
+        labels = len(self.labels)
+        values, present = values[:, :labels], present[:, :labels]
+        if not labels:
+            return [None] * len(values)
+        masked = np.where(present, values, -np.inf)
+        best = masked.max(axis=1, keepdims=True)
+        candidates = present & (masked == best)
+        choice = np.where(candidates, self._rank, labels).argmin(axis=1)
+        has_any = present.any(axis=1)
+        return [self.labels[c] if ok else None for c, ok in zip(choice, has_any)]
+
+    def dominant_sequence(self, n: Optional[int] = None) -> List[Optional[str]]:
+        rows = self.window(n)
+        start = self._rows - len(rows)
+        return self._dominant_of(rows, self._present[start:self._rows])
+
+    def dominant(self, n: int = 1) -> Optional[str]:
+        """Strongest label by summed weight over the last n turns."""
+        rows = self.window(n)
+        if not len(rows):
+            return None
+        start = self._rows - len(rows)
+        present = self._present[start:self._rows, :len(self.labels)].any(axis=0, keepdims=True)
+        summed = rows.sum(axis=0, dtype=np.float64, keepdims=True)
+        return self._dominant_of(summed, present)[0]
+
+    def project(self, weights, n: Optional[int] = None) -> np.ndarray:
+        """
+        Per-turn dot product of the last n rows with a label-weight vector.
+
+        `weights` is anything with `align(labels) -> np.ndarray`, e.g.
+        eliana_mood.CompiledChangeMap (→ per-turn mood deltas). The aligned
+        vector is cached and only extended when the vocabulary grows.
+        """
+        cached = self._aligned
+        if cached is None or cached[0] is not weights:
+            vector = weights.align(self.labels)
+        else:
+            vector = cached[1]
+            if len(vector) < len(self.labels):
+                vector = np.concatenate([vector, weights.align(self.labels[len(vector):])])
+        self._aligned = (weights, vector)
+        return self.window(n) @ vector
+
+    def top_labels(self, k: int = 3, n: Optional[int] = None, alpha: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Top-k (label, score) by window mean, or by EMA when alpha is given."""
+        scores = self.ema(alpha, n) if alpha is not None else self.window_mean(n)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def trend(self, n: int = 5, alpha: float = 0.5, k: int = 3) -> Dict[str, Any]:
+        """Compact trend report used for reflection metadata."""
+        return {
+            "dominant": self.dominant(n),
+            "recent_top": [label for label, _ in self.top_labels(k, n)],
+            "ema_top": [label for label, _ in self.top_labels(k, n, alpha)],
+            "transitions": list(self.transitions),
+        }
+
+    # --- Persistence ---
+    def state(self) -> Dict[str, Any]:
+        return {
+            "labels": list(self.labels),
+            "values": self.values.tolist(),
+            "present": self.present.tolist(),
+            "totals": self._totals[:len(self.labels)].tolist(),
+            "count": self.count,
+            "transitions": list(self.transitions),
+            "previous_dominant": self.previous_dominant,
+        }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        self._reset()
+        for label in state["labels"]:
+            self._label_index(label)
+        rows = len(state["values"])
+        while self._values.shape[0] < rows:
+            self._values = np.pad(self._values, ((0, ROW_CHUNK), (0, 0)))
+            self._present = np.pad(self._present, ((0, ROW_CHUNK), (0, 0)))
+        labels = len(self.labels)
+        if rows:
+            self._values[:rows, :labels] = np.asarray(state["values"], dtype=np.float32)
+            self._present[:rows, :labels] = np.asarray(state["present"], dtype=bool)
+        self._rows = rows
+        self._totals[:labels] = state["totals"]
+        self.count = state["count"]
+        self.transitions.extend(state["transitions"])
+        self.previous_dominant = state["previous_dominant"]
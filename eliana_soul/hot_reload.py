@@ -0,0 +1,204 @@
+"""
+=====================================================================
+Static Bank Hot Reload — Background Rebuild + Atomic Swap
+=====================================================================
+
+Purpose
+-------
+Editing `core_memory.json`, the emotion anchors, or the psych models used
+to require a process restart, dropping every in-flight session. The
+`StaticBankReloader` watches the static source files, builds a complete
+new bank set in the background, and swaps it into the live reference in
+a single assignment.
+
+Guarantees
+----------
+• Zero added latency on the turn path:
+      `reloader.current()` is one attribute read; no locks, no I/O.
+      New banks are fully preloaded (no lazy loads) before the swap.
+
+• In-flight turns finish on the version they started with:
+      a turn captures `static_data = reloader.current()` once and uses
+      that object throughout; the swap never mutates it.
+
+• Every turn can record which banks it used:
+      each StaticData carries a monotonically increasing `version`;
+      at turn start, `static_loader.record_static_bank_version`
+      stores it as `full_prompt_data["static_bank_version"]`.
+
+• Failed rebuilds never replace a working set:
+      the error is logged and the previous version stays live; the
+      same inputs are not retried until a file changes again.
+
+Change Detection
+----------------
+Source files are polled (size + mtime_ns) every `poll_interval` seconds —
+no platform-specific watcher dependency. A change is acted on only after
+the fingerprints are stable for one further poll, so a reload never
+reads a half-written file.
+
+Usage
+-----
+    reloader = StaticBankReloader(load_static_data())
+    reloader.start()
+    ...
+    static_data = reloader.current()          # once per turn
+    record_static_bank_version(full_prompt_data, static_data)
+    reply, full_prompt_data = handle_user_input(..., static_data=static_data)
+    ...
+    reloader.stop()
+
+=====================================================================
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from runtime_snapshot import load_or_build_snapshot, source_fingerprints
+from static_loader import ALL_BANKS, StaticData
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+class StaticBankReloader:
+    """
+    Owns the live static-data reference and replaces it when sources change.
+
+    Attributes:
+        version: version number of the live bank set.
+        last_reload: {"version", "build_ms", "finished_at", "error"} of the
+                     latest reload attempt (None before the first reload).
+    """
+
+    def __init__(
+        self,
+        initial: Optional[StaticData] = None,
+        data_dir: Optional[str] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_snapshot: bool = False,
+        snapshot_path: Optional[str] = None,
+    ):
+        self.data_dir = data_dir if data_dir is not None else getattr(initial, "data_dir", None)
+        self.poll_interval = poll_interval
+        self.use_snapshot = use_snapshot
+        self.snapshot_path = snapshot_path
+        self.last_reload: Optional[Dict[str, Any]] = None
+
+        self._listeners: List[Callable[[StaticData, StaticData], None]] = []
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._current = initial if initial is not None else self._build()
+        self._fingerprints = self._fingerprint()
+        self._failed: Optional[Dict[str, Any]] = None
+
+    # --- Turn path ---
+    def current(self) -> StaticData:
+        """Live bank set. Capture once per turn and use it throughout."""
+        return self._current
+
+    @property
+    def version(self) -> int:
+        return self._current.version
+
+    # --- Reloading ---
+    def add_listener(self, callback: Callable[[StaticData, StaticData], None]) -> None:
+        """Register `callback(old, new)`, invoked after every successful swap."""
+        self._listeners.append(callback)
+
+    def _fingerprint(self) -> Optional[Dict[str, Any]]:
+        try:
+            return {
+                name: (fp["size"], fp["mtime_ns"])
+                for name, fp in source_fingerprints(self.data_dir).items()
+            }
+        except OSError:
+            # A file is mid-replace or missing; treat as "unknown" and retry.
+            return None
+
+    def _build(self) -> StaticData:
+        if self.use_snapshot:
+            return load_or_build_snapshot(self.snapshot_path, self.data_dir).to_static_data(self.data_dir)
+        return StaticData(data_dir=self.data_dir).preload(ALL_BANKS)
+
+    def reload_now(self) -> bool:
+        """
+        Build a new bank set and swap it in.
+
+        Runs on the caller's thread (the watcher thread in normal use).
+        Returns True if the swap happened.
+        """
+        with self._reload_lock:
+            old = self._current
+            start = time.perf_counter()
+            try:
+                new = self._build()
+            except Exception as e:
+                logger.exception("Static bank reload failed; keeping version %d", old.version)
+                self.last_reload = {
+                    "version": old.version,
+                    "build_ms": round((time.perf_counter() - start) * 1000, 2),
+                    "finished_at": time.time(),
+                    "error": repr(e),
+                }
+                return False
+
+            new.version = old.version + 1
+            self._current = new  # single reference assignment: the swap
+            self.last_reload = {
+                "version": new.version,
+                "build_ms": round((time.perf_counter() - start) * 1000, 2),
+                "finished_at": time.time(),
+                "error": None,
+            }
+            logger.info("Static banks reloaded: version %d → %d in %.1f ms",
+                        old.version, new.version, self.last_reload["build_ms"])
+
+        for callback in list(self._listeners):
+            try:
+                callback(old, new)
+            except Exception:
+                logger.exception("Static bank reload listener failed")
+        return True
+
+    # --- Watcher ---
+    def _watch(self) -> None:
+        candidate = None
+        while not self._stop.wait(self.poll_interval):
+            fingerprints = self._fingerprint()
+            if fingerprints is None or fingerprints == self._fingerprints:
+                candidate = None
+                continue
+            if fingerprints != candidate:
+                # First sighting of this change: wait one more poll for the
+                # writer to finish before reading the files.
+                candidate = fingerprints
+                continue
+            if fingerprints == self._failed:
+                # Same broken inputs as the last failed attempt; wait for
+                # another edit instead of rebuilding in a loop.
+                continue
+            if self.reload_now():
+                self._fingerprints = fingerprints
+                self._failed = None
+            else:
+                self._failed = fingerprints
+            candidate = None
+
+    def start(self) -> "StaticBankReloader":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="static-bank-reloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
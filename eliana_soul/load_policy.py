@@ -0,0 +1,505 @@
+"""
+=====================================================================
+Load Policy — Admission Control & Graceful Degradation
+=====================================================================
+
+Purpose
+-------
+When the LLM backend slows down, every turn still makes its optional LLM
+calls (GPT emotion fallback, `gpt_emotion_interpretation`, the
+`summarize_interaction` reflection), which compounds the overload. This
+module watches two signals and turns them into a per-turn plan:
+
+    • queue depth       — turns admitted but not yet finished
+    • backend latency   — p95 of recent LLM call durations
+
+Degradation Levels
+------------------
+    Level 0  NORMAL       every stage runs
+    Level 1  ELEVATED     reflections are deferred until load drops
+    Level 2  HIGH         + cosine-only emotion routing (no GPT fallback)
+                          + no gpt_emotion_interpretation
+    Level 3  CRITICAL     + prompt sections truncated to a fixed budget
+    Shed                  queue depth ≥ max_queue_depth → turn rejected
+
+Levels step up as soon as a threshold is crossed, and step down only when
+both signals fall below `recovery_ratio` × the threshold, so the policy
+does not flap around a boundary.
+
+Deferred reflections are queued on `get_deferred_reflections()` (at most
+ELIANA_DEFERRED_REFLECTIONS_MAX, oldest dropped first) and run by its
+background thread once the policy is back at level 0.
+
+Auditability
+------------
+Every plan is written into `full_prompt_data["degradations"]`:
+
+    {
+        "level": 2,
+        "modes": ["defer_reflection", "cosine_only_emotion",
+                  "skip_gpt_interpretation"],
+        "reasons": ["backend_p95_ms=10840 >= 10000"],
+        "queue_depth": 5,
+        "backend_p95_ms": 10840.0
+    }
+
+so reply quality can later be compared between degraded and normal turns.
+
+Rate Limiting
+-------------
+`get_llm_rate_limiter()` returns a token bucket shared by every LLM caller
+in the process (turns, consolidation jobs, bulk runners), limiting requests
+per minute and prompt+completion tokens per minute to the account's quota:
+
+    ELIANA_LLM_RPM   requests per minute   (default 0 = unlimited)
+    ELIANA_LLM_TPM   tokens per minute     (default 0 = unlimited)
+
+Usage
+-----
+    load_monitor = get_load_monitor()
+    with load_monitor.track_turn():                  # raises Overloaded
+        plan = get_degradation_policy().plan()
+        route = should_trigger_emotion_check(text, top, cosine_only=plan.cosine_only_emotion)
+        ...
+        with load_monitor.time_backend_call():
+            reply = get_client().chat.completions.create(...)
+        plan.record(full_prompt_data)
+        if plan.defer_reflection:
+            get_deferred_reflections().defer(summarize_interaction, text, reply, full_prompt_data)
+
+=====================================================================
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Raised by LoadMonitor.track_turn when the turn is shed."""
+
+
+# === LOAD SIGNALS ===
+class LoadMonitor:
+    """
+    Tracks in-flight turns and recent backend latency.
+
+    Thread-safe; all counters are guarded by one lock held for O(1) work.
+    """
+
+    def __init__(self, latency_window: int = 50, max_queue_depth: int = 64):
+        self.max_queue_depth = max_queue_depth
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self.shed_count = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._in_flight
+
+    @contextmanager
+    def track_turn(self):
+        """Admit a turn for the duration of the block, or raise Overloaded."""
+        with self._lock:
+            if self._in_flight >= self.max_queue_depth:
+                self.shed_count += 1
+                raise Overloaded(f"queue depth {self._in_flight} >= {self.max_queue_depth}")
+            self._in_flight += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def record_backend_latency(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    @contextmanager
+    def time_backend_call(self):
+        """Time an LLM call; failures count too, since they cost the same wait."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_backend_latency(time.perf_counter() - start)
+
+    def backend_p95_ms(self) -> float:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))
+        return samples[index] * 1000
+
+
+# === DEGRADATION PLAN ===
+MODE_DEFER_REFLECTION = "defer_reflection"
+MODE_COSINE_ONLY = "cosine_only_emotion"
+MODE_SKIP_GPT_INTERPRETATION = "skip_gpt_interpretation"
+MODE_TRUNCATE_PROMPT = "truncate_prompt_sections"
+
+# Modes switched on at each level (cumulative).
+LEVEL_MODES = {
+    0: (),
+    1: (MODE_DEFER_REFLECTION,),
+    2: (MODE_DEFER_REFLECTION, MODE_COSINE_ONLY, MODE_SKIP_GPT_INTERPRETATION),
+    3: (MODE_DEFER_REFLECTION, MODE_COSINE_ONLY, MODE_SKIP_GPT_INTERPRETATION, MODE_TRUNCATE_PROMPT),
+}
+
+
+class DegradationPlan:
+    """The set of degradations one turn must apply."""
+
+    __slots__ = ("level", "modes", "reasons", "queue_depth", "backend_p95_ms", "prompt_section_limit")
+
+    def __init__(self, level: int, reasons: List[str], queue_depth: int,
+                 backend_p95_ms: float, prompt_section_limit: int):
+        self.level = level
+        self.modes = LEVEL_MODES[level]
+        self.reasons = reasons
+        self.queue_depth = queue_depth
+        self.backend_p95_ms = backend_p95_ms
+        self.prompt_section_limit = prompt_section_limit
+
+    @property
+    def cosine_only_emotion(self) -> bool:
+        return MODE_COSINE_ONLY in self.modes
+
+    @property
+    def gpt_interpretation_enabled(self) -> bool:
+        """Pass as `fallback_enabled` to interpret_emotion_effects."""
+        return MODE_SKIP_GPT_INTERPRETATION not in self.modes
+
+    @property
+    def defer_reflection(self) -> bool:
+        return MODE_DEFER_REFLECTION in self.modes
+
+    @property
+    def truncate_prompt(self) -> bool:
+        return MODE_TRUNCATE_PROMPT in self.modes
+
+    def truncate_section(self, text: Optional[str]) -> Optional[str]:
+        """
+        Trim a prompt section (summary, personality context, ...) to the
+        section budget when prompt truncation is active. Cuts at the last
+        line break inside the budget so entries are never split mid-line.
+        """
+        if not text or not self.truncate_prompt or len(text) <= self.prompt_section_limit:
+            return text
+        cut = text[:self.prompt_section_limit]
+        newline = cut.rfind("\n")
+        if newline > self.prompt_section_limit // 2:
+            cut = cut[:newline]
+        return cut.rstrip() + "\n[…truncated under load]"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "modes": list(self.modes),
+            "reasons": list(self.reasons),
+            "queue_depth": self.queue_depth,
+            "backend_p95_ms": round(self.backend_p95_ms, 1),
+        }
+
+    def record(self, full_prompt_data: Dict[str, Any]) -> None:
+        """Write this plan into the turn's full_prompt_data for auditing."""
+        full_prompt_data["degradations"] = self.as_dict()
+
+
+# === POLICY ===
+class DegradationPolicy:
+    """
+    Maps load signals to a degradation level with hysteresis.
+
+    thresholds: level → (queue_depth, backend_p95_ms); a level is entered
+    when *either* signal reaches its threshold.
+    """
+
+    DEFAULT_THRESHOLDS: Dict[int, Tuple[int, float]] = {
+        1: (8, 6000.0),
+        2: (16, 10000.0),
+        3: (32, 15000.0),
+    }
+
+    def __init__(
+        self,
+        monitor: LoadMonitor,
+        thresholds: Optional[Dict[int, Tuple[int, float]]] = None,
+        recovery_ratio: float = 0.8,
+        prompt_section_limit: int = 1200,
+    ):
+        self.monitor = monitor
+        self.thresholds = dict(thresholds or self.DEFAULT_THRESHOLDS)
+        self.recovery_ratio = recovery_ratio
+        self.prompt_section_limit = prompt_section_limit
+        self._level = 0
+        self._lock = threading.Lock()
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    def _triggered(self, level: int, depth: int, p95_ms: float, ratio: float) -> List[str]:
+        max_depth, max_ms = self.thresholds[level]
+        reasons = []
+        if depth >= max_depth * ratio:
+            reasons.append(f"queue_depth={depth} >= {max_depth * ratio:g}")
+        if p95_ms >= max_ms * ratio:
+            reasons.append(f"backend_p95_ms={p95_ms:.0f} >= {max_ms * ratio:g}")
+        return reasons
+
+    def plan(self) -> DegradationPlan:
+        """Evaluate current load and return the plan for the next turn."""
+        depth = self.monitor.queue_depth
+        p95_ms = self.monitor.backend_p95_ms()
+
+        with self._lock:
+            level, reasons = 0, []
+            for candidate in sorted(self.thresholds, reverse=True):
+                # Staying at (or above) the current level only requires the
+                # relaxed recovery threshold; climbing requires the full one.
+                ratio = self.recovery_ratio if candidate <= self._level else 1.0
+                hit = self._triggered(candidate, depth, p95_ms, ratio)
+                if hit:
+                    level, reasons = candidate, hit
+                    break
+            if level != self._level:
+                logger.warning("Degradation level %d → %d (%s)", self._level, level, "; ".join(reasons) or "recovered")
+                self._level = level
+
+        return DegradationPlan(level, reasons, depth, p95_ms, self.prompt_section_limit)
+
+
+# === DEFERRED REFLECTIONS ===
+DEFERRED_REFLECTIONS_MAX = int(os.getenv("ELIANA_DEFERRED_REFLECTIONS_MAX", "1000"))
+DRAIN_POLL_SECONDS = float(os.getenv("ELIANA_DEFERRED_DRAIN_POLL", "5"))
+
+
+class DeferredReflectionQueue:
+    """
+    Bounded queue of deferred `summarize_interaction` calls.
+
+    Reflections are internal memory, never user-visible, so running them
+    late is safe. When the queue is full the oldest entry is dropped and
+    counted rather than blocking the turn.
+
+    With a `policy`, the first `defer()` (and the first after `stop()`)
+    starts a background thread that checks every `poll_seconds` and drains
+    the queue whenever the policy is back at level 0 (stopping again as
+    soon as load rises). The queue is in memory only: reflections still
+    queued when the process exits are lost, the same as a reflection cut
+    by a crash mid-turn.
+    """
+
+    def __init__(self, maxlen: int = DEFERRED_REFLECTIONS_MAX, policy: Optional["DegradationPolicy"] = None,
+                 poll_seconds: float = DRAIN_POLL_SECONDS):
+        self._items: Deque[Tuple[Callable, tuple, dict, float]] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.policy = policy
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def defer(self, fn: Callable, *args, **kwargs) -> None:
+        with self._lock:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append((fn, args, kwargs, time.time()))
+            if self.policy is not None and self._thread is None:
+                # A fresh stop event per thread: a defer() after stop()
+                # restarts draining without reviving the old thread.
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._loop, args=(self._stop,),
+                                                name="deferred-reflections", daemon=True)
+                self._thread.start()
+
+    def drain(self, policy: Optional["DegradationPolicy"] = None, max_items: Optional[int] = None) -> List[Any]:
+        """
+        Run deferred reflections, oldest first.
+
+        Stops early if `policy` reports load above level 0 again. Results
+        are returned in order; failed calls are logged and skipped.
+        """
+        results = []
+        while max_items is None or len(results) < max_items:
+            if policy is not None and policy.plan().level > 0:
+                break
+            with self._lock:
+                if not self._items:
+                    break
+                fn, args, kwargs, _ = self._items.popleft()
+            try:
+                results.append(fn(*args, **kwargs))
+            except Exception:
+                logger.exception("Deferred reflection failed")
+        return results
+
+    def _loop(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+            if self._items and not stop.is_set():
+                try:
+                    self.drain(self.policy)
+                except Exception:
+                    logger.exception("Deferred reflection drain error")
+
+    def notify(self) -> None:
+        """Check the policy now instead of at the next poll."""
+        self._wakeup.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the drain thread after the reflection it is running. Entries
+        still queued stay queued; the next `defer()` starts a new thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stop.set()
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout)
+
+
+# === RATE LIMITING ===
+class RateLimiter:
+    """
+    Token-bucket limiter on requests and tokens per minute.
+
+    Each bucket holds at most one minute of quota and refills
+    continuously, so short bursts are allowed while the average stays
+    under the limit. A limit of 0 disables that bucket. Thread-safe;
+    waiting callers sleep outside the lock.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._refilled = time.monotonic()
+        self.waited_seconds = 0.0
+        self.acquired = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled
+        self._refilled = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _wait_time(self, tokens: float) -> float:
+        wait = 0.0
+        if self.requests_per_minute and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            # A call larger than the whole bucket waits for a full bucket.
+            needed = min(tokens, self.tokens_per_minute)
+            if self._tokens < needed:
+                wait = max(wait, (needed - self._tokens) * 60 / self.tokens_per_minute)
+        return wait
+
+    def acquire(self, tokens: float = 0) -> float:
+        """
+        Block until one request carrying ~`tokens` tokens fits the quota,
+        then take it. Returns the seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    if self.requests_per_minute:
+                        self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= min(tokens, self.tokens_per_minute)
+                    self.acquired += 1
+                    self.waited_seconds += waited
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+    def record_tokens(self, tokens: float) -> None:
+        """Charge tokens known only after the call (e.g. the completion)."""
+        if self.tokens_per_minute:
+            with self._lock:
+                self._refill(time.monotonic())
+                self._tokens -= tokens
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "acquired": self.acquired,
+                "waited_s": round(self.waited_seconds, 3),
+            }
+
+
+# === PROCESS-WIDE DEFAULTS ===
+# Shared by the CLI/API runtime, built on first use so importing this
+# module reads no environment and starts nothing.
+_llm_rate_limiter: Optional[RateLimiter] = None
+_load_monitor: Optional[LoadMonitor] = None
+_degradation_policy: Optional[DegradationPolicy] = None
+_deferred_reflections: Optional[DeferredReflectionQueue] = None
+_defaults_lock = threading.Lock()
+
+
+def get_llm_rate_limiter() -> RateLimiter:
+    """Shared RateLimiter from ELIANA_LLM_RPM / ELIANA_LLM_TPM, built on first use."""
+    global _llm_rate_limiter
+    if _llm_rate_limiter is None:
+        with _defaults_lock:
+            if _llm_rate_limiter is None:
+                _llm_rate_limiter = RateLimiter(
+                    float(os.getenv("ELIANA_LLM_RPM", "0")),
+                    float(os.getenv("ELIANA_LLM_TPM", "0")),
+                )
+    return _llm_rate_limiter
+
+
+def get_load_monitor() -> LoadMonitor:
+    """Shared LoadMonitor, built on first use."""
+    global _load_monitor
+    if _load_monitor is None:
+        with _defaults_lock:
+            if _load_monitor is None:
+                _load_monitor = LoadMonitor()
+    return _load_monitor
+
+
+def get_degradation_policy() -> DegradationPolicy:
+    """Shared DegradationPolicy over get_load_monitor(), built on first use."""
+    global _degradation_policy
+    if _degradation_policy is None:
+        monitor = get_load_monitor()
+        with _defaults_lock:
+            if _degradation_policy is None:
+                _degradation_policy = DegradationPolicy(monitor)
+    return _degradation_policy
+
+
+def get_deferred_reflections() -> DeferredReflectionQueue:
+    """Shared DeferredReflectionQueue drained by get_degradation_policy()."""
+    global _deferred_reflections
+    if _deferred_reflections is None:
+        policy = get_degradation_policy()
+        with _defaults_lock:
+            if _deferred_reflections is None:
+                _deferred_reflections = DeferredReflectionQueue(policy=policy)
+    return _deferred_reflections
@@ -0,0 +1,234 @@
+"""
+===============================================================================
+    memory_index.py
+    ---------------------------------------------------------------------------
+    Per-user vector index over personality fragments and soul sketches.
+===============================================================================
+
+The personality context only carries the soul picture, the latest sketch
+and the last fragment, so an older session that matters for today's
+message is invisible unless consolidation happened to keep it. This index
+makes every fragment and sketch the user ever had recallable by meaning.
+
+-------------------------------------------------------------------------------
+LAYOUT (inside the user's PersonalityStore directory)
+-------------------------------------------------------------------------------
+    memory_index.f32     row-major float32 vectors, L2-normalized
+    memory_index.jsonl   one line per row: layer, digest, rendered text,
+                         token count, dim, timestamp
+
+• Both files are append-only. Archiving a fragment/sketch does not touch
+  the index: archived memories stay recallable.
+• Rows are added by the index jobs of user_personality_engine, one
+  append per file. Re-adding an entry with the same digest is a no-op.
+• A crash between the two appends leaves a vector without metadata (or a
+  torn line); readers use only the rows present in both files, and the
+  next add writes over the partial tail.
+
+-------------------------------------------------------------------------------
+RETRIEVAL
+-------------------------------------------------------------------------------
+`search(user_id, query_vector, k, max_tokens)` scores every row with one
+matrix-vector product against the turn's message vector (already computed
+for resonance), takes the top k by cosine similarity, and keeps them in
+score order while they fit in `max_tokens`. The loaded matrix is cached
+per user in a small LRU and revalidated by file version, so a turn costs
+one stat() plus the product.
+===============================================================================
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from utils import file_lock, file_version
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "memory_index.f32"
+META_FILE = "memory_index.jsonl"
+INDEX_CACHE_SIZE = int(os.getenv("ELIANA_MEMORY_INDEX_CACHE", "1024"))
+
+
+class Memory(NamedTuple):
+    layer: str
+    digest: str
+    text: str
+    tokens: int
+    score: float
+
+
+def _normalize(vector) -> Optional[np.ndarray]:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    if not vector.size or not norm:
+        return None
+    return vector / norm
+
+
+class _UserIndex(NamedTuple):
+    matrix: np.ndarray         # (rows, dim) float32, normalized
+    meta: List[Dict]
+    digests: frozenset
+    meta_bytes: int            # length of the valid prefix of META_FILE
+
+
+class MemoryIndex:
+    """
+    Vector index per user, stored next to the user's personality layers.
+
+    Parameters
+    ----------
+    store : PersonalityStore
+        Provides the per-user directory (store.user_dir) and fsync policy.
+    """
+
+    def __init__(self, store, cache_size: int = INDEX_CACHE_SIZE):
+        self.store = store
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[_UserIndex, Tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _paths(self, user_id: str) -> Tuple[str, str]:
+        directory = self.store.user_dir(user_id)
+        return os.path.join(directory, VECTORS_FILE), os.path.join(directory, META_FILE)
+
+    def _versions(self, user_id: str) -> Tuple:
+        return tuple(file_version(path) for path in self._paths(user_id))
+
+    # --- Reads ---
+    def _read(self, user_id: str) -> _UserIndex:
+        vectors_path, meta_path = self._paths(user_id)
+        meta, ends = [], []
+        try:
+            with open(meta_path, "rb") as f:
+                offset = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn tail
+                    try:
+                        meta.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+                    offset += len(line)
+                    ends.append(offset)
+        except FileNotFoundError:
+            pass
+        if not meta:
+            return _UserIndex(np.zeros((0, 0), dtype=np.float32), [], frozenset(), 0)
+
+        dim = meta[0]["dim"]
+        raw = np.fromfile(vectors_path, dtype=np.float32) if os.path.exists(vectors_path) else np.zeros(0, np.float32)
+        rows = min(len(meta), raw.size // dim)
+        meta = meta[:rows]
+        matrix = raw[:rows * dim].reshape(rows, dim)
+        return _UserIndex(matrix, meta, frozenset(entry["digest"] for entry in meta), ends[rows - 1] if rows else 0)
+
+    def _load(self, user_id: str) -> _UserIndex:
+        versions = self._versions(user_id)
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and cached[1] == versions:
+                self._cache.move_to_end(user_id)
+                return cached[0]
+        index = self._read(user_id)
+        with self._lock:
+            self._cache[user_id] = (index, versions)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return index
+
+    def count(self, user_id: str) -> int:
+        return len(self._load(user_id).meta)
+
+    def has(self, user_id: str, digest: str) -> bool:
+        return digest in self._load(user_id).digests
+
+    def layer_counts(self, user_id: str) -> Dict[str, int]:
+        """Indexed rows per layer."""
+        counts: Dict[str, int] = {}
+        for entry in self._load(user_id).meta:
+            counts[entry["layer"]] = counts.get(entry["layer"], 0) + 1
+        return counts
+
+    # --- Writes ---
+    def add(self, user_id: str, layer: str, digest: str, text: str, tokens: int, vector) -> bool:
+        """Append one memory; returns False if `digest` is indexed already or the vector is empty."""
+        vector = _normalize(vector)
+        if vector is None:
+            return False
+        vectors_path, meta_path = self._paths(user_id)
+        os.makedirs(os.path.dirname(vectors_path), exist_ok=True)
+        with file_lock(meta_path):
+            index = self._read(user_id)
+            if digest in index.digests:
+                return False
+            if index.meta and index.meta[0]["dim"] != vector.size:
+                raise ValueError(f"vector dim {vector.size} != index dim {index.meta[0]['dim']} for {user_id}")
+            # Vectors first. Each write starts at the end of the valid
+            # prefix, so a row left half-written by a crash is overwritten.
+            line = {"layer": layer, "digest": digest, "text": text, "tokens": tokens,
+                    "dim": int(vector.size), "ts": time.time()}
+            self._write_at(vectors_path, len(index.meta) * vector.size * 4, vector.tobytes())
+            self._write_at(meta_path, index.meta_bytes, (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8"))
+        return True
+
+    def _write_at(self, path: str, offset: int, payload: bytes) -> None:
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(offset)
+            f.write(payload)
+            f.truncate()
+            if self.store.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    # --- Retrieval ---
+    def search(
+        self,
+        user_id: str,
+        query_vector,
+        k: int = 3,
+        max_tokens: Optional[int] = None,
+        exclude: Iterable[str] = (),
+        min_score: float = 0.0,
+    ) -> List[Memory]:
+        """
+        Top-k memories by cosine similarity to `query_vector`, best first,
+        skipping digests in `exclude` and keeping the total under
+        `max_tokens` (a memory that does not fit is skipped, not cut).
+        """
+        index = self._load(user_id)
+        query = _normalize(query_vector)
+        if query is None or not index.meta or k <= 0:
+            return []
+        if query.size != index.matrix.shape[1]:
+            logger.warning("Query dim %d != memory index dim %d for %s", query.size, index.matrix.shape[1], user_id)
+            return []
+
+        scores = index.matrix @ query
+        excluded = set(exclude)
+        # Over-fetch so exclusions and the token budget can still fill k.
+        fetch = min(len(scores), k + len(excluded) + 8)
+        top = np.argpartition(-scores, fetch - 1)[:fetch] if fetch < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        results, used = [], 0
+        for row in top:
+            entry = index.meta[row]
+            score = float(scores[row])
+            if score < min_score or len(results) >= k:
+                break
+            if entry["digest"] in excluded:
+                continue
+            if max_tokens is not None and used + entry["tokens"] > max_tokens:
+                continue
+            results.append(Memory(entry["layer"], entry["digest"], entry["text"], entry["tokens"], score))
+            used += entry["tokens"]
+        return results
@@ -0,0 +1,224 @@
+"""
+=====================================================================
+Mood Simulation — Vectorized Batch Trajectories
+=====================================================================
+
+Purpose
+-------
+`update_eliana_emotional_state` advances Eliana's emotional_value one
+turn at a time. Replaying stored logs for analysis (many users × many
+turns) with it is a Python loop per turn per user. This module computes
+all trajectories at once with NumPy, using exactly the same recurrence:
+
+    v[t+1] = clip(v[t] + (baseline - v[t]) * r + delta[t], 0, 1)
+
+Without the clip this is a linear recurrence
+
+    v[t+1] = a * v[t] + c[t]        a = 1 - r,  c[t] = r * baseline + delta[t]
+
+whose solution is a scan:
+
+    v[t] = a^t * v[0] + Σ_{k<t} a^(t-1-k) * c[k]
+
+Blocked Scan
+------------
+The closed form needs a^(-t), which loses precision for long sequences,
+so time is processed in blocks of `block` turns: inside a block the scan
+is evaluated in closed form for every sequence at once (a^(-block) stays
+small), and the final value carries into the next block.
+
+Clipping Fallback
+-----------------
+The closed form is only valid while no value leaves [0, 1]. Sequences
+whose block result leaves the range are recomputed for that block with
+the exact step-by-step recurrence — still vectorized across all affected
+sequences — so the output matches the scalar function.
+
+Inputs
+------
+    deltas        (batch, turns) per-turn deltas
+    labels        per-sequence lists of detected emotions → deltas through
+                  emotion_change_map (`deltas_for_labels`)
+    shifts        (batch, turns, labels) weighted emotional_shift tensors →
+                  one matrix product with the compiled change map
+                  (`deltas_for_shifts`)
+    histories     EmotionHistory objects (stored session logs) → per-turn
+                  projections (`deltas_for_histories`)
+
+Every path uses eliana_mood.get_compiled_change_map(), the same compiled
+vector live turns use, so replayed trajectories match live mood.
+
+Ragged batches pass `lengths`; positions past a sequence's length are NaN
+in `values` and `final` holds the value after its last real turn.
+
+Phrases come from the precomputed MoodPhraseTable (eliana_mood.py).
+
+Usage
+-----
+    result = simulate_mood_labels([["grief", "hope"], ["awe"]])
+    result.final               # array([...]) per sequence
+    result.phrases()           # object array of mood phrases, same shape
+
+=====================================================================
+"""
+
+from typing import Iterable, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from emotion_history import EmotionHistory
+
+from eliana_mood import (
+    DEFAULT_REBOUND_STRENGTH,
+    ELIANA_BASELINE,
+    get_compiled_change_map,
+    get_phrase_table,
+)
+
+DEFAULT_BLOCK = 64
+
+
+class MoodTrajectories(NamedTuple):
+    """
+    values:  (batch, turns) emotional_value after each turn (NaN past length)
+    final:   (batch,) value after each sequence's last turn
+    lengths: (batch,) number of real turns per sequence
+    """
+    values: np.ndarray
+    final: np.ndarray
+    lengths: np.ndarray
+
+    def phrases(self) -> np.ndarray:
+        """Mood phrase for every value (empty string past each length)."""
+        phrases = get_phrase_table().lookup_many(np.nan_to_num(self.values))
+        phrases[np.isnan(self.values)] = ""
+        return phrases
+
+    def final_phrases(self) -> np.ndarray:
+        return get_phrase_table().lookup_many(self.final)
+
+
+def _step_block(start: np.ndarray, deltas: np.ndarray, a: float, b: float) -> np.ndarray:
+    """Exact clipped recurrence over one block, vectorized across rows."""
+    out = np.empty_like(deltas)
+    value = start
+    for t in range(deltas.shape[1]):
+        value = np.clip(a * value + b + deltas[:, t], 0.0, 1.0)
+        out[:, t] = value
+    return out
+
+
+def simulate_mood(
+    deltas: Union[np.ndarray, Sequence[Sequence[float]]],
+    initial: Union[float, np.ndarray] = ELIANA_BASELINE,
+    baseline: float = ELIANA_BASELINE,
+    rebound_strength: float = DEFAULT_REBOUND_STRENGTH,
+    lengths: Optional[Iterable[int]] = None,
+    block: int = DEFAULT_BLOCK,
+) -> MoodTrajectories:
+    """
+    Run the mood recurrence for a batch of delta sequences.
+
+    Args:
+        deltas: (batch, turns) array of per-turn emotion deltas.
+        initial: starting emotional_value, scalar or per sequence.
+        lengths: real turns per sequence (default: all `turns`).
+        block: turns per closed-form block.
+    """
+    deltas = np.atleast_2d(np.asarray(deltas, dtype=np.float64))
+    batch, turns = deltas.shape
+    lengths = np.full(batch, turns) if lengths is None else np.asarray(list(lengths), dtype=np.int64)
+    padded = np.arange(turns)[None, :] >= lengths[:, None]
+    deltas = np.where(padded, 0.0, deltas)
+
+    a = 1.0 - rebound_strength
+    b = rebound_strength * baseline
+    values = np.empty((batch, turns), dtype=np.float64)
+    value = np.broadcast_to(np.asarray(initial, dtype=np.float64), (batch,)).copy()
+
+    for start in range(0, turns, block):
+        chunk = deltas[:, start:start + block]
+        steps = chunk.shape[1]
+        if a == 0.0:
+            scanned = np.clip(b + chunk, 0.0, 1.0)
+        else:
+            # v[s] = a^(s+1) * (v0 + Σ_{k<=s} c[k] * a^(-(k+1)))   (s = 0..steps-1)
+            powers = a ** np.arange(1, steps + 1)
+            scanned = powers * (value[:, None] + np.cumsum((b + chunk) / powers, axis=1))
+            out_of_range = ((scanned < 0.0) | (scanned > 1.0)).any(axis=1)
+            if out_of_range.any():
+                scanned[out_of_range] = _step_block(value[out_of_range], chunk[out_of_range], a, b)
+        values[:, start:start + steps] = scanned
+        value = scanned[:, -1]
+
+    final = np.broadcast_to(np.asarray(initial, dtype=np.float64), (batch,)).copy()
+    played = lengths > 0
+    final[played] = values[np.flatnonzero(played), lengths[played] - 1]
+    values[padded] = np.nan
+    return MoodTrajectories(values, final, lengths)
+
+
+def deltas_for_labels(sequences: Sequence[Sequence[Optional[str]]]) -> np.ndarray:
+    """
+    (batch, max_turns) delta matrix for per-sequence emotion label lists.
+
+    Each distinct label is resolved through emotion_change_map once.
+    """
+    compiled = get_compiled_change_map()
+    turns = max((len(seq) for seq in sequences), default=0)
+    deltas = np.zeros((len(sequences), turns), dtype=np.float64)
+    for row, seq in enumerate(sequences):
+        deltas[row, :len(seq)] = [compiled.label_delta(label) for label in seq]
+    return deltas
+
+
+def deltas_for_shifts(shifts: np.ndarray, labels: Sequence[str]) -> np.ndarray:
+    """
+    (batch, turns) deltas from a (batch, turns, len(labels)) tensor of
+    weighted emotional shifts: one product with the aligned delta vector.
+    """
+    return np.asarray(shifts, dtype=np.float64) @ get_compiled_change_map().align(labels)
+
+
+def deltas_for_histories(histories: Sequence[EmotionHistory]) -> Tuple[np.ndarray, np.ndarray]:
+    """(deltas, lengths) for the stored rows of several EmotionHistory objects."""
+    compiled = get_compiled_change_map()
+    lengths = np.array([len(history) for history in histories], dtype=np.int64)
+    deltas = np.zeros((len(histories), int(lengths.max(initial=0))), dtype=np.float64)
+    for row, history in enumerate(histories):
+        deltas[row, :lengths[row]] = history.project(compiled)
+    return deltas, lengths
+
+
+def simulate_mood_labels(
+    sequences: Sequence[Sequence[Optional[str]]],
+    initial: Union[float, np.ndarray] = ELIANA_BASELINE,
+    **kwargs,
+) -> MoodTrajectories:
+    """simulate_mood for lists of detected emotions (one list per user/session)."""
+    return simulate_mood(
+        deltas_for_labels(sequences),
+        initial=initial,
+        lengths=[len(seq) for seq in sequences],
+        **kwargs,
+    )
+
+
+def simulate_mood_shifts(
+    shifts: np.ndarray,
+    labels: Sequence[str],
+    initial: Union[float, np.ndarray] = ELIANA_BASELINE,
+    **kwargs,
+) -> MoodTrajectories:
+    """simulate_mood for weighted emotional_shift tensors over `labels`."""
+    return simulate_mood(deltas_for_shifts(shifts, labels), initial=initial, **kwargs)
+
+
+def simulate_mood_histories(
+    histories: Sequence[EmotionHistory],
+    initial: Union[float, np.ndarray] = ELIANA_BASELINE,
+    **kwargs,
+) -> MoodTrajectories:
+    """simulate_mood over the stored rows of EmotionHistory objects (one per session)."""
+    deltas, lengths = deltas_for_histories(histories)
+    return simulate_mood(deltas, initial=initial, lengths=lengths, **kwargs)
@@ -0,0 +1,658 @@
+"""
+===============================================================================
+    personality_store.py
+    ---------------------------------------------------------------------------
+    Sharded per-user storage for fragments, soul sketches and soul pictures.
+===============================================================================
+
+The three personality layers used to live in three global JSON files keyed
+by user, so reading one user parsed everyone, and adding one fragment
+rewrote every user's data. This store gives each user their own small
+files:
+
+-------------------------------------------------------------------------------
+LAYOUT
+-------------------------------------------------------------------------------
+    <root>/<shard>/<user>/fragments.jsonl           active fragments
+    <root>/<shard>/<user>/sketches.jsonl            active sketches
+    <root>/<shard>/<user>/picture.json              current soul picture
+    <root>/<shard>/<user>/consolidated.jsonl        consolidation_key → stored entry
+    <root>/<shard>/<user>/archive/index.jsonl       offset index of the segments
+    <root>/<shard>/<user>/archive/<layer>-NNNNNN.jsonl.gz
+                                                    consolidated fragments /
+                                                    sketches, replaced pictures
+
+• <shard> is the first two hex digits of sha1(user_id) (256 directories),
+  so no directory grows to millions of entries; <user> is the URL-quoted
+  user id (`_user_dir_name`). quote() leaves "." alone, so ids made only
+  of dots are written as %2E… instead of naming the shard or the root.
+• Reads touch only that user's files: O(1) in the number of users.
+• Appends add one line to a JSONL file (O(1), no rewrite). A line torn by
+  a crash is skipped on read.
+• Consolidation archives layers instead of deleting them (README §4):
+  `archive_fragments` / `archive_sketches` move the consolidated entries
+  to archive/, where they are kept but no longer loaded for prompts.
+  Active reads never open archive/: the hot set stays small, plain JSONL.
+• Every write holds the user file's advisory lock (utils.file_lock);
+  rewrites use atomic replace. Safe with several worker processes.
+• A sketch or picture tagged with a consolidation_key is stored at most
+  once: the lookup and the write share the layer lock, so a job that runs
+  twice cannot add a second copy. Keyed entries are also recorded in
+  consolidated.jsonl (after the layer write), so the lookup reads that
+  small file and the active layer, never the archive.
+
+-------------------------------------------------------------------------------
+ARCHIVE SEGMENTS
+-------------------------------------------------------------------------------
+• Each archive write appends one gzip member (its entries as JSONL) to the
+  layer's current segment; a segment is closed at ARCHIVE_SEGMENT_BYTES
+  (ELIANA_ARCHIVE_SEGMENT_BYTES, default 1 MiB) and a new one started.
+  Segments are append-only and never rewritten.
+• archive/index.jsonl holds one line per member: layer, segment, byte
+  offset, compressed length, entry count. Counting the archive reads only
+  the index; reading one member seeks straight to it.
+• The member is written before its index line. After a crash in between,
+  the unindexed bytes are ignored and the next write overwrites them.
+• `iter_archived()` streams entries member by member (oldest first, or
+  newest first with reverse=True) without loading the archive.
+• Archives from before segments (archive/<layer>.jsonl) are still read.
+  `compact_archive()` moves them into segments; the CLI runs it for every
+  user:
+
+    python personality_store.py compact-archive --store personality_store
+
+• Readers take the index without a lock, so compaction deletes nothing:
+  the files it replaces are listed as "retired" on the layer's compacted
+  line. `sweep_archive()` deletes them once they have been retired for
+  ARCHIVE_SWEEP_SECONDS (ELIANA_ARCHIVE_SWEEP_SECONDS, default 1 hour),
+  long after any reader of the old index is done:
+
+    python personality_store.py sweep-archive --store personality_store
+
+-------------------------------------------------------------------------------
+MIGRATION
+-------------------------------------------------------------------------------
+`migrate_legacy_files()` converts the global files (FRAGMENTS_FILE,
+SOUL_SKETCHES_FILE, SOUL_PICTURE_FILE) into the sharded layout. It is
+idempotent: a user's active files are replaced from the legacy data.
+
+    python personality_store.py migrate --fragments user_personality_fragments.json \
+        --sketches user_soul_sketches.json --pictures user_soul_picture.json \
+        --out personality_store
+===============================================================================
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from utils import file_lock, file_version, write_file_atomic
+
+logger = logging.getLogger(__name__)
+
+FRAGMENTS = "fragments"
+SKETCHES = "sketches"
+PICTURES = "pictures"
+LAYERS = (FRAGMENTS, SKETCHES)
+
+ARCHIVE_INDEX = "index.jsonl"
+CONSOLIDATED_KEYS = "consolidated.jsonl"
+ARCHIVE_SEGMENT_BYTES = int(os.getenv("ELIANA_ARCHIVE_SEGMENT_BYTES", str(1 << 20)))
+# Entries per gzip member when compacting a legacy archive.
+COMPACT_MEMBER_ENTRIES = 500
+# Age after which files retired by compaction are deleted by sweep_archive.
+ARCHIVE_SWEEP_SECONDS = float(os.getenv("ELIANA_ARCHIVE_SWEEP_SECONDS", "3600"))
+_READ_CHUNK = 64 * 1024
+
+
+def _user_dir_name(user_id: str) -> str:
+    """Directory name for a user: quoted, never empty, "." or ".."."""
+    if not user_id:
+        raise ValueError("user_id must not be empty")
+    name = quote(user_id, safe="")
+    if not name.strip("."):
+        name = name.replace(".", "%2E")
+    return name
+
+
+def _encode_line(entry: Dict) -> bytes:
+    return (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def entry_digest(entry: Dict) -> str:
+    """Content identity of a stored entry (used for idempotent archiving)."""
+    return hashlib.sha1(json.dumps(entry, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _read_jsonl(path: str) -> List[Dict]:
+    try:
+        with open(path, "rb") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+    entries = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            # A torn append from a crash; everything before it is intact.
+            logger.warning("Skipping unreadable line in %s", path)
+    return entries
+
+
+def _write_at(path: str, offset: int, payload: bytes, fsync: bool) -> None:
+    """Write `payload` at `offset` and cut anything after it (a torn tail)."""
+    with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+        f.seek(offset)
+        f.write(payload)
+        f.truncate()
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _iter_member(f, offset: int, length: int) -> Iterator[Dict]:
+    """Stream the JSONL entries of one gzip member at `offset`."""
+    f.seek(offset)
+    decompressor = zlib.decompressobj(wbits=31)
+    remaining, pending = length, b""
+    while remaining:
+        chunk = f.read(min(_READ_CHUNK, remaining))
+        if not chunk:
+            raise EOFError(f"archive segment {f.name} is shorter than its index")
+        remaining -= len(chunk)
+        pending += decompressor.decompress(chunk)
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    pending += decompressor.flush()
+    if pending.strip():
+        yield json.loads(pending)
+
+
+def _layer_segments(members: List[Dict], layer: str) -> set:
+    """Segment names of `layer` the index references or still retires."""
+    names = set()
+    for m in members:
+        if m["layer"] == layer:
+            if "segment" in m:
+                names.add(m["segment"])
+            names.update(m.get("retired", ()))
+    return names
+
+
+def _next_segment(layer: str, used) -> str:
+    """Segment name after the highest-numbered one of `layer` in `used`."""
+    numbers = [int(name[len(layer) + 1:].split(".", 1)[0]) for name in used if name.startswith(layer + "-")]
+    return f"{layer}-{max(numbers, default=-1) + 1:06d}.jsonl.gz"
+
+
+class PersonalityStore:
+    """
+    Per-user personality layers under `root`.
+
+    Parameters
+    ----------
+    root : str
+        Store directory (created on first write).
+
+    fsync : bool
+        fsync every append/rewrite (durable against power loss).
+    """
+
+    def __init__(self, root: str, fsync: bool = False):
+        self.root = root
+        self.fsync = fsync
+
+    # --- Paths ---
+    def user_dir(self, user_id: str) -> str:
+        shard = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:2]
+        return os.path.join(self.root, shard, _user_dir_name(user_id))
+
+    def _path(self, user_id: str, layer: str, archived: bool = False) -> str:
+        directory = self.user_dir(user_id)
+        if archived:
+            return os.path.join(directory, "archive", f"{layer}.jsonl")
+        if layer == PICTURES:
+            return os.path.join(directory, "picture.json")
+        return os.path.join(directory, f"{layer}.jsonl")
+
+    # --- Reads ---
+    def load_fragments(self, user_id: str) -> List[Dict]:
+        """Active (not yet consolidated) fragments, oldest first."""
+        return _read_jsonl(self._path(user_id, FRAGMENTS))
+
+    def load_sketches(self, user_id: str) -> List[Dict]:
+        """Active (not yet consolidated) sketches, oldest first."""
+        return _read_jsonl(self._path(user_id, SKETCHES))
+
+    def load_picture(self, user_id: str) -> Dict:
+        try:
+            with open(self._path(user_id, PICTURES), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def load_archived(self, user_id: str, layer: str) -> List[Dict]:
+        """Archived fragments, sketches or previous pictures, oldest first."""
+        return list(self.iter_archived(user_id, layer))
+
+    def iter_archived(self, user_id: str, layer: str, reverse: bool = False) -> Iterator[Dict]:
+        """
+        Stream a layer's archive, oldest first (newest first if `reverse`),
+        holding one gzip member in memory at a time.
+        """
+        members, _ = self._read_archive_index(user_id)
+        compacted = any(m.get("compacted") and m["layer"] == layer for m in members)
+        members = [m for m in members if m["layer"] == layer and "segment" in m]
+        legacy = self._path(user_id, layer, archived=True)
+        directory = self._archive_dir(user_id)
+
+        if not reverse and not compacted:
+            yield from _read_jsonl(legacy)
+        for member in (reversed(members) if reverse else members):
+            with open(os.path.join(directory, member["segment"]), "rb") as f:
+                entries = _iter_member(f, member["offset"], member["length"])
+                if reverse:
+                    entries = reversed(list(entries))
+                yield from entries
+        if reverse and not compacted:
+            yield from reversed(_read_jsonl(legacy))
+
+    def counts(self, user_id: str) -> Dict[str, int]:
+        return {
+            FRAGMENTS: len(self.load_fragments(user_id)),
+            SKETCHES: len(self.load_sketches(user_id)),
+            PICTURES: int(bool(self.load_picture(user_id))),
+        }
+
+    def layer_versions(self, user_id: str) -> Tuple:
+        """
+        Version tokens of the user's active files (utils.file_version);
+        changes whenever any process writes one of them.
+        """
+        return tuple(file_version(self._path(user_id, layer)) for layer in (FRAGMENTS, SKETCHES, PICTURES))
+
+    def shards(self) -> List[str]:
+        """Shard directory names present in the store, in order."""
+        if not os.path.isdir(self.root):
+            return []
+        return [shard for shard in sorted(os.listdir(self.root))
+                if len(shard) == 2 and os.path.isdir(os.path.join(self.root, shard))]
+
+    def shard_user_ids(self, shard: str) -> List[str]:
+        """Users stored in one shard (a resumable unit for bulk scans); inverts _user_dir_name."""
+        return [unquote(name) for name in sorted(os.listdir(os.path.join(self.root, shard)))]
+
+    def user_ids(self) -> Iterator[str]:
+        """Every user with a directory in the store."""
+        for shard in self.shards():
+            yield from self.shard_user_ids(shard)
+
+    # --- Writes ---
+    def _append_locked(self, path: str, entries: List[Dict]) -> None:
+        with open(path, "ab") as f:
+            f.write(b"".join(_encode_line(entry) for entry in entries))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _append(self, path: str, entries: List[Dict]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with file_lock(path):
+            self._append_locked(path, entries)
+
+    def _find_consolidated(self, user_id: str, layer: str, active: Iterable[Dict], key: str) -> Optional[Dict]:
+        """
+        Entry stored under consolidation_key `key`: from the key file, or
+        from `active` when a crash fell between the layer write and the
+        key record.
+        """
+        for record in _read_jsonl(os.path.join(self.user_dir(user_id), CONSOLIDATED_KEYS)):
+            if record.get("key") == key and record.get("layer") == layer:
+                return record["entry"]
+        return next((entry for entry in active if entry.get("consolidation_key") == key), None)
+
+    def _record_consolidated(self, user_id: str, layer: str, entry: Dict) -> None:
+        self._append(os.path.join(self.user_dir(user_id), CONSOLIDATED_KEYS),
+                     [{"key": entry["consolidation_key"], "layer": layer, "entry": entry}])
+
+    def consolidated_entry(self, user_id: str, layer: str, key: str) -> Optional[Dict]:
+        """The sketch (layer=SKETCHES) or picture stored under `key`, if any."""
+        active = self.load_sketches(user_id) if layer == SKETCHES else [self.load_picture(user_id)]
+        return self._find_consolidated(user_id, layer, active, key)
+
+    def append_fragment(self, user_id: str, fragment: Dict) -> None:
+        self._append(self._path(user_id, FRAGMENTS), [fragment])
+
+    def append_sketch(self, user_id: str, sketch: Dict) -> Dict:
+        """
+        Append a sketch and return the stored one. A sketch whose
+        consolidation_key is already stored (a job that ran twice) is not
+        written; the sketch stored first is returned instead. The check
+        and the append hold the sketch file lock together.
+        """
+        path = self._path(user_id, SKETCHES)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        key = sketch.get("consolidation_key")
+        with file_lock(path):
+            if key is not None:
+                existing = self._find_consolidated(user_id, SKETCHES, _read_jsonl(path), key)
+                if existing is not None:
+                    return existing
+            self._append_locked(path, [sketch])
+            if key is not None:
+                self._record_consolidated(user_id, SKETCHES, sketch)
+        return sketch
+
+    def store_picture(self, user_id: str, picture: Dict) -> Dict:
+        """
+        Make `picture` current; the previous one moves to the archive.
+        Like append_sketch, a picture whose consolidation_key is already
+        stored is a no-op and the stored picture is returned.
+        """
+        path = self._path(user_id, PICTURES)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        key = picture.get("consolidation_key")
+        with file_lock(path):
+            previous = self.load_picture(user_id)
+            if key is not None:
+                existing = self._find_consolidated(user_id, PICTURES, [previous], key)
+                if existing is not None:
+                    return existing
+            if previous:
+                self._append_archive(user_id, PICTURES, [previous])
+            write_file_atomic(path, json.dumps(picture, ensure_ascii=False).encode("utf-8"), self.fsync)
+            if key is not None:
+                self._record_consolidated(user_id, PICTURES, picture)
+        return picture
+
+    def _archive(self, user_id: str, layer: str, count: int) -> List[Dict]:
+        path = self._path(user_id, layer)
+        with file_lock(path):
+            entries = _read_jsonl(path)
+            moved, kept = entries[:count], entries[count:]
+            if not moved:
+                return []
+            # Archive first: a crash in between leaves a duplicate in the
+            # archive, never a lost entry.
+            self._append_archive(user_id, layer, moved)
+            write_file_atomic(path, b"".join(_encode_line(entry) for entry in kept), self.fsync)
+        return moved
+
+    def archive_entries(self, user_id: str, layer: str, digests: List[str]) -> List[Dict]:
+        """
+        Move the active entries whose entry_digest is in `digests` to the
+        archive. Idempotent: entries already archived are not found again.
+        """
+        path = self._path(user_id, layer)
+        wanted = set(digests)
+        with file_lock(path):
+            entries = _read_jsonl(path)
+            moved = [entry for entry in entries if entry_digest(entry) in wanted]
+            if not moved:
+                return []
+            kept = [entry for entry in entries if entry_digest(entry) not in wanted]
+            self._append_archive(user_id, layer, moved)
+            write_file_atomic(path, b"".join(_encode_line(entry) for entry in kept), self.fsync)
+        return moved
+
+    def count_archived(self, user_id: str, layer: str) -> int:
+        """Archived entries of `layer`, from the offset index (no decompression)."""
+        members, _ = self._read_archive_index(user_id)
+        count = sum(m["count"] for m in members if m["layer"] == layer and "segment" in m)
+        if any(m.get("compacted") and m["layer"] == layer for m in members):
+            return count
+        try:
+            with open(self._path(user_id, layer, archived=True), "rb") as f:
+                return count + sum(1 for line in f if line.strip())
+        except FileNotFoundError:
+            return count
+
+    def archive_fragments(self, user_id: str, count: int) -> List[Dict]:
+        """Move the oldest `count` active fragments to the archive."""
+        return self._archive(user_id, FRAGMENTS, count)
+
+    def archive_sketches(self, user_id: str, count: int) -> List[Dict]:
+        """Move the oldest `count` active sketches to the archive."""
+        return self._archive(user_id, SKETCHES, count)
+
+    # --- Archive segments ---
+    def _archive_dir(self, user_id: str) -> str:
+        return os.path.join(self.user_dir(user_id), "archive")
+
+    def _read_archive_index(self, user_id: str) -> Tuple[List[Dict], int]:
+        """Index lines and the byte length of the valid (untorn) prefix."""
+        members, size = [], 0
+        try:
+            with open(os.path.join(self._archive_dir(user_id), ARCHIVE_INDEX), "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        members.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+                    size += len(line)
+        except FileNotFoundError:
+            pass
+        return members, size
+
+    def _append_archive(self, user_id: str, layer: str, entries: List[Dict]) -> None:
+        """Append `entries` as one gzip member to the layer's current segment."""
+        if not entries:
+            return
+        directory = self._archive_dir(user_id)
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, ARCHIVE_INDEX)
+        payload = gzip.compress(b"".join(_encode_line(entry) for entry in entries), mtime=0)
+        with file_lock(index_path):
+            members, index_size = self._read_archive_index(user_id)
+            segments = [m for m in members if "segment" in m and m["layer"] == layer]
+            last = segments[-1] if segments else None
+            if last is not None and last["offset"] + last["length"] < ARCHIVE_SEGMENT_BYTES:
+                segment, offset = last["segment"], last["offset"] + last["length"]
+            else:
+                # Retired segments may still be read; never reuse their names.
+                segment, offset = _next_segment(layer, _layer_segments(members, layer)), 0
+            _write_at(os.path.join(directory, segment), offset, payload, self.fsync)
+            line = {"layer": layer, "segment": segment, "offset": offset, "length": len(payload),
+                    "count": len(entries)}
+            _write_at(index_path, index_size, _encode_line(line), self.fsync)
+
+    def compact_archive(self, user_id: str) -> int:
+        """
+        Move a pre-segment archive (archive/<layer>.jsonl) into segments.
+
+        The layer's entries (legacy first, they are the oldest) are written
+        to fresh segments and a new index naming them, plus a "compacted"
+        line retiring the legacy file and the old segments, is swapped in
+        atomically: a crash at any point loses and duplicates nothing. The
+        retired files are left for `sweep_archive`, so readers that took
+        the old index can still finish. Returns the number of legacy
+        entries moved.
+        """
+        moved = 0
+        directory = self._archive_dir(user_id)
+        index_path = os.path.join(directory, ARCHIVE_INDEX)
+        for layer in (FRAGMENTS, SKETCHES, PICTURES):
+            legacy = self._path(user_id, layer, archived=True)
+            if not os.path.exists(legacy):
+                continue
+            with file_lock(index_path):
+                members, _ = self._read_archive_index(user_id)
+                if not any(m.get("compacted") and m["layer"] == layer for m in members):
+                    old = [m for m in members if "segment" in m and m["layer"] == layer]
+                    entries = list(self.iter_archived(user_id, layer))
+                    retired = sorted({m["segment"] for m in old}) + [os.path.relpath(legacy, directory)]
+                    self._rewrite_archive(user_id, layer, entries, members, retired)
+                    moved += len(entries) - sum(m["count"] for m in old)
+        return moved
+
+    def sweep_archive(self, user_id: str, min_age: float = ARCHIVE_SWEEP_SECONDS) -> int:
+        """
+        Delete the files compaction retired at least `min_age` seconds ago
+        and drop them from the index. Returns the number of files deleted.
+        """
+        directory = self._archive_dir(user_id)
+        index_path = os.path.join(directory, ARCHIVE_INDEX)
+        if not os.path.exists(index_path):
+            return 0
+        deleted = 0
+        with file_lock(index_path):
+            members, _ = self._read_archive_index(user_id)
+            live = {m["segment"] for m in members if "segment" in m}
+            now = time.time()
+            changed = False
+            for m in members:
+                if not m.get("retired") or now - m.get("retired_at", 0) < min_age:
+                    continue
+                for name in m.pop("retired"):
+                    if name in live:
+                        continue
+                    try:
+                        os.remove(os.path.join(directory, name))
+                        deleted += 1
+                    except FileNotFoundError:
+                        pass
+                m.pop("retired_at", None)
+                changed = True
+            if changed:
+                write_file_atomic(index_path, b"".join(_encode_line(m) for m in members), self.fsync)
+        return deleted
+
+    def _rewrite_archive(self, user_id: str, layer: str, entries: List[Dict], members: List[Dict],
+                         retired: List[str]) -> None:
+        """
+        Write `entries` to fresh segments and swap in the new index, which
+        lists `retired` for sweep_archive (caller holds the index lock).
+        """
+        directory = self._archive_dir(user_id)
+        used = _layer_segments(members, layer)
+        lines, segment, offset = [], None, 0
+        for start in range(0, len(entries), COMPACT_MEMBER_ENTRIES):
+            batch = entries[start:start + COMPACT_MEMBER_ENTRIES]
+            payload = gzip.compress(b"".join(_encode_line(entry) for entry in batch), mtime=0)
+            if segment is None or offset >= ARCHIVE_SEGMENT_BYTES:
+                segment, offset = _next_segment(layer, used), 0
+                used.add(segment)
+            _write_at(os.path.join(directory, segment), offset, payload, self.fsync)
+            lines.append({"layer": layer, "segment": segment, "offset": offset, "length": len(payload),
+                          "count": len(batch)})
+            offset += len(payload)
+        lines.append({"layer": layer, "compacted": True, "retired": retired, "retired_at": time.time()})
+        others = [m for m in members if m["layer"] != layer]
+        write_file_atomic(os.path.join(directory, ARCHIVE_INDEX),
+                          b"".join(_encode_line(m) for m in others + lines), self.fsync)
+
+    # --- Bulk (migration) ---
+    def replace_user(
+        self,
+        user_id: str,
+        fragments: Optional[List[Dict]] = None,
+        sketches: Optional[List[Dict]] = None,
+        picture: Optional[Dict] = None,
+    ) -> None:
+        """Overwrite a user's active layers (only the ones given)."""
+        for layer, entries in ((FRAGMENTS, fragments), (SKETCHES, sketches)):
+            if entries is None:
+                continue
+            path = self._path(user_id, layer)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with file_lock(path):
+                write_file_atomic(path, b"".join(_encode_line(entry) for entry in entries), self.fsync)
+        if picture:
+            path = self._path(user_id, PICTURES)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with file_lock(path):
+                write_file_atomic(path, json.dumps(picture, ensure_ascii=False).encode("utf-8"), self.fsync)
+
+
+# === MIGRATION ===
+def _load_legacy(path: Optional[str]) -> Dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, dict) else {}
+
+
+def migrate_legacy_files(
+    store: PersonalityStore,
+    fragments_file: Optional[str] = None,
+    sketches_file: Optional[str] = None,
+    picture_file: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Copy the global fragment / sketch / picture files into `store`.
+
+    Legacy files hold {user_id: [entries]} (pictures: {user_id: picture}).
+    Each file is loaded and converted on its own to bound memory. Returns
+    the number of users migrated per layer.
+    """
+    counts = {}
+    for layer, path in ((FRAGMENTS, fragments_file), (SKETCHES, sketches_file), (PICTURES, picture_file)):
+        start = time.perf_counter()
+        legacy = _load_legacy(path)
+        for user_id, value in legacy.items():
+            if layer == FRAGMENTS:
+                store.replace_user(user_id, fragments=list(value or []))
+            elif layer == SKETCHES:
+                store.replace_user(user_id, sketches=list(value or []))
+            elif value:
+                store.replace_user(user_id, picture=value)
+        counts[layer] = len(legacy)
+        if legacy:
+            logger.info("Migrated %d users' %s from %s in %.2fs", len(legacy), layer, path,
+                        time.perf_counter() - start)
+        del legacy
+    return counts
+
+
+# === ENTRY POINT ===
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Personality store maintenance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Convert global personality files to the sharded store.")
+    migrate.add_argument("--fragments", help="Legacy fragments file (FRAGMENTS_FILE).")
+    migrate.add_argument("--sketches", help="Legacy soul sketches file (SOUL_SKETCHES_FILE).")
+    migrate.add_argument("--pictures", help="Legacy soul picture file (SOUL_PICTURE_FILE).")
+    migrate.add_argument("--out", required=True, help="Store directory.")
+    compact = sub.add_parser("compact-archive", help="Move plain JSONL archives into compressed segments.")
+    compact.add_argument("--store", required=True, help="Store directory.")
+    sweep = sub.add_parser("sweep-archive", help="Delete archive files retired by compaction.")
+    sweep.add_argument("--store", required=True, help="Store directory.")
+    sweep.add_argument("--min-age", type=float, default=ARCHIVE_SWEEP_SECONDS,
+                       help="Seconds a file must have been retired before it is deleted.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "migrate":
+        counts = migrate_legacy_files(PersonalityStore(args.out), args.fragments, args.sketches, args.pictures)
+        print(f"migrated {counts} in {time.perf_counter() - start:.2f}s")
+    elif args.command == "compact-archive":
+        store = PersonalityStore(args.store)
+        users = entries = 0
+        for user_id in store.user_ids():
+            moved = store.compact_archive(user_id)
+            users += bool(moved)
+            entries += moved
+        print(f"compacted {entries} archived entries of {users} users in {time.perf_counter() - start:.2f}s")
+    elif args.command == "sweep-archive":
+        store = PersonalityStore(args.store)
+        files = sum(store.sweep_archive(user_id, args.min_age) for user_id in store.user_ids())
+        print(f"deleted {files} retired archive files in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+"""
+===============================================================================
+    relationship_store.py
+    ---------------------------------------------------------------------------
+    Storage backends for RelationshipTracker trust records.
+===============================================================================
+
+RelationshipTracker used to keep every user in one relationships.json and
+rewrite the whole file after each update: O(users) disk I/O per turn, and
+two writers could silently overwrite each other. Records now go through a
+small storage interface with two backends:
+
+-------------------------------------------------------------------------------
+1. SQLiteRelationshipStore  (default, relationships.db)
+-------------------------------------------------------------------------------
+• One row per user; an update is a single-row upsert.
+• WAL journal mode: readers never block the writer and vice versa, and a
+  commit appends to the WAL instead of rewriting pages in place.
+• `modify()` is an atomic read-modify-write (BEGIN IMMEDIATE), so
+  concurrent threads and processes never lose an update.
+• `last_updated` is indexed, for inactivity queries and exports.
+• One connection per thread (sqlite3 connections are not shareable).
+
+-------------------------------------------------------------------------------
+2. JsonRelationshipStore  (legacy relationships.json)
+-------------------------------------------------------------------------------
+• The original whole-file format, kept for small local setups and as the
+  migration source. Writes take the advisory file lock, reload the file
+  if another process replaced it, and replace it atomically (temp +
+  rename), so concurrent writers do not lose updates.
+
+-------------------------------------------------------------------------------
+3. MIGRATION
+-------------------------------------------------------------------------------
+• `migrate_json_to_sqlite(json_path, db_path)` copies every record in one
+  transaction and records the source in the database's meta table, so the
+  tracker runs it only once. The JSON file is left untouched.
+• CLI:
+
+      python relationship_store.py migrate relationships.json relationships.db
+
+Record shape (both backends)
+----------------------------
+    {"name": str | None, "score": float (0–100), "last_updated": float}
+===============================================================================
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils import read_json_versioned, file_lock, file_version, write_file_atomic
+
+logger = logging.getLogger(__name__)
+
+SQLITE_BUSY_TIMEOUT_MS = 5000
+MIGRATION_BATCH = 5000
+
+Record = Dict
+Modifier = Callable[[Optional[Record]], Record]
+
+
+def _normalize(record: Record) -> Record:
+    return {
+        "name": record.get("name"),
+        "score": float(record.get("score", 0.0)),
+        "last_updated": float(record.get("last_updated") or time.time()),
+    }
+
+
+# === INTERFACE ===
+class RelationshipStore:
+    """
+    Per-user record storage used by RelationshipTracker.
+
+    Backends implement get / modify / put_many / items / __len__; flush and
+    close are no-ops unless the backend buffers or holds resources.
+    """
+
+    def get(self, user_id: str) -> Optional[Record]:
+        raise NotImplementedError
+
+    def modify(self, user_id: str, fn: Modifier) -> Record:
+        """
+        Atomically replace a user's record with fn(current record or None)
+        and return the stored record.
+        """
+        raise NotImplementedError
+
+    def put_many(self, records: Iterable[Tuple[str, Record]], durable: bool = False) -> int:
+        """
+        Store many records at once. `durable=True` makes the write survive
+        power loss (not only a process crash) before returning.
+        """
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[str, Record]]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, user_id: str) -> bool:
+        return self.get(user_id) is not None
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+# === SQLITE BACKEND ===
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS relationships (
+    user_id      TEXT PRIMARY KEY,
+    name         TEXT,
+    score        REAL NOT NULL DEFAULT 0,
+    last_updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_relationships_last_updated
+    ON relationships (last_updated);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_UPSERT = """
+INSERT INTO relationships (user_id, name, score, last_updated)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (user_id) DO UPDATE SET
+    name = excluded.name,
+    score = excluded.score,
+    last_updated = excluded.last_updated
+"""
+
+
+class SQLiteRelationshipStore(RelationshipStore):
+    """
+    Relationship records in a SQLite database (WAL mode).
+
+    Parameters
+    ----------
+    path : str
+        Database file; created with its schema if missing.
+
+    synchronous : str
+        SQLite `synchronous` pragma. "NORMAL" (default) is durable against
+        process crashes in WAL mode; "FULL" also against power loss.
+    """
+
+    def __init__(self, path: str, synchronous: str = "NORMAL"):
+        self.path = path
+        self.synchronous = synchronous
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly.
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _row(row: Optional[Tuple]) -> Optional[Record]:
+        if row is None:
+            return None
+        return {"name": row[0], "score": row[1], "last_updated": row[2]}
+
+    def get(self, user_id: str) -> Optional[Record]:
+        row = self._conn().execute(
+            "SELECT name, score, last_updated FROM relationships WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return self._row(row)
+
+    def modify(self, user_id: str, fn: Modifier) -> Record:
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front: no other writer can
+        # change the row between our read and our upsert.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = self._row(conn.execute(
+                "SELECT name, score, last_updated FROM relationships WHERE user_id = ?", (user_id,)
+            ).fetchone())
+            record = _normalize(fn(current))
+            conn.execute(_UPSERT, (user_id, record["name"], record["score"], record["last_updated"]))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return record
+
+    def put_many(self, records: Iterable[Tuple[str, Record]], durable: bool = False) -> int:
+        """Upsert many records in one transaction."""
+        conn = self._conn()
+        count = 0
+        if durable:
+            # Per connection: FULL syncs the WAL on this commit.
+            conn.execute("PRAGMA synchronous=FULL")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            batch = []
+            for user_id, record in records:
+                record = _normalize(record)
+                batch.append((user_id, record["name"], record["score"], record["last_updated"]))
+                if len(batch) >= MIGRATION_BATCH:
+                    conn.executemany(_UPSERT, batch)
+                    count += len(batch)
+                    batch = []
+            conn.executemany(_UPSERT, batch)
+            count += len(batch)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            if durable:
+                conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        return count
+
+    def items(self) -> Iterator[Tuple[str, Record]]:
+        cursor = self._conn().execute("SELECT user_id, name, score, last_updated FROM relationships")
+        for row in cursor:
+            yield row[0], self._row(row[1:])
+
+    def inactive_since(self, cutoff: float) -> Iterator[Tuple[str, Record]]:
+        """Records not updated since `cutoff` (uses the last_updated index)."""
+        cursor = self._conn().execute(
+            "SELECT user_id, name, score, last_updated FROM relationships "
+            "WHERE last_updated < ? ORDER BY last_updated",
+            (cutoff,),
+        )
+        for row in cursor:
+            yield row[0], self._row(row[1:])
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM relationships").fetchone()[0]
+
+    # --- Meta ---
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self._conn().execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Created in another thread that is still using it.
+                pass
+        self._local = threading.local()
+
+
+# === JSON BACKEND (legacy) ===
+def _read_json_records(path: str) -> Dict[str, Record]:
+    data, _ = read_json_versioned(path)
+    return data if isinstance(data, dict) else {}
+
+
+class JsonRelationshipStore(RelationshipStore):
+    """
+    Whole-file relationships.json, as before. Every write rewrites the
+    file, so this backend is only suited to small stores.
+
+    Safe with several processes sharing the file: writes hold the advisory
+    file lock (utils.file_lock), re-read the file if another process
+    replaced it (version check), and swap the new file in atomically.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: Dict[str, Record] = {}
+        self._version = None
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Reload if another writer replaced the file since we read it."""
+        version = file_version(self.path)
+        if version != self._version:
+            data, version = read_json_versioned(self.path)
+            self._records = data if isinstance(data, dict) else {}
+            self._version = version
+
+    def get(self, user_id: str) -> Optional[Record]:
+        with self._lock:
+            self._refresh()
+            record = self._records.get(user_id)
+        return dict(record) if record is not None else None
+
+    def modify(self, user_id: str, fn: Modifier) -> Record:
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            current = self._records.get(user_id)
+            record = _normalize(fn(dict(current) if current is not None else None))
+            self._records[user_id] = record
+            self._write()
+        return record
+
+    def put_many(self, records: Iterable[Tuple[str, Record]], durable: bool = False) -> int:
+        # Every write is fsync'd already.
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            count = 0
+            for user_id, record in records:
+                self._records[user_id] = _normalize(record)
+                count += 1
+            self._write()
+        return count
+
+    def items(self) -> Iterator[Tuple[str, Record]]:
+        with self._lock:
+            self._refresh()
+            records = list(self._records.items())
+        for user_id, record in records:
+            yield user_id, dict(record)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._records)
+
+    def _write(self) -> None:
+        """Under the file lock."""
+        write_file_atomic(self.path, json.dumps(self._records, ensure_ascii=False).encode("utf-8"), fsync=True)
+        self._version = file_version(self.path)
+
+    def flush(self) -> None:
+        pass
+
+
+# === MIGRATION ===
+MIGRATION_META_KEY = "migrated_from_json"
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str, force: bool = False) -> int:
+    """
+    Copy relationships.json into the SQLite store (one transaction).
+
+    Returns the number of records migrated; 0 if the JSON file is missing
+    or this source was already migrated (unless `force`).
+    """
+    store = SQLiteRelationshipStore(db_path)
+    try:
+        return _migrate_into(store, json_path, force=force)
+    finally:
+        store.close()
+
+
+_MIGRATE_UPSERT = _UPSERT + "WHERE excluded.last_updated > relationships.last_updated\n"
+
+
+def _migrate_into(store: SQLiteRelationshipStore, json_path: str, force: bool = False) -> int:
+    """
+    Copy `json_path` into `store` in one transaction that also records the
+    source, so concurrent first opens migrate exactly once. Rows already
+    updated more recently in the database are kept.
+    """
+    if not os.path.exists(json_path):
+        return 0
+    source = os.path.abspath(json_path)
+    if not force and store.get_meta(MIGRATION_META_KEY) == source:
+        return 0
+    start = time.perf_counter()
+    records = _read_json_records(json_path)
+    conn = store._conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (MIGRATION_META_KEY,)).fetchone()
+        if not force and row and row[0] == source:
+            conn.execute("ROLLBACK")
+            return 0
+        rows = []
+        for user_id, record in records.items():
+            record = _normalize(record)
+            rows.append((user_id, record["name"], record["score"], record["last_updated"]))
+        conn.executemany(_MIGRATE_UPSERT, rows)
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (MIGRATION_META_KEY, source),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    logger.info("Migrated %d relationship records from %s in %.2fs", len(rows), json_path, time.perf_counter() - start)
+    return len(rows)
+
+
+def open_relationship_store(
+    path: str,
+    legacy_json: Optional[str] = None,
+) -> RelationshipStore:
+    """
+    Open the store at `path` (".json" → JsonRelationshipStore, anything
+    else → SQLite). For SQLite, `legacy_json` is migrated in on first open.
+    """
+    if path.endswith(".json"):
+        return JsonRelationshipStore(path)
+    store = SQLiteRelationshipStore(path)
+    if legacy_json:
+        _migrate_into(store, legacy_json)
+    return store
+
+
+# === ENTRY POINT ===
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Relationship store maintenance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Copy relationships.json into a SQLite store.")
+    migrate.add_argument("json_path")
+    migrate.add_argument("db_path")
+    migrate.add_argument("--force", action="store_true", help="Migrate again even if already done.")
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        start = time.perf_counter()
+        count = migrate_json_to_sqlite(args.json_path, args.db_path, force=args.force)
+        print(f"migrated {count} records in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
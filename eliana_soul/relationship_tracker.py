@@ -19,21 +19,26 @@ The score:
         - Mid-level trust grows steadily.
         - High trust becomes increasingly stable and harder to change.
 
-Stored Data Format (relationships.json)
----------------------------------------
-{
-    "user_id": {
+Stored Data Format
+------------------
+One record per user:
+
+    "user_id" → {
         "name": "User’s name",
         "score": float (0–100),
         "last_updated": timestamp
-    },
-    ...
-}
+    }
+
+Records live in a RelationshipStore (relationship_store.py): by default a
+SQLite database in WAL mode (relationships.db), where each update is a
+single-row upsert in its own transaction. An existing relationships.json
+is migrated into it the first time the tracker opens the database.
 
 Core Features
 -------------
-• Persistent JSON-backed relationship memory.
-• Automatic aging/decay when users disappear for several days.
+• Persistent relationship memory (SQLite, one row per user).
+• Automatic aging/decay when users disappear for several days, computed
+  lazily (see Inactivity Decay below).
 • Trust multiplier scaling (early → cautious, deep → gentle).
 • Manual score adjustments.
 • Used across:
@@ -42,29 +47,101 @@ Core Features
     - Memory shaping,
     - Emotional interpretation.
 
+Inactivity Decay
+----------------
+Stored scores are never swept. After DECAY_GRACE_DAYS of silence a score
+halves every DECAY_HALF_LIFE_DAYS, and since that is a closed form in
+`last_updated`, reads (`get_score`, `get_user_relationship`) compute the
+decayed value on the fly. The decayed score is written back only when the
+user next interacts (`update`, `apply_score_delta`), which also restarts
+the clock. Cost is O(1) per read and zero for users who never return.
+
+Write-Behind
+------------
+With `write_behind=True`, writes go to a WriteBehindQueue (write_behind.py)
+instead of the store: updates to one user are coalesced and flushed in
+one transaction per batch, off the turn path, and reads see queued
+values. Use it when each user is served by one process at a time — the
+atomic cross-process read-modify-write of the store applies only at
+flush time. `save()` flushes; `close()` (or interpreter exit) drains the
+queue.
+
+For analytics exports, `export_scores()` applies the same formula to all
+users at once with NumPy (`decayed_scores`).
+
 This is a foundational part of Eliana’s personality system.
 =====================================================================
 """
 
-import json
-import time
-import openai
+import math
 import os
-from typing import Dict, Optional
-from dotenv import load_dotenv
+import time
+import threading
+from typing import Callable, Dict, Optional, Union
+
+import numpy as np
+
+from eliana_soul.config import RELATIONSHIPS_DB_FILE, RELATIONSHIPS_FILE, data_path
+from relationship_store import RelationshipStore, open_relationship_store
+from write_behind import WriteBehindQueue
+
+# === Score Dynamics ===
+MIN_SCORE = 0.0
+MAX_SCORE = 100.0
+DECAY_GRACE_DAYS = 3.0       # no decay for short absences
+DECAY_HALF_LIFE_DAYS = 60.0  # afterwards the score halves every 60 days of silence
+
+# (upper bound of band, multiplier): early trust is earned slowly, the
+# middle grows steadily, deep trust is stable and hard to move.
+TRUST_BANDS = (
+    (20.0, 0.6),
+    (40.0, 0.8),
+    (60.0, 1.0),
+    (80.0, 0.8),
+    (90.0, 0.5),
+    (MAX_SCORE, 0.3),
+)
+
+
+def _clamp(score: float) -> float:
+    return max(MIN_SCORE, min(MAX_SCORE, score))
+
+
+def decayed_score(score: float, last_updated: float, now: float) -> float:
+    """Score after inactivity decay from `last_updated` to `now`."""
+    idle_days = (now - last_updated) / 86400.0 - DECAY_GRACE_DAYS
+    if idle_days <= 0:
+        return score
+    return score * math.pow(0.5, idle_days / DECAY_HALF_LIFE_DAYS)
+
+
+def decayed_scores(
+    scores: np.ndarray,
+    last_updated: np.ndarray,
+    now: Union[float, np.ndarray],
+) -> np.ndarray:
+    """Vectorized `decayed_score` over arrays of stored scores and timestamps."""
+    idle_days = (np.asarray(now, dtype=np.float64) - np.asarray(last_updated, dtype=np.float64)) / 86400.0
+    idle_days = np.maximum(idle_days - DECAY_GRACE_DAYS, 0.0)
+    return np.asarray(scores, dtype=np.float64) * np.power(0.5, idle_days / DECAY_HALF_LIFE_DAYS)
+
+
+def _current(record: Dict, now: float) -> Dict:
+    """Record as of `now`: stored score with inactivity decay applied."""
+    return {
+        "name": record.get("name"),
+        "score": decayed_score(record["score"], record["last_updated"], now),
+        "last_updated": record["last_updated"],
+    }
 
 
 # === Relationship Tracker ===
 class RelationshipTracker:
     """
-    TEMPLATE CLASS — Public Repository Version
-
-    Full docstring preserved. Logic removed.
-
     Tracks and updates long-term relationship trust between a user and Eliana.
     Stores trust score, name, and last-updated time in a persistent structure.
 
-    Relationship score meaning (private version):
+    Relationship score meaning:
         0–20   → stranger, cautious warmth
         20–40  → early familiarity
         40–60  → growing emotional safety
@@ -72,128 +149,181 @@ class RelationshipTracker:
         80–90  → deep trust
         90–100 → full emotional openness
 
-    The real system:
-        • dynamically adjusts trust based on interaction patterns
-        • applies decay over time
-        • modulates Eliana's tone and openness through these scores
+    Every write is an atomic read-modify-write of one user's record in the
+    store, so concurrent sessions (threads or worker processes sharing the
+    database) never lose each other's updates.
 
-    This template exposes the interface only.
-    """
+    Parameters
+    ----------
+    path : str, optional
+        Store location. Defaults to ELIANA_RELATIONSHIP_STORE or
+        relationships.db in the data directory; a ".json" path selects the
+        legacy whole-file backend.
 
-    def __init__(self, *args, **kwargs):
-        """
-        TEMPLATE INIT FUNCTION
+    store : RelationshipStore, optional
+        Use an already opened store instead of `path`.
 
-        Private Version:
-            - loads persistent JSON file
-            - initializes trust map
-            - handles user registration details
+    legacy_json : str, optional
+        relationships.json to migrate into a new SQLite store
+        (default: the one in the data directory; "" disables migration).
 
-        Public Template:
-            - no initialization logic implemented
-        """
-        pass
+    write_behind : bool
+        Queue writes and flush them in batches (see module docstring).
+        Default: ELIANA_RELATIONSHIP_WRITE_BEHIND=1 in the environment.
+    """
 
-    def _load(self, *args, **kwargs) -> Dict:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        store: Optional[RelationshipStore] = None,
+        legacy_json: Optional[str] = None,
+        write_behind: Optional[bool] = None,
+    ):
+        if store is None:
+            path = path or os.getenv("ELIANA_RELATIONSHIP_STORE") or data_path(RELATIONSHIPS_DB_FILE)
+            if legacy_json is None:
+                legacy_json = data_path(RELATIONSHIPS_FILE)
+            store = open_relationship_store(path, legacy_json=legacy_json)
+        self.store = store
+        if write_behind is None:
+            write_behind = os.getenv("ELIANA_RELATIONSHIP_WRITE_BEHIND", "0") == "1"
+        self.writer: Optional[WriteBehindQueue] = None
+        if write_behind:
+            self.writer = WriteBehindQueue(self._flush_records, name="relationships-write-behind")
+        self._write_lock = threading.Lock()
+
+    # --- Storage access ---
+    def _record(self, user_id: str) -> Optional[Dict]:
+        if self.writer is not None:
+            queued = self.writer.get(user_id)
+            if queued is not None:
+                return dict(queued)
+        return self.store.get(user_id)
+
+    def _modify(self, user_id: str, fn: Callable[[Optional[Dict]], Dict]) -> Dict:
+        if self.writer is None:
+            return self.store.modify(user_id, fn)
+        with self._write_lock:
+            record = fn(self._record(user_id))
+            self.writer.put(user_id, record)
+        return record
+
+    def _flush_records(self, batch: Dict[str, Dict], fsync: bool) -> None:
+        self.store.put_many(batch.items(), durable=fsync)
+
+    def _load(self) -> Dict:
+        """All stored records as {user_id: record}, decay not applied (full scan)."""
+        self.save()
+        return dict(self.store.items())
+
+    def save(self):
         """
-        TEMPLATE LOADER FUNCTION
-
-        Private Version:
-            Reads JSON content from disk and returns trust records.
-
-        Public Template:
-            Returns an empty structure.
+        Flush queued writes (write-behind) and the store. Without
+        write-behind, updates are already committed per user.
         """
-        pass
-
-    def save(self, *args, **kwargs):
+        if self.writer is not None:
+            self.writer.flush()
+        self.store.flush()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.store.close()
+
+    def metrics(self) -> Dict:
+        """Write-behind queue metrics ({} when writes are synchronous)."""
+        return self.writer.metrics() if self.writer is not None else {}
+
+    def get_score(self, user_id: str, now: Optional[float] = None) -> float:
+        """Trust score for `user_id` with inactivity decay applied (0.0 for unknown users)."""
+        record = self._record(user_id)
+        if not record:
+            return 0.0
+        return decayed_score(float(record["score"]), record["last_updated"], time.time() if now is None else now)
+
+    def _trust_multiplier(self, score: float) -> float:
+        """Weight applied to interaction deltas at the current trust level."""
+        for upper, multiplier in TRUST_BANDS:
+            if score < upper:
+                return multiplier
+        return TRUST_BANDS[-1][1]
+
+    def update(self, user_id: str, delta: float, name: Optional[str] = None) -> float:
         """
-        TEMPLATE SAVE FUNCTION
-
-        Private Version:
-            Writes trust records to disk safely.
-
-        Public Template:
-            No write operations performed.
+        Apply an interaction delta: inactivity decay since the last update,
+        then the trust multiplier, clamped to 0–100. Returns the new score.
         """
-        pass
+        now = time.time()
 
-    def get_score(self, *args, **kwargs) -> float:
-        """
-        TEMPLATE GET SCORE
+        def apply(record: Optional[Dict]) -> Dict:
+            record = record or {"name": name, "score": 0.0, "last_updated": now}
+            score = decayed_score(record["score"], record["last_updated"], now)
+            score = _clamp(score + delta * self._trust_multiplier(score))
+            return {"name": name or record.get("name"), "score": score, "last_updated": now}
 
-        Private Version:
-            Retrieves user trust score from persistent storage.
+        return self._modify(user_id, apply)["score"]
 
-        Public Template:
-            Always returns 0.0.
+    def apply_score_delta(self, user_id: str, delta: float) -> float:
         """
-        pass
-
-    def _trust_multiplier(self, *args, **kwargs) -> float:
+        Apply a raw score adjustment (no multiplier) on top of the decayed
+        score. Returns the new score.
         """
-        TEMPLATE INTERNAL MULTIPLIER
+        now = time.time()
 
-        Private Version:
-            Applies trust-based weighting to interaction deltas.
+        def apply(record: Optional[Dict]) -> Dict:
+            record = record or {"name": None, "score": 0.0, "last_updated": now}
+            score = decayed_score(record["score"], record["last_updated"], now)
+            return {"name": record.get("name"), "score": _clamp(score + delta), "last_updated": now}
 
-        Public Template:
-            No logic included.
-        """
-        pass
+        return self._modify(user_id, apply)["score"]
 
-    def update(self, *args, **kwargs) -> float:
+    def get_user_relationship(self, user_id: str, now: Optional[float] = None) -> Dict:
         """
-        TEMPLATE UPDATE FUNCTION
-
-        Private Version:
-            - applies trust multiplier
-            - applies inactivity decay
-            - clamps values to 0–100
-            - persists updated score
-
-        Public Template:
-            Returns 0.0 without modification.
+        {"name", "score", "last_updated"} for `user_id` (score decayed to
+        `now`), or {} if unknown. `last_updated` is the last interaction.
         """
-        pass
-
-    def apply_score_delta(self, *args, **kwargs):
-        """
-        TEMPLATE DIRECT DELTA APPLICATION
-
-        Private Version:
-            Applies raw score adjustment without multiplier.
-
-        Public Template:
-            Stub only.
-        """
-        pass
-
-    def get_user_relationship(self, *args, **kwargs) -> Dict:
-        """
-        TEMPLATE GET USER RELATIONSHIP
-
-        Private Version:
-            Returns detailed trust structure:
-                {
-                    "name": ...,
-                    "score": ...,
-                    "last_updated": ...
-                }
-
-        Public Template:
-            Returns empty dict.
+        record = self._record(user_id)
+        if not record:
+            return {}
+        return _current(record, time.time() if now is None else now)
+
+    def register_user(self, user_id: str, name: Optional[str] = None) -> Dict:
+        """Create a record at score 0 if missing; updates the stored name if given."""
+        now = time.time()
+
+        def apply(record: Optional[Dict]) -> Dict:
+            if record is None:
+                return {"name": name, "score": 0.0, "last_updated": now}
+            # Not an interaction: the stored score and decay clock stay as they are.
+            if name:
+                record["name"] = name
+            return record
+
+        return _current(self._modify(user_id, apply), now)
+
+    # --- Bulk ---
+    def export_scores(self, now: Optional[float] = None) -> Dict[str, np.ndarray]:
         """
-        pass
-
-    def register_user(self, *args, **kwargs):
-        """
-        TEMPLATE REGISTER USER
-
-        Private Version:
-            Creates or initializes a new trust record.
+        Every user's record with decay applied in one vectorized pass
+        (analytics/exports). Nothing is written back.
 
-        Public Template:
-            No action performed.
+        Returns arrays keyed "user_id", "name", "score", "stored_score",
+        "last_updated", aligned by position.
         """
-        pass
\ No newline at end of file
+        now = time.time() if now is None else now
+        self.save()
+        user_ids, names, stored, updated = [], [], [], []
+        for user_id, record in self.store.items():
+            user_ids.append(user_id)
+            names.append(record.get("name"))
+            stored.append(record["score"])
+            updated.append(record["last_updated"])
+        stored_scores = np.asarray(stored, dtype=np.float64)
+        last_updated = np.asarray(updated, dtype=np.float64)
+        return {
+            "user_id": np.asarray(user_ids, dtype=object),
+            "name": np.asarray(names, dtype=object),
+            "score": decayed_scores(stored_scores, last_updated, now),
+            "stored_score": stored_scores,
+            "last_updated": last_updated,
+        }
@@ -58,7 +58,7 @@ import numpy as np
 import json
 import os
 from pathlib import Path
-from eliana_soul.config import OPENAI_API_KEY
+from eliana_soul.config import get_openai_api_key
 
 def load_core_memory(*args, **kwargs) -> Dict:
     """
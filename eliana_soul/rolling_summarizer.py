@@ -0,0 +1,321 @@
+"""
+===============================================================================
+    rolling_summarizer.py
+    ---------------------------------------------------------------------------
+    Rolling hierarchical summaries of turns that left the recent chat window.
+===============================================================================
+
+Without compression, everything said earlier in a session either stays in
+the prompt (prompt tokens and reply latency grow with the conversation) or
+is dropped. The RollingSummarizer keeps it as a fixed-size stack of
+progressively denser summaries — the same idea as the
+fragment → sketch → picture hierarchy, but within one session:
+
+-------------------------------------------------------------------------------
+LEVELS
+-------------------------------------------------------------------------------
+    raw      one clipped line per folded message (until a chunk is full)
+    level 1  chunk summary   — every `chunk_size` folded messages
+    level 2  arc summary     — every `fan_in` chunk summaries
+    level 3  session gist    — a single summary; each full set of arcs is
+                               merged into it
+
+Every level has its own token cap (`level_tokens`), at most `fan_in - 1`
+entries wait at levels 1 and 2, and at most `2 * chunk_size` clipped raw
+lines are rendered, so the section has a fixed upper size no matter how
+long the session runs (or how far behind a slow summarizer falls).
+
+-------------------------------------------------------------------------------
+BACKGROUND WORK
+-------------------------------------------------------------------------------
+• `add()` is O(1) on the turn path: it appends the message and, when a
+  chunk fills, schedules summarization on a shared worker pool.
+• Jobs of one summarizer run strictly one at a time and in order.
+• Messages being summarized keep rendering as raw lines until their summary
+  lands, so the prompt never loses content mid-job.
+• If the summarize function fails, the extractive summarizer is used for
+  that step instead.
+
+-------------------------------------------------------------------------------
+SUMMARIZE FUNCTIONS
+-------------------------------------------------------------------------------
+    summarize_fn(texts: List[str], level: int, max_tokens: int) -> str
+
+• `extractive_summary` (default): no model call; takes leading sentences
+  from each input round-robin until the token cap. Deterministic.
+• `llm_summarizer(get_client)`: asks the chat model for a dense,
+  third-person summary within the cap.
+
+-------------------------------------------------------------------------------
+TOKEN REPORT
+-------------------------------------------------------------------------------
+`report()` returns the raw prompt tokens of all folded messages, the tokens
+of the rendered summary, and the difference (`saved_tokens`) — the prompt
+tokens this turn did not spend because of summarization.
+===============================================================================
+"""
+
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 8
+FAN_IN = 4
+LEVEL_TOKENS = (120, 200, 300)   # caps for chunk, arc and gist summaries
+RAW_LINE_CHARS = 160             # raw (not yet summarized) messages are clipped to this
+SUMMARY_MODEL = "gpt-4o-mini"
+
+SummarizeFn = Callable[[List[str], int, int], str]
+
+# Shared by all sessions; each summarizer still runs its own jobs serially.
+_summary_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rolling-summary")
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def _clip(text: str, limit: int = RAW_LINE_CHARS) -> str:
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    return (cut[:cut.rfind(" ")] if " " in cut else cut) + "…"
+
+
+# === SUMMARIZE FUNCTIONS ===
+def extractive_summary(texts: List[str], level: int, max_tokens: int) -> str:
+    """
+    Model-free summary: leading sentences of each text, round-robin, until
+    `max_tokens`. Keeps the chronology of `texts`.
+    """
+    sentences = [_SENTENCE_END.split(text.strip()) for text in texts if text and text.strip()]
+    picked: List[List[str]] = [[] for _ in sentences]
+    used = 0
+    depth = 0
+    while any(depth < len(s) for s in sentences):
+        for i, parts in enumerate(sentences):
+            if depth >= len(parts):
+                continue
+            cost = count_tokens(parts[depth]) + 1
+            if used + cost > max_tokens:
+                if not used:
+                    # A single oversized sentence: clip it instead.
+                    return parts[depth][:max_tokens * 4].rstrip() + " …"
+                return " ".join(" ".join(p) for p in picked if p) + " …"
+            picked[i].append(parts[depth])
+            used += cost
+        depth += 1
+    return " ".join(" ".join(p) for p in picked if p)
+
+
+_LEVEL_NAMES = {1: "a stretch of conversation", 2: "several conversation summaries", 3: "the session so far"}
+
+
+def llm_summarizer(get_client: Callable[[], Any], model: str = SUMMARY_MODEL, temperature: float = 0.2) -> SummarizeFn:
+    """
+    Build a summarize_fn backed by the chat model.
+
+    `get_client` is called per request (e.g. Eliana_brain.get_client), so the
+    client is still created lazily.
+    """
+
+    def summarize(texts: List[str], level: int, max_tokens: int) -> str:
+        response = get_client().chat.completions.create(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        f"Compress {_LEVEL_NAMES.get(level, 'the text')} between a user and Eliana "
+                        f"into at most {max_tokens} tokens. Third person, past tense. Keep facts, "
+                        "names, commitments and emotional turning points; drop small talk."
+                    ),
+                },
+                {"role": "user", "content": "\n".join(texts)},
+            ],
+        )
+        return response.choices[0].message.content.strip()
+
+    return summarize
+
+
+# === SUMMARIZER ===
+class RollingSummarizer:
+    """
+    Fixed-size hierarchical summary of one session's folded messages.
+
+    Attributes:
+        levels: levels[0] chunk summaries, levels[1] arc summaries,
+                levels[2] the session gist (0 or 1 entry); oldest first.
+        raw_tokens: prompt tokens all folded messages would cost raw.
+        folded: number of messages folded in.
+    """
+
+    def __init__(
+        self,
+        summarize_fn: Optional[SummarizeFn] = None,
+        chunk_size: int = CHUNK_SIZE,
+        fan_in: int = FAN_IN,
+        level_tokens: Tuple[int, ...] = LEVEL_TOKENS,
+        background: bool = False,
+    ):
+        self.summarize_fn = summarize_fn or extractive_summary
+        self.chunk_size = chunk_size
+        self.fan_in = fan_in
+        self.level_tokens = tuple(level_tokens)
+        self.background = background
+
+        self.levels: List[List[str]] = [[] for _ in self.level_tokens]
+        self.pending: List[str] = []         # folded messages not yet in a job
+        self.in_flight: List[str] = []       # folded messages being summarized
+        self.raw_tokens = 0
+        self.folded = 0
+
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._rendered: Optional[str] = None
+        self._rendered_tokens = 0
+
+    # --- Turn path ---
+    def add(self, text: str, raw_tokens: int = 0) -> None:
+        """
+        Fold one message ("Speaker: content") into the summary.
+
+        `raw_tokens` is what the message cost in the prompt (its cached
+        count); it is only used for the savings report.
+        """
+        with self._lock:
+            self.pending.append(text)
+            self.raw_tokens += raw_tokens or count_tokens(text)
+            self.folded += 1
+            self._rendered = None
+            start = self._claim_job()
+        if start:
+            self._start_job()
+
+    def render(self) -> Optional[str]:
+        """Summary section for the prompt: gist, arcs, chunks, then raw lines."""
+        with self._lock:
+            if self._rendered is None:
+                parts = [entry for level in reversed(self.levels) for entry in level]
+                raw = self.in_flight + self.pending
+                if len(raw) > 2 * self.chunk_size:
+                    # Summarization is lagging (slow backend); keep the
+                    # section bounded and show only the newest messages.
+                    parts.append(f"({len(raw) - 2 * self.chunk_size} messages awaiting summary)")
+                    raw = raw[-2 * self.chunk_size:]
+                parts += [_clip(text) for text in raw]
+                self._rendered = "\n".join(parts)
+                self._rendered_tokens = count_tokens(self._rendered)
+            return self._rendered or None
+
+    def report(self) -> Dict[str, int]:
+        self.render()
+        return {
+            "folded_messages": self.folded,
+            "raw_tokens": self.raw_tokens,
+            "summary_tokens": self._rendered_tokens,
+            "saved_tokens": max(0, self.raw_tokens - self._rendered_tokens),
+        }
+
+    # --- Background jobs ---
+    def _claim_job(self) -> bool:
+        """Under the lock: True if a chunk is full and no job is running."""
+        if len(self.pending) >= self.chunk_size and self._idle.is_set():
+            self._idle.clear()
+            return True
+        return False
+
+    def _start_job(self) -> None:
+        if self.background:
+            _summary_pool.submit(self._run)
+        else:
+            self._run()
+
+    def _summarize(self, texts: List[str], level: int) -> str:
+        max_tokens = self.level_tokens[level - 1]
+        try:
+            summary = self.summarize_fn(texts, level, max_tokens)
+        except Exception:
+            logger.exception("Rolling summary (level %d) failed; using extractive summary", level)
+            summary = extractive_summary(texts, level, max_tokens)
+        return summary or extractive_summary(texts, level, max_tokens)
+
+    def _run(self) -> None:
+        """Summarize full chunks and cascade merges; one job per summarizer at a time."""
+        try:
+            while True:
+                with self._lock:
+                    if len(self.pending) < self.chunk_size:
+                        self._idle.set()
+                        return
+                    self.in_flight = self.pending[:self.chunk_size]
+                    del self.pending[:self.chunk_size]
+                    chunk = list(self.in_flight)
+
+                summary = self._summarize(chunk, 1)
+                with self._lock:
+                    self.levels[0].append(summary)
+                    self.in_flight = []
+                    self._rendered = None
+                self._cascade()
+        except BaseException:
+            with self._lock:
+                self.pending[:0] = self.in_flight
+                self.in_flight = []
+                self._idle.set()
+            raise
+
+    def _cascade(self) -> None:
+        top = len(self.levels) - 1
+        for index in range(top):
+            with self._lock:
+                full = len(self.levels[index]) >= self.fan_in
+                entries = list(self.levels[index]) if full else None
+                # The gist absorbs its own previous text, keeping one entry.
+                if full and index + 1 == top:
+                    entries = self.levels[top] + entries
+            if not full:
+                return
+            merged = self._summarize(entries, index + 2)
+            with self._lock:
+                del self.levels[index][:self.fan_in]
+                if index + 1 == top:
+                    self.levels[top] = [merged]
+                else:
+                    self.levels[index + 1].append(merged)
+                self._rendered = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until no job is running (e.g. before checkpoint or shutdown)."""
+        return self._idle.wait(timeout)
+
+    # --- Persistence ---
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "levels": [list(level) for level in self.levels],
+                "pending": self.in_flight + self.pending,
+                "raw_tokens": self.raw_tokens,
+                "folded": self.folded,
+            }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self.levels = [list(level) for level in state["levels"]]
+            self.pending = list(state["pending"])
+            self.in_flight = []
+            self.raw_tokens = state["raw_tokens"]
+            self.folded = state["folded"]
+            self._rendered = None
+            start = self._claim_job()
+        if start:
+            self._start_job()
@@ -0,0 +1,434 @@
+"""
+=====================================================================
+Runtime Snapshot — Prebuilt, Memory-Mapped Static State
+=====================================================================
+
+Purpose
+-------
+Every worker used to rebuild the same derived structures at startup:
+flattened anchors (`flatten_emotions`), the token → effect tables
+(`load_emotion_map`), and the embedding matrices used for cosine
+scoring. This module serializes the *fully derived* static state into a
+single versioned, checksummed binary artifact that workers memory-map
+instead of re-parsing JSON.
+
+Artifact Layout
+---------------
+    offset 0   MAGIC (8 bytes)           b"ELSNAP\\x00\\x01"
+    offset 8   format version (u32, LE)
+    offset 12  header length  (u32, LE)
+    offset 16  header (UTF-8 JSON)
+    ...        zero padding to a 64-byte boundary
+    body       sections, each 64-byte aligned
+
+The header records:
+    • format_version  — readers refuse any other version
+    • sources         — size + mtime_ns + sha256 of every source file
+    • sections        — name → {kind, offset, nbytes, dtype, shape}
+    • body_sha256     — checksum over the whole body
+
+Sections
+--------
+    "<bank>:json"    — JSON-encoded structure (metadata, maps, token lists)
+    "<bank>:raw"     — float64 embedding matrix, the vectors exactly as loaded
+    "<bank>:matrix"  — float32 embedding matrix, rows L2-normalized
+
+Records keep their "embedding" exactly as the JSON loader returns it (a
+list of floats, rebuilt from the raw section). The normalized matrices
+are exposed under their own banks (`<bank>_matrix`, `emotion_tokens`) as
+zero-copy NumPy views into the mapping, so N workers on one host share a
+single copy of the vectors through the page cache.
+
+Freshness
+---------
+`load_or_build_snapshot()` compares the recorded source fingerprints with
+the files on disk. If any source changed (or the artifact is missing,
+corrupt, or from another format version) the snapshot is rebuilt and
+atomically replaced before being mapped.
+
+Usage
+-----
+    python runtime_snapshot.py build-snapshot --data-dir data --out eliana.snap
+    python runtime_snapshot.py inspect --out eliana.snap
+
+=====================================================================
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from eliana_soul import config
+from static_loader import ALL_BANKS, BANK_SPECS, StaticData
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"ELSNAP\x00\x01"
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_FILE = "eliana_runtime.snap"
+_ALIGN = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+# Banks whose records carry an "embedding" field: list of dicts.
+_RECORD_BANKS = ("core_embeddings", "psych_models", "major_emotions")
+# Banks that map token → embedding vector.
+_VECTOR_MAP_BANKS = ("emotion_embeddings",)
+# Banks stored as plain JSON structures.
+_JSON_BANKS = ("core_memory", "flat_anchors", "emotion_map")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, corrupt, stale, or unsupported."""
+
+
+# === HELPERS ===
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+
+def _normalized_matrix(vectors: List[Any]) -> np.ndarray:
+    """Stack vectors into a float32 matrix with L2-normalized rows."""
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms)
+
+
+def _raw_matrix(vectors: List[Any]) -> np.ndarray:
+    """Stack vectors unchanged (float64: exact for JSON numbers)."""
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float64)
+    return np.ascontiguousarray(np.asarray(vectors, dtype=np.float64))
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprints(data_dir: Optional[str] = None, with_hash: bool = False) -> Dict[str, Dict]:
+    """
+    Fingerprint every static source file.
+
+    size + mtime_ns is enough to detect edits cheaply at startup; the
+    sha256 is recorded at build time for auditing which exact inputs a
+    snapshot was produced from.
+    """
+    fingerprints = {}
+    for name, spec in BANK_SPECS.items():
+        if not spec.filename:
+            continue
+        path = config.data_path(spec.filename, data_dir)
+        stat = os.stat(path)
+        entry = {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if with_hash:
+            entry["sha256"] = _file_sha256(path)
+        fingerprints[name] = entry
+    return fingerprints
+
+
+# === BUILD ===
+def _derive_sections(static_data: StaticData) -> Dict[str, Any]:
+    """
+    Turn loaded banks into snapshot sections.
+
+    Record banks are split into metadata (JSON, without the vectors) and
+    a normalized matrix; vector maps into a token list and a matrix.
+    """
+    sections: Dict[str, Any] = {}
+
+    for name in _RECORD_BANKS:
+        records = static_data[name] or []
+        sections[f"{name}:json"] = [
+            {k: v for k, v in record.items() if k != "embedding"} for record in records
+        ]
+        sections[f"{name}:raw"] = _raw_matrix([r["embedding"] for r in records])
+        sections[f"{name}:matrix"] = _normalized_matrix([r["embedding"] for r in records])
+
+    for name in _VECTOR_MAP_BANKS:
+        vectors = static_data[name] or {}
+        tokens = list(vectors)
+        sections[f"{name}:json"] = tokens
+        sections[f"{name}:raw"] = _raw_matrix([vectors[t] for t in tokens])
+        sections[f"{name}:matrix"] = _normalized_matrix([vectors[t] for t in tokens])
+
+    for name in _JSON_BANKS:
+        sections[f"{name}:json"] = static_data[name] or {}
+
+    return sections
+
+
+def build_snapshot(out_path: str, data_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load and derive all static banks, then write the snapshot atomically.
+
+    The artifact is written to a temporary file in the destination
+    directory and renamed into place, so readers never observe a
+    half-written snapshot.
+
+    Returns:
+        The snapshot header (including per-section layout and timings).
+    """
+    start = time.perf_counter()
+    fingerprints = source_fingerprints(data_dir, with_hash=True)
+    static_data = StaticData(data_dir=data_dir).preload(ALL_BANKS)
+    sections = _derive_sections(static_data)
+
+    # Serialize sections and lay out the body.
+    layout: Dict[str, Dict[str, Any]] = {}
+    blobs: List[bytes] = []
+    offset = 0
+    for name, value in sections.items():
+        if isinstance(value, np.ndarray):
+            blob = value.tobytes()
+            entry = {"kind": "array", "dtype": str(value.dtype), "shape": list(value.shape)}
+        else:
+            blob = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            entry = {"kind": "json"}
+        entry.update(offset=offset, nbytes=len(blob))
+        layout[name] = entry
+        padding = _pad(len(blob))
+        blobs.append(blob + b"\x00" * padding)
+        offset += len(blob) + padding
+
+    body_digest = hashlib.sha256()
+    for blob in blobs:
+        body_digest.update(blob)
+
+    header = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": time.time(),
+        "sources": fingerprints,
+        "sections": layout,
+        "body_size": offset,
+        "body_sha256": body_digest.hexdigest(),
+        "build_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    preamble = _PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header_bytes))
+    head = preamble + header_bytes
+    head += b"\x00" * _pad(len(head))
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=out_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(head)
+            for blob in blobs:
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    logger.info("Built runtime snapshot %s (%d bytes) in %.1f ms", out_path, len(head) + offset, header["build_ms"])
+    return header
+
+
+# === LOAD ===
+class RuntimeSnapshot:
+    """
+    A memory-mapped snapshot.
+
+    Array sections are zero-copy views into the mapping; JSON sections
+    are decoded on first access and cached. The mapping stays open for
+    the lifetime of this object (and of any array view derived from it).
+    """
+
+    def __init__(self, path: str, verify_checksum: bool = False):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise SnapshotError(f"Empty or unreadable snapshot: {path}") from e
+        self._json_cache: Dict[str, Any] = {}
+        try:
+            self.header, self._body_start = self._read_header()
+            if verify_checksum:
+                self._verify_checksum()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_header(self) -> Tuple[Dict[str, Any], int]:
+        if len(self._mm) < _PREAMBLE.size:
+            raise SnapshotError("Truncated snapshot preamble")
+        magic, version, header_len = _PREAMBLE.unpack_from(self._mm, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError("Not an Eliana runtime snapshot")
+        if version != SNAPSHOT_FORMAT_VERSION:
+            raise SnapshotError(f"Unsupported snapshot format version {version}")
+        header_end = _PREAMBLE.size + header_len
+        try:
+            header = json.loads(self._mm[_PREAMBLE.size:header_end].decode("utf-8"))
+        except ValueError as e:
+            raise SnapshotError("Corrupt snapshot header") from e
+        body_start = header_end + _pad(header_end)
+        if len(self._mm) != body_start + header["body_size"]:
+            raise SnapshotError("Snapshot size does not match header")
+        return header, body_start
+
+    def _verify_checksum(self) -> None:
+        digest = hashlib.sha256()
+        view = memoryview(self._mm)[self._body_start:]
+        try:
+            for i in range(0, len(view), 1 << 24):
+                digest.update(view[i:i + (1 << 24)])
+        finally:
+            view.release()
+        if digest.hexdigest() != self.header["body_sha256"]:
+            raise SnapshotError("Snapshot checksum mismatch")
+
+    def section(self, name: str) -> Any:
+        entry = self.header["sections"][name]
+        start = self._body_start + entry["offset"]
+        if entry["kind"] == "array":
+            if not entry["nbytes"]:
+                return np.zeros(entry["shape"], dtype=entry["dtype"])
+            return np.frombuffer(
+                self._mm, dtype=entry["dtype"], count=int(np.prod(entry["shape"])), offset=start
+            ).reshape(entry["shape"])
+        if name not in self._json_cache:
+            self._json_cache[name] = json.loads(self._mm[start:start + entry["nbytes"]].decode("utf-8"))
+        return self._json_cache[name]
+
+    def is_fresh(self, data_dir: Optional[str] = None) -> bool:
+        """True if every recorded source still has the same size and mtime."""
+        try:
+            current = source_fingerprints(data_dir)
+        except OSError:
+            return False
+        recorded = self.header["sources"]
+        if set(current) != set(recorded):
+            return False
+        return all(
+            current[name]["size"] == recorded[name]["size"]
+            and current[name]["mtime_ns"] == recorded[name]["mtime_ns"]
+            for name in current
+        )
+
+    def to_static_data(self, data_dir: Optional[str] = None) -> StaticData:
+        """
+        Build a fully populated StaticData from the snapshot.
+
+        Banks hold the same values and types as the JSON loaders return:
+        each record's "embedding" (and each emotion_embeddings vector) is
+        the original list of floats. The normalized matrices are exposed as
+        extra banks (`<bank>_matrix`, plus `emotion_tokens`) for
+        vectorized scoring.
+        """
+        start = time.perf_counter()
+        static_data = StaticData(data_dir=data_dir)
+
+        for name in _RECORD_BANKS:
+            raw = self.section(f"{name}:raw").tolist()
+            records = [dict(meta, embedding=raw[i]) for i, meta in enumerate(self.section(f"{name}:json"))]
+            static_data.seed(name, records)
+            static_data.seed(f"{name}_matrix", self.section(f"{name}:matrix"))
+
+        for name in _VECTOR_MAP_BANKS:
+            raw = self.section(f"{name}:raw").tolist()
+            tokens = self.section(f"{name}:json")
+            static_data.seed(name, {token: raw[i] for i, token in enumerate(tokens)})
+            static_data.seed(f"{name}_matrix", self.section(f"{name}:matrix"))
+        static_data.seed("emotion_tokens", self.section("emotion_embeddings:json"))
+
+        for name in _JSON_BANKS:
+            static_data.seed(name, self.section(f"{name}:json"))
+
+        static_data.preload_ms = round((time.perf_counter() - start) * 1000, 2)
+        static_data.snapshot_path = self.path
+        static_data.snapshot = self
+        return static_data
+
+    def close(self) -> None:
+        try:
+            self._mm.close()
+        except BufferError:
+            # Array views still reference the mapping; it is released when
+            # the last view is garbage-collected.
+            pass
+        self._file.close()
+
+
+def load_or_build_snapshot(
+    snapshot_path: Optional[str] = None,
+    data_dir: Optional[str] = None,
+    verify_checksum: bool = False,
+) -> RuntimeSnapshot:
+    """
+    Map the snapshot, rebuilding it first if missing, corrupt, or stale.
+
+    Parameters
+    ----------
+    snapshot_path : str, optional
+        Defaults to `eliana_runtime.snap` inside the data directory.
+
+    data_dir : str, optional
+        Directory containing the static source files.
+
+    verify_checksum : bool
+        Verify body_sha256 on open. Off by default: it reads the whole
+        file, which defeats the near-instant mmap start. Turn it on when
+        the artifact comes from another host (`inspect` always verifies).
+    """
+    snapshot_path = snapshot_path or config.data_path(SNAPSHOT_FILE, data_dir)
+    try:
+        snapshot = RuntimeSnapshot(snapshot_path, verify_checksum=verify_checksum)
+        if snapshot.is_fresh(data_dir):
+            return snapshot
+        logger.info("Runtime snapshot %s is stale; rebuilding", snapshot_path)
+        snapshot.close()
+    except FileNotFoundError:
+        logger.info("No runtime snapshot at %s; building", snapshot_path)
+    except SnapshotError as e:
+        logger.warning("Discarding runtime snapshot %s: %s", snapshot_path, e)
+
+    build_snapshot(snapshot_path, data_dir)
+    return RuntimeSnapshot(snapshot_path, verify_checksum=False)
+
+
+# === CLI ===
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect Eliana runtime snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build-snapshot", help="Serialize the derived static state.")
+    build.add_argument("--data-dir", default=None, help="Directory with static source files.")
+    build.add_argument("--out", default=None, help=f"Output path (default: <data-dir>/{SNAPSHOT_FILE}).")
+
+    inspect = sub.add_parser("inspect", help="Verify a snapshot and print its header.")
+    inspect.add_argument("--data-dir", default=None)
+    inspect.add_argument("--out", default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    path = args.out or config.data_path(SNAPSHOT_FILE, args.data_dir)
+    if args.command == "build-snapshot":
+        header = build_snapshot(path, args.data_dir)
+        print(json.dumps({"path": path, "build_ms": header["build_ms"], "body_size": header["body_size"]}, indent=2))
+    else:
+        snap = RuntimeSnapshot(path, verify_checksum=True)
+        print(json.dumps(dict(snap.header, fresh=snap.is_fresh(args.data_dir)), indent=2))
@@ -0,0 +1,351 @@
+"""
+===============================================================================
+    session_checkpoint.py
+    ---------------------------------------------------------------------------
+    Crash recovery and migration for SessionMemory: snapshot + write-ahead log.
+===============================================================================
+
+A SessionMemory lived only in process memory: if the process died, the
+whole session (messages, emotion history, resonance logs, mood) was lost,
+and a live session could not be moved to another worker. This module adds
+a versioned, compact on-disk form and a fast restore path.
+
+-------------------------------------------------------------------------------
+1. SNAPSHOT  (<session_id>.snap)
+-------------------------------------------------------------------------------
+• Full `SessionMemory.to_state()` as zlib-compressed JSON behind a fixed
+  binary header:
+
+      magic  b"ELSESS\\0\\1"   8 bytes
+      format version           uint16
+      crc32 of payload         uint32
+      payload length           uint32
+      last WAL sequence        uint64
+      payload                  zlib(JSON state)
+
+• Written to a temp file, fsync'd and swapped in with os.replace, so a
+  crash mid-write leaves the previous snapshot intact.
+• Spilled history is referenced by spill path + byte length, not copied.
+
+-------------------------------------------------------------------------------
+2. WRITE-AHEAD LOG  (<session_id>.wal)
+-------------------------------------------------------------------------------
+• Every SessionMemory mutation is journaled as one frame:
+
+      length uint32 | crc32 uint32 | flags uint8 | payload
+
+  payload = JSON {"s": seq, "op": method, "a": kwargs}, zlib-compressed
+  when large (flags bit 0).
+• Frames are flushed as they are written; `fsync_wal=True` also fsyncs
+  each frame (durable against power loss, at a per-turn cost).
+• Replay stops at the first torn or corrupt frame and truncates it away.
+
+-------------------------------------------------------------------------------
+3. COMPACTION
+-------------------------------------------------------------------------------
+• Once `compact_every` ops are journaled, `maybe_compact()` (called
+  between turns) snapshots the current state and empties the WAL.
+  Restore cost is therefore bounded by one snapshot decode plus about
+  `compact_every` replayed ops.
+• WAL frames carry the sequence number, and the snapshot records the last
+  sequence it contains, so a crash between "snapshot written" and "WAL
+  emptied" never replays an op twice.
+
+-------------------------------------------------------------------------------
+4. MIGRATION
+-------------------------------------------------------------------------------
+• `dump_session(session)` / `load_session(blob)` use the snapshot encoding
+  for moving a session between workers in one message. The blob carries
+  the spilled history too (the spill file's contents), and load_session
+  writes it to the receiving worker's spill directory, so full-history
+  readers keep working after a move.
+• Snapshots (section 1) still only reference the spill file: resuming on
+  a host without it loses the spilled history (SessionSpill.read logs
+  this and reads it as empty) but not the session.
+
+Usage:
+    checkpointer = SessionCheckpointer(memory).attach()
+    ...                                   # every mutation is now journaled
+    checkpointer.maybe_compact()          # after each turn
+    checkpointer.close()                  # final compaction
+
+    # after a crash / on another worker:
+    checkpointer = SessionCheckpointer.resume(session_id)
+    memory = checkpointer.session
+===============================================================================
+"""
+
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from session_memory import SessionMemory
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = os.getenv("ELIANA_SESSION_CHECKPOINT_DIR", "session_checkpoints")
+COMPACT_EVERY = 200
+
+# === FORMAT ===
+SNAPSHOT_MAGIC = b"ELSESS\x00\x01"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<8sHIIQ")  # magic, version, crc32, length, seq
+_WAL_FRAME = struct.Struct("<IIB")           # length, crc32, flags
+_WAL_COMPRESSED = 0x01
+_WAL_COMPRESS_OVER = 1024                    # bytes of JSON before zlib kicks in
+
+
+class CheckpointError(Exception):
+    """Raised when a snapshot is missing, corrupt or of an unknown version."""
+
+
+# === ENCODING ===
+def _encode_state(state: Dict[str, Any], seq: int) -> bytes:
+    payload = zlib.compress(json.dumps(state, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8"))
+    header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, zlib.crc32(payload), len(payload), seq)
+    return header + payload
+
+
+def _decode_state(blob: bytes) -> Tuple[Dict[str, Any], int]:
+    if len(blob) < _SNAPSHOT_HEADER.size:
+        raise CheckpointError("Snapshot truncated (no header)")
+    magic, version, crc, length, seq = _SNAPSHOT_HEADER.unpack_from(blob)
+    if magic != SNAPSHOT_MAGIC:
+        raise CheckpointError("Not a session snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise CheckpointError(f"Unsupported session snapshot version {version}")
+    payload = blob[_SNAPSHOT_HEADER.size:_SNAPSHOT_HEADER.size + length]
+    if len(payload) != length or zlib.crc32(payload) != crc:
+        raise CheckpointError("Session snapshot checksum mismatch")
+    return json.loads(zlib.decompress(payload)), seq
+
+
+def dump_session(session: SessionMemory) -> bytes:
+    """Serialize a session, spilled history included, into one self-contained blob (for migration)."""
+    state = session.to_state()
+    state["spilled"] = session.spill.read_bytes().decode("utf-8")
+    return _encode_state(state, 0)
+
+
+def load_session(blob: bytes, spill_dir: Optional[str] = None) -> SessionMemory:
+    """Rebuild a session from `dump_session` output, restoring its spill file under `spill_dir`."""
+    state, _ = _decode_state(blob)
+    spilled = state.pop("spilled", "")
+    memory = SessionMemory.from_state(state, spill_dir=spill_dir)
+    if spilled and memory.spill.enabled:
+        memory.spill.restore(spilled.encode("utf-8"))
+    return memory
+
+
+def _encode_frame(seq: int, op: str, args: Dict[str, Any]) -> bytes:
+    payload = json.dumps({"s": seq, "op": op, "a": args}, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    flags = 0
+    if len(payload) > _WAL_COMPRESS_OVER:
+        payload, flags = zlib.compress(payload), _WAL_COMPRESSED
+    return _WAL_FRAME.pack(len(payload), zlib.crc32(payload), flags) + payload
+
+
+def _read_frames(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yield (end_offset, entry) for each intact WAL frame.
+
+    Stops silently at the first torn/corrupt frame; the caller truncates
+    the file to the last yielded offset.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + _WAL_FRAME.size <= len(data):
+        length, crc, flags = _WAL_FRAME.unpack_from(data, offset)
+        start = offset + _WAL_FRAME.size
+        payload = data[start:start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return
+        if flags & _WAL_COMPRESSED:
+            payload = zlib.decompress(payload)
+        offset = start + length
+        yield offset, json.loads(payload)
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# === CHECKPOINTER ===
+class SessionCheckpointer:
+    """
+    Journals one SessionMemory to a WAL and compacts it into snapshots.
+
+    Attributes:
+        seq: sequence number of the last journaled op.
+        last_restore: {"restore_ms", "replayed", "truncated_bytes"} when this
+                      checkpointer was created by `resume()`, else None.
+    """
+
+    def __init__(
+        self,
+        session: SessionMemory,
+        directory: str = CHECKPOINT_DIR,
+        compact_every: int = COMPACT_EVERY,
+        fsync_wal: bool = False,
+    ):
+        self.session = session
+        self.directory = directory
+        self.compact_every = compact_every
+        self.fsync_wal = fsync_wal
+        self.seq = 0
+        self.last_restore: Optional[Dict[str, Any]] = None
+        self._since_compact = 0
+        self._wal = None
+        self._lock = threading.RLock()
+
+    # --- Paths ---
+    @staticmethod
+    def paths(directory: str, session_id: str) -> Tuple[str, str]:
+        base = os.path.join(directory, session_id)
+        return base + ".snap", base + ".wal"
+
+    @property
+    def snapshot_path(self) -> str:
+        return self.paths(self.directory, self.session.session_id)[0]
+
+    @property
+    def wal_path(self) -> str:
+        return self.paths(self.directory, self.session.session_id)[1]
+
+    # --- Journaling ---
+    def attach(self) -> "SessionCheckpointer":
+        """Start journaling the session; writes a base snapshot if none exists."""
+        os.makedirs(self.directory, exist_ok=True)
+        if not os.path.exists(self.snapshot_path):
+            self.compact()
+        self.session._journal = self._append
+        return self
+
+    def _open_wal(self):
+        if self._wal is None:
+            self._wal = open(self.wal_path, "ab")
+        return self._wal
+
+    def _append(self, op: str, args: Dict[str, Any]) -> None:
+        with self._lock:
+            self.seq += 1
+            wal = self._open_wal()
+            wal.write(_encode_frame(self.seq, op, args))
+            wal.flush()
+            if self.fsync_wal:
+                os.fsync(wal.fileno())
+            self._since_compact += 1
+
+    def compact(self) -> None:
+        """Snapshot the current state and empty the WAL."""
+        with self._lock:
+            _atomic_write(self.snapshot_path, _encode_state(self.session.to_state(), self.seq))
+            if self._wal is not None:
+                self._wal.close()
+                self._wal = None
+            with open(self.wal_path, "wb"):
+                pass
+            self._since_compact = 0
+
+    def maybe_compact(self) -> bool:
+        """
+        Compact if `compact_every` ops have accumulated.
+
+        Call between turns: ops are journaled *before* they are applied, so
+        compacting from inside the journal hook would snapshot a state that
+        is missing the op being written.
+        """
+        if self._since_compact >= self.compact_every:
+            self.compact()
+            return True
+        return False
+
+    def close(self) -> None:
+        """Final compaction; detaches from the session."""
+        with self._lock:
+            self.compact()
+            if self.session._journal == self._append:
+                self.session._journal = None
+            if self._wal is not None:
+                self._wal.close()
+                self._wal = None
+
+    # --- Restore ---
+    @classmethod
+    def resume(
+        cls,
+        session_id: str,
+        directory: str = CHECKPOINT_DIR,
+        spill_dir: Optional[str] = None,
+        compact_every: int = COMPACT_EVERY,
+        fsync_wal: bool = False,
+        summarizer=None,
+    ) -> "SessionCheckpointer":
+        """
+        Rebuild a session from its snapshot + WAL and keep journaling it.
+
+        `summarizer` is the RollingSummarizer the restored session should
+        use (see SessionMemory.__init__).
+
+        Raises CheckpointError if the snapshot is missing or corrupt.
+        """
+        start = time.perf_counter()
+        snapshot_path, wal_path = cls.paths(directory, session_id)
+        try:
+            with open(snapshot_path, "rb") as f:
+                state, seq = _decode_state(f.read())
+        except FileNotFoundError:
+            raise CheckpointError(f"No snapshot for session {session_id}") from None
+        session = SessionMemory.from_state(state, spill_dir=spill_dir, summarizer=summarizer)
+
+        replayed, good_offset, truncated = 0, 0, 0
+        if os.path.exists(wal_path):
+            for good_offset, entry in _read_frames(wal_path):
+                if entry["s"] <= seq:
+                    continue
+                session.apply_journal_op(entry["op"], entry["a"])
+                seq = entry["s"]
+                replayed += 1
+            truncated = os.path.getsize(wal_path) - good_offset
+            if truncated:
+                logger.warning("Session %s: dropping %d bytes of torn WAL tail", session_id, truncated)
+                with open(wal_path, "r+b") as f:
+                    f.truncate(good_offset)
+
+        checkpointer = cls(session, directory, compact_every, fsync_wal)
+        checkpointer.seq = seq
+        checkpointer._since_compact = replayed
+        checkpointer.last_restore = {
+            "restore_ms": round((time.perf_counter() - start) * 1000, 2),
+            "replayed": replayed,
+            "truncated_bytes": truncated,
+        }
+        logger.info("Session %s restored in %.1f ms (%d ops replayed)",
+                    session_id, checkpointer.last_restore["restore_ms"], replayed)
+        session._journal = checkpointer._append
+        return checkpointer
+
+
+def restore_session(session_id: str, directory: str = CHECKPOINT_DIR, spill_dir: Optional[str] = None) -> SessionMemory:
+    """Restore a session without re-attaching a journal (read-only inspection)."""
+    checkpointer = SessionCheckpointer.resume(session_id, directory, spill_dir)
+    checkpointer.session._journal = None
+    return checkpointer.session
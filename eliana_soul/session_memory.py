@@ -11,7 +11,7 @@
     - psychological pattern matches
     - core value and fragment resonances
     - summary records (used for meta-reflection)
-    - rolling chat window for conversation grounding
+    - token-bounded rolling chat window (older turns rolled into summaries)
     - dynamic mood state
 
     This memory is reset only at application start and persists through the
@@ -21,144 +21,616 @@
 
     Long-term memory (e.g., relationship scores or user personality fragments)
     lives in other modules — this class is strictly short-term reasoning memory.
+
+    Memory bounds:
+    Full-history fields are fixed-size ring buffers of `__slots__` records
+    (session_records.py). Older entries spill to an append-only per-session
+    JSONL file (ELIANA_SESSION_SPILL_DIR) and remain readable, so per-session
+    memory stays flat across arbitrarily long conversations.
+    Records still read like the old dicts (`memory.user_emotions[-1]["emotions"]`),
+    and `recent_messages` is a list-like view of {role, content} dicts.
+
+    Emotion analytics:
+    Emotion entries are mirrored into columnar `EmotionHistory` matrices
+    (emotion_history.py); mood updates, summary aggregates and trend
+    metadata are vectorized queries over them rather than dict loops.
+
+    Persistence:
+    `to_state()` / `from_state()` round-trip the whole session, and every
+    mutator reports itself to an optional journal hook, so
+    session_checkpoint.py can keep a snapshot + write-ahead log for crash
+    recovery and for moving a session to another worker.
 ===============================================================================
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Any
+import os
 import time
+import uuid
+from collections import deque
 from datetime import timezone, datetime
 
-class SessionMemory:
+from eliana_mood import MoodState, get_compiled_change_map
+from emotion_history import EmotionHistory, dominant_label
+from rolling_summarizer import RollingSummarizer
+from token_budget import count_message_tokens
+from session_records import (
+    BoundedLog,
+    EmotionRecord,
+    FactRecord,
+    MessageRecord,
+    MessageView,
+    PatternRecord,
+    ResonanceRecord,
+    SessionSpill,
+    SummaryRecord,
+    TraceRecord,
+)
+
+# === MEMORY BOUNDS ===
+# Full-history fields keep the newest HISTORY_LIMIT entries in memory and
+# spill older ones to the per-session file; windows are plain ring buffers.
+HISTORY_LIMIT = 200
+FACT_LIMIT = 100
+RECENT_EMOTION_WINDOW = 5
+RECENT_MESSAGE_WINDOW = 12
+# Token budget of the raw recent_messages window; older messages are folded
+# into the session's RollingSummarizer (rolling_summarizer.py).
+RECENT_TOKEN_BUDGET = int(os.getenv("ELIANA_RECENT_TOKEN_BUDGET", "2000"))
+LAST_USER_MESSAGES = 5
+SPILL_DIR = os.getenv("ELIANA_SESSION_SPILL_DIR", "session_spill")
+
+# === SUMMARY SHAPE ===
+SUMMARY_FACTS = 10
+SUMMARY_TOP_EMOTIONS = 5
+SUMMARY_TRANSITIONS = 5
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _render_facts(facts: List[FactRecord]) -> Optional[str]:
+    if not facts:
+        return None
+    return "Important facts:\n" + "\n".join(f"- {r.fact}" for r in facts)
+
+
+def _render_emotions(title: str, sums: Dict[str, float], count: int) -> Optional[str]:
+    if not count or not sums:
+        return None
+    top = sorted(sums, key=lambda label: (-sums[label], label))[:SUMMARY_TOP_EMOTIONS]
+    return f"{title}: " + ", ".join(f"{label} ({sums[label] / count:.2f})" for label in top)
+
+
+def _render_transitions(transitions) -> Optional[str]:
+    if not transitions:
+        return None
+    return "Emotional transitions:\n" + "\n".join(f"- {t}" for t in list(transitions)[-SUMMARY_TRANSITIONS:])
+
+
+class _SummaryState:
     """
-    TEMPLATE CLASS — Public Version
-
-    Private Version:
-        A central session container that stores all conversational state:
-            - important facts
-            - full emotional memory (user & Eliana)
-            - recent emotions (rolling window)
-            - message history (full + truncated)
-            - psychological pattern traces
-            - core value & fragment resonance logs
-            - personality evolution trace
-            - internal emotional mood state
-            - per-session summary builders
-
-    Public Template:
-        Contains only attribute names and method signatures.
-        All operational logic is removed.
+    Section cache behind SessionMemory.build_summary.
+
+    Each section re-renders itself in O(k) from running aggregates:
+        facts       → the last SUMMARY_FACTS facts
+        emotions    → EmotionHistory totals + entry count (per source)
+        transitions → EmotionHistory.transitions of the user history
+
+    Section strings are cached and invalidated individually; the joined
+    summary is cached until any section changes.
     """
 
-    def __init__(self, system_prompt: str):
-        """
-        TEMPLATE INIT FUNCTION — Public Version
+    __slots__ = ("sections", "rendered")
 
-        Private Version:
-            Initializes all memory structures, emotional buffers,
-            summaries, timestamps, and trace systems.
+    SECTION_ORDER = ("facts", "user", "eliana", "transitions")
+
+    def __init__(self):
+        # section name → cached string (None = empty section), missing = dirty
+        self.sections: Dict[str, Optional[str]] = {}
+        self.rendered: Optional[str] = None
+
+    def invalidate(self, section: str) -> None:
+        self.sections.pop(section, None)
+        self.rendered = None
+
+
+class SessionMemory:
+    """
+    Central session container that stores all conversational state:
+        - important facts
+        - full emotional memory (user & Eliana)
+        - recent emotions (rolling window)
+        - message history (full + truncated)
+        - psychological pattern traces
+        - core value & fragment resonance logs
+        - personality evolution trace
+        - internal emotional mood state
+        - per-session summary builders
+
+    Storage is bounded: full-history fields are `BoundedLog` ring buffers
+    of slotted records (see session_records.py). Entries that fall out of
+    the in-memory window are appended to a per-session spill file and can
+    be read back with `BoundedLog.iter_all()`, so per-session memory stays
+    flat no matter how long the conversation runs.
+    """
 
-        Public Template:
-            Stores system_prompt only.
+    def __init__(
+        self,
+        system_prompt: str,
+        session_id: Optional[str] = None,
+        spill_dir: Optional[str] = SPILL_DIR,
+        history_limit: int = HISTORY_LIMIT,
+        summarizer: Optional[RollingSummarizer] = None,
+    ):
+        """
+        Initializes all memory structures, emotional buffers,
+        summaries, timestamps, and trace systems.
+
+        Args:
+            system_prompt: Root system prompt (soul protocol).
+            session_id: Identifier used for the spill file; random if omitted.
+            spill_dir: Directory for spill files. None disables spilling
+                       (evicted entries are then dropped).
+            history_limit: In-memory entries kept per full-history field.
+            summarizer: Receives messages folded out of the recent window.
+                        Defaults to a synchronous extractive RollingSummarizer;
+                        the runtime passes a background LLM-backed one.
         """
         self.system_prompt = system_prompt
+        self.session_id = session_id or uuid.uuid4().hex
+        self.spill = SessionSpill(
+            os.path.join(spill_dir, f"{self.session_id}.jsonl") if spill_dir else None
+        )
+
+        def log(field, record_type, limit=history_limit):
+            return BoundedLog(field, record_type, limit, self.spill)
 
-        # Attribute declarations (no logic)
-        self.important_facts: List[Dict[str, str]] = []
-        self.user_emotions: List[Dict[str, float]] = []
-        self.eliana_emotions: List[Dict[str, float]] = []
-        self.recent_user_emotions: List[Dict[str, float]] = []
-        self.recent_eliana_emotions: List[Dict[str, float]] = []
+        self.important_facts = log("important_facts", FactRecord, FACT_LIMIT)
+        self.user_emotions = log("user_emotions", EmotionRecord)
+        self.eliana_emotions = log("eliana_emotions", EmotionRecord)
+        # Columnar copies for vectorized window / EMA / trend queries.
+        self.user_history = EmotionHistory(transition_limit=SUMMARY_TRANSITIONS)
+        self.eliana_history = EmotionHistory(transition_limit=SUMMARY_TRANSITIONS)
 
         self.last_user_message: Optional[str] = None
-        self.last_user_messages: List[str] = []
+        self.last_user_messages: deque = deque(maxlen=LAST_USER_MESSAGES)
         self.last_eliana_reply: Optional[str] = None
 
-        self.psychological_patterns: List[Dict] = []
-        self.session_summary: List[Dict] = []
+        self.psychological_patterns = log("psychological_patterns", PatternRecord)
+        self.session_summary = log("session_summary", SummaryRecord)
 
-        self.core_value_resonance: List[Dict[str, float]] = []
-        self.core_fragment_resonance: List[Dict[str, float]] = []
+        self.core_value_resonance = log("core_value_resonance", ResonanceRecord)
+        self.core_fragment_resonance = log("core_fragment_resonance", ResonanceRecord)
 
-        self.recent_messages: List[Dict[str, str]] = []
-        self.full_chat: List[Dict[str, str]] = []
+        # Token-bounded chat window (tokens cached per MessageRecord) and the
+        # rolling hierarchical summary of messages folded out of it.
+        self._recent: deque = deque()
+        self.recent_tokens = 0
+        self.summarizer = summarizer or RollingSummarizer()
+        self.full_chat = log("full_chat", MessageRecord)
 
-        self.session_start_time = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        self.session_start_time = _utc_now()
         self.session_end_time: Optional[str] = None
 
-        self.personality_trace: List[Dict] = []
+        self.personality_trace = log("personality_trace", TraceRecord)
 
-        # Default mood placeholder
-        self.eliana_mood_state: tuple[float, str] = (
-            0.70,
-            "I feel happy — calm, comfortable, connected."
-        )
+        # Incrementally maintained summary (see build_summary).
+        self._summary = _SummaryState()
 
-    # === TEMPLATE METHODS ===
+        # Mutation journal hook: callable(op, args) installed by a
+        # SessionCheckpointer (session_checkpoint.py). None = not journaled.
+        self._journal = None
 
-    def store_important_fact(self, *args, **kwargs):
-        """TEMPLATE: Store a fact the model deemed emotionally or logically important."""
-        pass
+        # Per-session mood (immutable; replaced on each update, never shared)
+        self.mood = MoodState()
 
-    def store_emotion(self, *args, **kwargs):
-        """TEMPLATE: Store user or Eliana emotion entries."""
-        pass
+    # === FACTS & EMOTIONS ===
 
-    def add_user_message(self, *args, **kwargs):
-        """TEMPLATE: Store the latest user message."""
-        pass
+    def store_important_fact(self, fact: str, timestamp: Optional[str] = None):
+        """Store a fact the model deemed emotionally or logically important."""
+        timestamp = timestamp or _utc_now()
+        self._journal_op("store_important_fact", fact=fact, timestamp=timestamp)
+        self.important_facts.append(FactRecord(fact, timestamp))
+        self._summary.invalidate("facts")
 
-    def add_assistant_message(self, *args, **kwargs):
-        """TEMPLATE: Store Eliana's generated message."""
-        pass
+    def store_emotion(self, emotions: Dict[str, float], source: str = "user", timestamp: Optional[str] = None):
+        """
+        Store user or Eliana emotion entries.
 
-    def _trim_recent(self, *args, **kwargs):
-        """TEMPLATE: Maintain sliding window of recent chat messages."""
-        pass
+        Args:
+            emotions: label → weight (typically emotion_state["emotional_shift"]).
+            source: "user" for detected user emotions, "eliana" for her own.
+        """
+        timestamp = timestamp or _utc_now()
+        self._journal_op("store_emotion", emotions=emotions, source=source, timestamp=timestamp)
+        record = EmotionRecord(dict(emotions), timestamp)
+        if source == "eliana":
+            self.eliana_emotions.append(record)
+            self.eliana_history.append(record.emotions)
+            self._summary.invalidate("eliana")
+            self._update_mood()
+        else:
+            before = len(self.user_history.transitions), self.user_history.previous_dominant
+            self.user_emotions.append(record)
+            self.user_history.append(record.emotions)
+            self._summary.invalidate("user")
+            if (len(self.user_history.transitions), self.user_history.previous_dominant) != before:
+                self._summary.invalidate("transitions")
+
+    @property
+    def recent_user_emotions(self) -> List[EmotionRecord]:
+        """Last RECENT_EMOTION_WINDOW user emotion entries."""
+        return self.user_emotions[-RECENT_EMOTION_WINDOW:]
+
+    @property
+    def recent_eliana_emotions(self) -> List[EmotionRecord]:
+        """Last RECENT_EMOTION_WINDOW Eliana emotion entries."""
+        return self.eliana_emotions[-RECENT_EMOTION_WINDOW:]
+
+    def emotion_trends(self, window: int = RECENT_EMOTION_WINDOW, alpha: float = 0.5) -> Dict[str, Dict[str, Any]]:
+        """
+        Vectorized trend report for both sources (reflection metadata):
+            {"user": {"dominant", "recent_top", "ema_top", "transitions"},
+             "eliana": {...}}
+        """
+        return {
+            "user": self.user_history.trend(window, alpha),
+            "eliana": self.eliana_history.trend(window, alpha),
+        }
+
+    # === MESSAGES ===
+
+    def add_user_message(self, content: str, timestamp: Optional[str] = None):
+        """Store the latest user message."""
+        timestamp = timestamp or _utc_now()
+        self._journal_op("add_user_message", content=content, timestamp=timestamp)
+        record = MessageRecord("user", content, timestamp, count_message_tokens(content))
+        self.full_chat.append(record)
+        self._push_recent(record)
+        self.last_user_message = content
+        self.last_user_messages.append(content)
+
+    def add_assistant_message(self, content: str, timestamp: Optional[str] = None):
+        """Store Eliana's generated message."""
+        timestamp = timestamp or _utc_now()
+        self._journal_op("add_assistant_message", content=content, timestamp=timestamp)
+        record = MessageRecord("assistant", content, timestamp, count_message_tokens(content))
+        self.full_chat.append(record)
+        self._push_recent(record)
+        self.last_eliana_reply = content
+
+    @property
+    def recent_messages(self) -> MessageView:
+        """The recent chat window as a read-only list of {role, content} dicts."""
+        return MessageView(self._recent)
+
+    def _push_recent(self, record: MessageRecord):
+        self._recent.append(record)
+        self.recent_tokens += record.tokens
+        self._trim_recent()
+
+    def _trim_recent(self):
+        """
+        Maintain the sliding window of recent chat messages.
+
+        The window holds at most RECENT_MESSAGE_WINDOW messages and
+        RECENT_TOKEN_BUDGET tokens (the newest message is always kept).
+        Token counts are cached on the records, so each trim step is O(1).
+        Messages leaving the window are folded into the rolling summary,
+        not dropped.
+        """
+        while len(self._recent) > 1 and (
+            len(self._recent) > RECENT_MESSAGE_WINDOW or self.recent_tokens > RECENT_TOKEN_BUDGET
+        ):
+            record = self._recent.popleft()
+            self.recent_tokens -= record.tokens
+            self._fold(record)
+
+    def _fold(self, record: MessageRecord):
+        speaker = "User" if record.role == "user" else "Eliana"
+        self.summarizer.add(f"{speaker}: {record.content or ''}", record.tokens)
+
+    def folded_summary(self) -> Optional[str]:
+        """Fixed-size summary of chat that no longer fits the recent window."""
+        summary = self.summarizer.render()
+        if not summary:
+            return None
+        return "Earlier in this conversation (condensed):\n" + summary
+
+    def prompt_token_report(self) -> Dict[str, int]:
+        """
+        Prompt-size accounting for this turn (full_prompt_data["prompt_tokens"]):
+            recent_tokens   raw recent window
+            summary_tokens  rolling summary of folded messages
+            raw_tokens      what the folded messages would cost verbatim
+            saved_tokens    raw_tokens - summary_tokens
+        """
+        report = self.summarizer.report()
+        return {
+            "recent_tokens": self.recent_tokens,
+            "summary_tokens": report["summary_tokens"],
+            "raw_tokens": report["raw_tokens"],
+            "saved_tokens": report["saved_tokens"],
+            "folded_messages": report["folded_messages"],
+        }
+
+    # === RESONANCE, PATTERNS, TRACES ===
+
+    def _store_resonances(self, target: BoundedLog, kind: str, resonances: List[Dict], timestamp: str):
+        for item in resonances or []:
+            target.append(ResonanceRecord(
+                item.get("text"), item.get("score"), item.get("type", kind), item.get("metadata"), timestamp
+            ))
+
+    def store_core_value_resonance(self, resonances: List[Dict], timestamp: Optional[str] = None):
+        """Store resonance for core values (entries from get_top_resonances)."""
+        timestamp = timestamp or _utc_now()
+        self._journal_op("store_core_value_resonance", resonances=resonances, timestamp=timestamp)
+        self._store_resonances(self.core_value_resonance, "value", resonances, timestamp)
+
+    def store_core_fragment_resonance(self, resonances: List[Dict], timestamp: Optional[str] = None):
+        """Store resonance for core fragments (entries from get_top_resonances)."""
+        timestamp = timestamp or _utc_now()
+        self._journal_op("store_core_fragment_resonance", resonances=resonances, timestamp=timestamp)
+        self._store_resonances(self.core_fragment_resonance, "fragment", resonances, timestamp)
+
+    def store_psychological_patterns(self, matches: List[Dict], timestamp: Optional[str] = None):
+        """Store psychological pattern matches (entries from get_matching_patterns)."""
+        timestamp = timestamp or _utc_now()
+        self._journal_op("store_psychological_patterns", matches=matches, timestamp=timestamp)
+        for match in matches or []:
+            self.psychological_patterns.append(PatternRecord(
+                match.get("label"), match.get("score"), match.get("percent"), match.get("metadata"), timestamp
+            ))
+
+    def store_interaction_summary(self, summary: Dict[str, Any]):
+        """Store a summarize_interaction record."""
+        summary = dict(summary, timestamp=summary.get("timestamp") or _utc_now())
+        self._journal_op("store_interaction_summary", summary=summary)
+        self.session_summary.append(summary)
+
+    def store_personality_trace(self, trace: Dict[str, Any]):
+        """Store one per-turn personality trace entry."""
+        self._journal_op("store_personality_trace", trace=trace)
+        self.personality_trace.append(trace)
+
+    # === MOOD ===
+
+    def _update_mood(self):
+        """
+        Update internal mood from Eliana's latest emotion entry.
 
-    def store_core_value_resonance(self, *args, **kwargs):
-        """TEMPLATE: Store resonance for core values."""
-        pass
+        The whole weighted entry counts, not just its dominant label: the
+        mood delta is the dot product of the entry's row in eliana_history
+        with the compiled emotion_change_map.
+        """
+        if not self.eliana_emotions or not self.eliana_emotions[-1].emotions:
+            return
+        delta = self.eliana_history.project(get_compiled_change_map(), 1)[-1]
+        self.mood = self.mood.advance_by(float(delta))
 
-    def store_core_fragment_resonance(self, *args, **kwargs):
-        """TEMPLATE: Store resonance for core fragments."""
-        pass
+    @property
+    def eliana_mood_state(self) -> tuple:
+        """(emotional_value, mood_phrase) of this session's current mood."""
+        return self.mood.as_tuple()
 
-    def _update_mood(self, *args, **kwargs):
-        """TEMPLATE: Update internal mood based on recent emotions."""
-        pass
+    # === SUMMARY & PROMPT ===
 
     def build_summary(self) -> str:
         """
-        TEMPLATE: Build a structured summary of recent emotional + factual memory.
-
-        Private Version:
-            Produces formatted strings describing:
-                • important facts
-                • user emotions
-                • Eliana emotions
-                • emotional transitions
+        Build a structured summary of recent emotional + factual memory.
+
+        Produces formatted strings describing:
+            • important facts (most recent SUMMARY_FACTS)
+            • user emotions (top labels by mean weight over the session)
+            • Eliana emotions (same, for her own emotional record)
+            • emotional transitions (latest changes of the user's dominant emotion)
+
+        The summary is maintained incrementally: `store_emotion` and
+        `store_important_fact` update running aggregates and invalidate only
+        their own section, and the rendered string is cached between calls.
+        Cost per call is O(1) when nothing changed and O(k) otherwise,
+        independent of session length. The output is byte-identical to
+        `_build_summary_from_history()`.
+
+        Emotions and facts must be added through `store_emotion` /
+        `store_important_fact` (not by appending to the logs directly) for
+        the aggregates to see them.
+        """
+        state = self._summary
+        if state.rendered is not None:
+            return state.rendered
+
+        for section in state.SECTION_ORDER:
+            if section in state.sections:
+                continue
+            if section == "facts":
+                text = _render_facts(self.important_facts[-SUMMARY_FACTS:])
+            elif section == "transitions":
+                text = _render_transitions(self.user_history.transitions)
+            else:
+                title, history = (
+                    ("User emotions", self.user_history) if section == "user"
+                    else ("Eliana emotions", self.eliana_history)
+                )
+                text = _render_emotions(title, history.totals, history.count)
+            state.sections[section] = text
+
+        state.rendered = "\n\n".join(
+            state.sections[section] for section in state.SECTION_ORDER if state.sections[section]
+        )
+        return state.rendered
 
-        Public Template:
-            Returns an empty summary.
+    def _build_summary_from_history(self) -> str:
         """
-        return ""
+        Reference implementation of build_summary: recomputes every section
+        from the full history (spilled entries included). O(session length);
+        used to verify the incremental summary, not on the turn path.
+        """
+        sections = [_render_facts(self.important_facts[-SUMMARY_FACTS:])]
+
+        for title, history in (("User emotions", self.user_emotions), ("Eliana emotions", self.eliana_emotions)):
+            sums: Dict[str, float] = {}
+            count = 0
+            for record in history.iter_all():
+                count += 1
+                for label, weight in record.emotions.items():
+                    sums[label] = sums.get(label, 0.0) + weight
+            sections.append(_render_emotions(title, sums, count))
+
+        transitions = []
+        previous = None
+        for record in self.user_emotions.iter_all():
+            current = dominant_label(record.emotions)
+            if current and previous and current != previous:
+                transitions.append(f"{previous} → {current}")
+            previous = current or previous
+        sections.append(_render_transitions(transitions))
+
+        return "\n\n".join(section for section in sections if section)
 
     def build_prompt(self) -> List[Dict[str, str]]:
         """
-        TEMPLATE: Produce the system + truncated chat context for the LLM.
-
-        Private Version:
-            Builds:
-                [{role: system, content: system_prompt}, recent_messages...]
-
-        Public Template:
-            Returns system prompt only.
+        Produce the system + token-bounded chat context for the LLM:
+            [{role: system, content: system_prompt},
+             {role: system, content: rolling summary}   (once messages were folded)
+             recent_messages...]
         """
-        return [{"role": "system", "content": self.system_prompt}]
+        messages = [{"role": "system", "content": self.system_prompt}]
+        folded = self.folded_summary()
+        if folded:
+            messages.append({"role": "system", "content": folded})
+        return messages + list(self.recent_messages)
 
     def get_personality_trace(self) -> List[Dict]:
-        """TEMPLATE: Retrieve personality trace records."""
-        return []
+        """Retrieve personality trace records for the whole session (spilled included)."""
+        return self.personality_trace.to_dicts(full_history=True)
+
+    def update_recent_history(self, user_message: Optional[str] = None, eliana_reply: Optional[str] = None):
+        """Update references to the last messages."""
+        self._journal_op("update_recent_history", user_message=user_message, eliana_reply=eliana_reply)
+        if user_message is not None:
+            self.last_user_message = user_message
+            self.last_user_messages.append(user_message)
+        if eliana_reply is not None:
+            self.last_eliana_reply = eliana_reply
+
+    def close(self):
+        """Mark the session as ended and release the spill file handle."""
+        self.session_end_time = _utc_now()
+        self._journal_op("_set_end_time", session_end_time=self.session_end_time)
+        self.spill.close()
+
+    # === PERSISTENCE (see session_checkpoint.py) ===
+
+    # Mutators recorded in the journal; replay calls them with the same args.
+    JOURNALED_OPS = frozenset({
+        "store_important_fact",
+        "store_emotion",
+        "add_user_message",
+        "add_assistant_message",
+        "store_core_value_resonance",
+        "store_core_fragment_resonance",
+        "store_psychological_patterns",
+        "store_interaction_summary",
+        "store_personality_trace",
+        "update_recent_history",
+        "_set_end_time",
+    })
+
+    _LOG_FIELDS = (
+        "important_facts",
+        "user_emotions",
+        "eliana_emotions",
+        "psychological_patterns",
+        "session_summary",
+        "core_value_resonance",
+        "core_fragment_resonance",
+        "full_chat",
+        "personality_trace",
+    )
+
+    def _journal_op(self, op: str, **args):
+        if self._journal is not None:
+            self._journal(op, args)
+
+    def _set_end_time(self, session_end_time: str):
+        self.session_end_time = session_end_time
+
+    def apply_journal_op(self, op: str, args: Dict[str, Any]):
+        """Re-apply one journaled mutation (without journaling it again)."""
+        if op not in self.JOURNALED_OPS:
+            raise ValueError(f"Unknown journal op: {op}")
+        journal, self._journal = self._journal, None
+        try:
+            getattr(self, op)(**args)
+        finally:
+            self._journal = journal
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        Complete, JSON-serializable state of this session.
 
-    def update_recent_history(self, *args, **kwargs):
-        """TEMPLATE: Update references to the last messages."""
-        pass
\ No newline at end of file
+        In-memory records are included verbatim; spilled history is
+        referenced by spill path + byte length, not copied.
+        """
+        return {
+            "session_id": self.session_id,
+            "system_prompt": self.system_prompt,
+            "history_limit": self.full_chat.maxlen,
+            "session_start_time": self.session_start_time,
+            "session_end_time": self.session_end_time,
+            "mood": self.mood._asdict(),
+            "last_user_message": self.last_user_message,
+            "last_user_messages": list(self.last_user_messages),
+            "last_eliana_reply": self.last_eliana_reply,
+            "logs": {field: getattr(self, field).state() for field in self._LOG_FIELDS},
+            "user_history": self.user_history.state(),
+            "eliana_history": self.eliana_history.state(),
+            "recent_messages": [r.to_dict() for r in self._recent],
+            "summarizer": self.summarizer.state(),
+            "spill": self.spill.state(),
+        }
+
+    @classmethod
+    def from_state(
+        cls,
+        state: Dict[str, Any],
+        spill_dir: Optional[str] = None,
+        summarizer: Optional[RollingSummarizer] = None,
+    ) -> "SessionMemory":
+        """
+        Rebuild a SessionMemory from `to_state()` output.
+
+        Args:
+            spill_dir: Where the session's spill file lives on this worker.
+                       Defaults to the directory recorded in the state.
+            summarizer: Summarizer to restore the rolling summary into
+                        (same default as __init__).
+        """
+        spill_path = state["spill"]["path"]
+        if spill_dir is None and spill_path:
+            spill_dir = os.path.dirname(spill_path)
+        memory = cls(
+            state["system_prompt"],
+            session_id=state["session_id"],
+            spill_dir=spill_dir if spill_path else None,
+            history_limit=state["history_limit"],
+            summarizer=summarizer,
+        )
+        memory.spill.load_state(state["spill"])
+        memory.session_start_time = state["session_start_time"]
+        memory.session_end_time = state["session_end_time"]
+        memory.mood = MoodState(**state["mood"])
+        memory.last_user_message = state["last_user_message"]
+        memory.last_user_messages.extend(state["last_user_messages"])
+        memory.last_eliana_reply = state["last_eliana_reply"]
+        for field in cls._LOG_FIELDS:
+            getattr(memory, field).load_state(state["logs"][field])
+        memory.user_history.load_state(state["user_history"])
+        memory.eliana_history.load_state(state["eliana_history"])
+        memory._recent.extend(MessageRecord.from_dict(d) for d in state["recent_messages"])
+        memory.recent_tokens = sum(record.tokens for record in memory._recent)
+        memory.summarizer.load_state(state["summarizer"])
+        return memory
@@ -0,0 +1,369 @@
+"""
+===============================================================================
+    session_records.py
+    ---------------------------------------------------------------------------
+    Compact record types and bounded, spilling logs for SessionMemory.
+===============================================================================
+
+SessionMemory used to keep every per-turn entry as a dict inside an
+ever-growing list, so memory per session grew without limit in long
+conversations. This module provides the storage pieces that keep it flat:
+
+-------------------------------------------------------------------------------
+1. RECORD TYPES (__slots__)
+-------------------------------------------------------------------------------
+• One small class per entry kind, with `__slots__` instead of a per-entry
+  dict: MessageRecord, EmotionRecord, FactRecord, ResonanceRecord,
+  PatternRecord, SummaryRecord, TraceRecord.
+• `to_dict()` / `from_dict()` convert to and from the historical dict shape,
+  and records answer `record["key"]`, `record.get(key)` and `key in
+  record` like those dicts, so callers that still read or append dicts
+  keep working.
+• `MessageView` shows a window of MessageRecords as the historical list of
+  {role, content} dicts (SessionMemory.recent_messages).
+• Keys a record type does not declare (written by a newer or older
+  schema) are kept in the record's `extra` slot and written back out by
+  `to_dict()`, so a spill/checkpoint round trip never drops data.
+
+-------------------------------------------------------------------------------
+2. BOUNDED LOGS (ring buffers)
+-------------------------------------------------------------------------------
+• `BoundedLog` is a deque with a fixed `maxlen` holding the newest records.
+• When a record is evicted it is written to the session's spill file
+  instead of being dropped.
+• `iter_all()` replays spilled + in-memory records in order, so full-history
+  readers (personality fragments, summaries) still see everything.
+
+-------------------------------------------------------------------------------
+3. SPILL FILE (append-only, per session)
+-------------------------------------------------------------------------------
+• `SessionSpill` appends one JSON line per evicted record:
+      {"f": "<field>", "d": {...record...}}
+• The file is created lazily on first eviction, so short sessions never
+  touch disk.
+• Reads stream the file line by line; nothing is loaded in full.
+• A session restored where its spill file does not exist (another host,
+  lost volume) reads its spilled history as empty and logs the loss once.
+
+===============================================================================
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+from collections.abc import Sequence
+from typing import Any, Deque, Dict, Iterator, List, Optional, Type
+
+logger = logging.getLogger(__name__)
+
+
+# === RECORD TYPES ===
+class Record:
+    """Base for slotted session records; subclasses only declare __slots__."""
+
+    # Undeclared keys from from_dict(), preserved for to_dict().
+    __slots__ = ("extra",)
+
+    def __init__(self, *args, **kwargs):
+        for name, value in zip(self.__slots__, args):
+            setattr(self, name, value)
+        for name in self.__slots__[len(args):]:
+            setattr(self, name, kwargs.get(name))
+        self.extra = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if self.extra:
+            data.update((key, value) for key, value in self.extra.items() if key not in data)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        record = cls(**{name: data.get(name) for name in cls.__slots__})
+        unknown = {key: value for key, value in data.items() if key not in cls.__slots__}
+        if unknown:
+            record.extra = unknown
+        return record
+
+    # --- Dict compatibility ---
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self.__slots__:
+            setattr(self, key, value)
+        else:
+            self.extra = dict(self.extra or {}, **{key: value})
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ or bool(self.extra and key in self.extra)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items())
+        return f"{type(self).__name__}({fields})"
+
+
+class MessageRecord(Record):
+    """One chat message. `tokens` is cached at insert time (see token windows)."""
+    __slots__ = ("role", "content", "timestamp", "tokens")
+
+    def as_message(self) -> Dict[str, str]:
+        """The {role, content} shape expected by the chat API."""
+        return {"role": self.role, "content": self.content}
+
+
+class MessageView(Sequence):
+    """
+    Read-only list view of MessageRecords as {role, content} dicts:
+    len(), iteration, indexing and slicing, without copying the window.
+    """
+
+    __slots__ = ("_records",)
+
+    def __init__(self, records):
+        self._records = records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [record.as_message() for record in list(self._records)[index]]
+        return self._records[index].as_message()
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return (record.as_message() for record in self._records)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other) if isinstance(other, (list, Sequence)) else NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MessageView({list(self)!r})"
+
+
+class EmotionRecord(Record):
+    """Weighted emotions detected (user) or felt (Eliana) on one turn."""
+    __slots__ = ("emotions", "timestamp")
+
+
+class FactRecord(Record):
+    __slots__ = ("fact", "timestamp")
+
+
+class ResonanceRecord(Record):
+    """One resonant core value or core fragment on one turn."""
+    __slots__ = ("text", "score", "type", "metadata", "timestamp")
+
+
+class PatternRecord(Record):
+    """One matched psychological pattern on one turn."""
+    __slots__ = ("label", "score", "percent", "metadata", "timestamp")
+
+
+class SummaryRecord(Record):
+    """Output of summarize_interaction for one exchange."""
+    __slots__ = ("user_text", "eliana_text", "eliana_reflection", "meta", "timestamp")
+
+
+class TraceRecord(Record):
+    """Per-turn personality trace entry (see handle_user_input)."""
+    __slots__ = (
+        "timestamp",
+        "user_input",
+        "eliana_response",
+        "core_value_resonances",
+        "core_fragment_resonances",
+        "psychological_pattern_resonances",
+        "user_emotions",
+        "eliana_internal_effects",
+    )
+
+
+# === SPILL FILE ===
+class SessionSpill:
+    """
+    Append-only JSONL file holding records evicted from bounded logs.
+
+    One file per session. Writes are serialized by a lock and flushed per
+    record, so a crash loses at most the record being written.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._fh = None
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        # Bytes written so far; lets a restored session cut the file back
+        # to its checkpointed length before replaying (see session_checkpoint).
+        self.size = 0
+        self._missing_logged = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def append(self, field: str, data: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        line = (json.dumps({"f": field, "d": data}, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            if self._fh is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._fh = open(self.path, "ab")
+            self._fh.write(line)
+            self._fh.flush()
+            self.size += len(line)
+            self.counts[field] = self.counts.get(field, 0) + 1
+
+    def read(self, field: str) -> Iterator[Dict[str, Any]]:
+        """Stream spilled records of one field, oldest first."""
+        if not self.enabled or not self.counts.get(field):
+            return
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            if not self._missing_logged:
+                self._missing_logged = True
+                logger.warning("Spill file %s is missing; %d spilled records of this session are lost",
+                               self.path, sum(self.counts.values()))
+            return
+        with f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["f"] == field:
+                    yield entry["d"]
+
+    def read_bytes(self) -> bytes:
+        """The spill file's contents up to the recorded size (b"" if none)."""
+        if not self.enabled or not self.size:
+            return b""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+        try:
+            with open(self.path, "rb") as f:
+                return f.read(self.size)
+        except FileNotFoundError:
+            return b""
+
+    def restore(self, payload: bytes) -> None:
+        """Replace the spill file with `payload` (spilled history carried by a migration blob)."""
+        self.close()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "wb") as f:
+            f.write(payload)
+        self._missing_logged = False
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def state(self) -> Dict[str, Any]:
+        return {"path": self.path, "size": self.size, "counts": dict(self.counts)}
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """
+        Adopt a checkpointed spill position, truncating anything written
+        after the checkpoint (it is regenerated when the journal replays).
+        """
+        self.close()
+        self.size = state["size"]
+        self.counts = dict(state["counts"])
+        if self.enabled and os.path.exists(self.path) and os.path.getsize(self.path) > self.size:
+            with open(self.path, "r+b") as f:
+                f.truncate(self.size)
+
+
+# === BOUNDED LOG ===
+class BoundedLog:
+    """
+    Ring buffer of records that spills evicted entries to a SessionSpill.
+
+    Behaves like a read-mostly list of the newest `maxlen` records:
+    iteration, len(), indexing and slicing cover in-memory records only;
+    `iter_all()` / `total` cover the full history.
+    """
+
+    __slots__ = ("field", "record_type", "spill", "_items", "total")
+
+    def __init__(self, field: str, record_type: Type[Record], maxlen: int, spill: Optional[SessionSpill] = None):
+        self.field = field
+        self.record_type = record_type
+        self.spill = spill
+        self._items: Deque[Record] = deque(maxlen=maxlen)
+        self.total = 0
+
+    @property
+    def maxlen(self) -> int:
+        return self._items.maxlen
+
+    def append(self, item: Any) -> Record:
+        record = item if isinstance(item, self.record_type) else self.record_type.from_dict(item)
+        if len(self._items) == self._items.maxlen and self.spill is not None:
+            self.spill.append(self.field, self._items[0].to_dict())
+        self._items.append(record)
+        self.total += 1
+        return record
+
+    def extend(self, items) -> None:
+        for item in items:
+            self.append(item)
+
+    def __iter__(self) -> Iterator[Record]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._items)[index]
+        return self._items[index]
+
+    def iter_all(self) -> Iterator[Record]:
+        """Full history: spilled records (from disk) followed by in-memory ones."""
+        if self.spill is not None:
+            for data in self.spill.read(self.field):
+                yield self.record_type.from_dict(data)
+        yield from self._items
+
+    def to_dicts(self, full_history: bool = False) -> List[Dict[str, Any]]:
+        records = self.iter_all() if full_history else self._items
+        return [record.to_dict() for record in records]
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def state(self) -> Dict[str, Any]:
+        return {"items": self.to_dicts(), "total": self.total}
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        self._items.clear()
+        self._items.extend(self.record_type.from_dict(d) for d in state["items"])
+        self.total = state["total"]
@@ -0,0 +1,228 @@
+"""
+=====================================================================
+Session Registry — Per-Session State for Concurrent Serving
+=====================================================================
+
+Purpose
+-------
+One process may serve many sessions at once (API threads), and sessions
+may move between processes. Everything that belongs to a session — chat
+window, emotion history, rolling summary and its MoodState — lives in
+its SessionMemory, and the registry maps session ids to those objects.
+
+    • No shared mutable mood: each session advances its own immutable
+      MoodState by swapping a reference, so turns of different sessions
+      never contend on a lock.
+    • The registry lock only guards the maps; `get()` of a live session
+      is a plain dict read. Resuming reads the checkpoint outside it,
+      serialized per session, so one slow resume never stalls others.
+    • With a checkpoint directory, sessions are journaled
+      (session_checkpoint.py): a session missing from this process is
+      resumed from disk on first access, mood included, so any worker
+      can pick it up.
+    • Ownership: while a process holds a session it holds the session's
+      WAL lock (utils.file_lock on "<id>.wal", non-blocking). Another
+      process asking for it gets SessionBusy instead of a second copy
+      journaling into the same WAL; `release()` or `close()` hands it on.
+
+Usage
+-----
+    registry = SessionRegistry(checkpoint_dir="session_checkpoints")
+    memory = registry.create(SOUL_PROTOCOL)          # new session
+    memory = registry.get(session_id)                # live or resumed
+    ... handle_user_input(..., session_memory=memory) ...
+    registry.end_turn(session_id)                    # compaction point
+    registry.close(session_id)
+
+=====================================================================
+"""
+
+import logging
+import os
+import threading
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterator, Optional
+
+from eliana_mood import MoodState
+from rolling_summarizer import RollingSummarizer
+from session_checkpoint import CheckpointError, SessionCheckpointer
+from session_memory import SessionMemory
+from utils import file_lock
+
+logger = logging.getLogger(__name__)
+
+
+class SessionBusy(Exception):
+    """The session is owned (its WAL locked) by another process or registry."""
+
+
+class SessionRegistry:
+    """
+    In-process map of session id → SessionMemory (+ its checkpointer).
+
+    Parameters
+    ----------
+    checkpoint_dir : str, optional
+        Enables snapshot + WAL persistence of every session. None keeps
+        sessions in memory only.
+
+    summarizer_factory : callable, optional
+        Returns the RollingSummarizer for a new or resumed session.
+    """
+
+    def __init__(
+        self,
+        checkpoint_dir: Optional[str] = None,
+        summarizer_factory: Optional[Callable[[], RollingSummarizer]] = None,
+        **session_kwargs,
+    ):
+        self.checkpoint_dir = checkpoint_dir
+        self.summarizer_factory = summarizer_factory or RollingSummarizer
+        self.session_kwargs = session_kwargs
+        self._sessions: Dict[str, SessionMemory] = {}
+        self._checkpointers: Dict[str, SessionCheckpointer] = {}
+        self._owned: Dict[str, ExitStack] = {}
+        self._resuming: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._sessions))
+
+    # --- Ownership ---
+    def _claim(self, session_id: str) -> ExitStack:
+        """Lock the session's WAL for as long as this registry owns it."""
+        _, wal_path = SessionCheckpointer.paths(self.checkpoint_dir, session_id)
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        ownership = ExitStack()
+        try:
+            ownership.enter_context(file_lock(wal_path, blocking=False))
+        except BlockingIOError:
+            raise SessionBusy(f"Session {session_id} is owned elsewhere") from None
+        return ownership
+
+    def _drop(self, session_id: str):
+        with self._lock:
+            memory = self._sessions.pop(session_id, None)
+            checkpointer = self._checkpointers.pop(session_id, None)
+            ownership = self._owned.pop(session_id, None)
+        return memory, checkpointer, ownership
+
+    # --- Lifecycle ---
+    def create(self, system_prompt: str, session_id: Optional[str] = None) -> SessionMemory:
+        """Start a new session (journaled when checkpointing is enabled)."""
+        memory = SessionMemory(
+            system_prompt,
+            session_id=session_id,
+            summarizer=self.summarizer_factory(),
+            **self.session_kwargs,
+        )
+        if memory.session_id in self._sessions:
+            raise ValueError(f"Session {memory.session_id} already exists")
+        ownership = self._claim(memory.session_id) if self.checkpoint_dir else None
+        try:
+            checkpointer = SessionCheckpointer(memory, self.checkpoint_dir).attach() if ownership else None
+            with self._lock:
+                if memory.session_id in self._sessions:
+                    raise ValueError(f"Session {memory.session_id} already exists")
+                if ownership is not None:
+                    self._checkpointers[memory.session_id] = checkpointer
+                    self._owned[memory.session_id] = ownership
+                self._sessions[memory.session_id] = memory
+        except BaseException:
+            if ownership is not None:
+                ownership.close()
+            raise
+        return memory
+
+    def get(self, session_id: str) -> Optional[SessionMemory]:
+        """
+        Live session, or the session resumed from its checkpoint.
+        Returns None if it is unknown here and on disk; raises SessionBusy
+        if another process owns it.
+        """
+        memory = self._sessions.get(session_id)
+        if memory is not None or not self.checkpoint_dir:
+            return memory
+        with self._lock:
+            resuming = self._resuming.setdefault(session_id, threading.Lock())
+        with resuming:
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                try:
+                    memory = self._resume(session_id)
+                finally:
+                    with self._lock:
+                        if self._resuming.get(session_id) is resuming:
+                            del self._resuming[session_id]
+        return memory
+
+    def _resume(self, session_id: str) -> Optional[SessionMemory]:
+        snapshot_path, _ = SessionCheckpointer.paths(self.checkpoint_dir, session_id)
+        if not os.path.exists(snapshot_path):
+            return None
+        ownership = self._claim(session_id)
+        try:
+            checkpointer = SessionCheckpointer.resume(
+                session_id,
+                self.checkpoint_dir,
+                summarizer=self.summarizer_factory(),
+            )
+        except CheckpointError:
+            ownership.close()
+            logger.exception("Could not resume session %s", session_id)
+            return None
+        except BaseException:
+            ownership.close()
+            raise
+        with self._lock:
+            self._checkpointers[session_id] = checkpointer
+            self._owned[session_id] = ownership
+            self._sessions[session_id] = checkpointer.session
+        return checkpointer.session
+
+    def end_turn(self, session_id: str) -> None:
+        """Call after each turn: compacts the session's WAL when due."""
+        checkpointer = self._checkpointers.get(session_id)
+        if checkpointer is not None:
+            checkpointer.maybe_compact()
+
+    def close(self, session_id: str) -> None:
+        """End a session: final checkpoint, spill file released, dropped from the registry."""
+        memory, checkpointer, ownership = self._drop(session_id)
+        try:
+            if memory is None:
+                return
+            memory.close()
+            if checkpointer is not None:
+                checkpointer.close()
+        finally:
+            if ownership is not None:
+                ownership.close()
+
+    def release(self, session_id: str) -> None:
+        """
+        Drop a session from this process without ending it (e.g. before
+        another worker takes it over); its checkpoint stays resumable.
+        """
+        _, checkpointer, ownership = self._drop(session_id)
+        try:
+            if checkpointer is not None:
+                checkpointer.close()
+        finally:
+            if ownership is not None:
+                ownership.close()
+
+    # --- Mood ---
+    def mood(self, session_id: str) -> Optional[MoodState]:
+        memory = self.get(session_id)
+        return memory.mood if memory is not None else None
+
+
+# Process-wide default used by the CLI/API runtime.
+session_registry = SessionRegistry()
@@ -0,0 +1,299 @@
+"""
+=====================================================================
+Static Data Loader — Lazy, Parallel Startup for Eliana's Static Banks
+=====================================================================
+
+Purpose
+-------
+`load_static_data()` used to read every static bank in sequence before
+the CLI could greet the user. This module replaces that with:
+
+    • a declarative table of banks (file, loader, dependencies),
+    • a threaded preloader that reads independent banks concurrently,
+    • lazy loading on first access for banks a turn may never need,
+    • per-bank timings so cold-start latency can be tracked.
+
+Banks
+-----
+    core_embeddings     ← core_embeddings.json          (resonance_engine)
+    emotion_anchors     ← emotion_anchors.json          (raw nested taxonomy)
+    flat_anchors        ← flatten_emotions(emotion_anchors)
+    emotion_embeddings  ← eliana_emotion_embeddings.json
+    emotion_map         ← emotion_map.json
+    psych_models        ← embedded_psych_models.json
+    major_emotions      ← embedded_eliana_major_emotions.json
+
+`flat_anchors` only feeds the GPT emotional fallback, so it is lazy by
+default; every other bank is touched on a normal turn and is preloaded.
+
+Usage
+-----
+    static_data = StaticData()
+    static_data.preload()                  # DEFAULT_PRELOAD, in parallel
+    static_data["flat_anchors"]            # loads on first access
+    static_data.startup_report()           # timings for metrics/logging
+
+`StaticData` is a read-only Mapping, so existing code written against the
+plain dict returned by `load_static_data()` keeps working unchanged.
+
+Concurrency Notes
+-----------------
+JSON parsing holds the GIL, so the speedup comes from overlapping file
+I/O and the NumPy conversions inside the loaders. Each bank has its own
+lock: concurrent first accesses to the same bank load it exactly once,
+and accesses to different banks never block each other.
+=====================================================================
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from eliana_soul import config
+from utils import load_json
+
+logger = logging.getLogger(__name__)
+
+
+# === BANK LOADERS ===
+# Loader modules are imported inside each function so that importing this
+# module (e.g. from tooling) does not pull in the OpenAI/NumPy stack.
+def _load_core_embeddings(path: str, deps: Dict[str, Any]):
+    from resonance_engine import load_core_embeddings
+    return load_core_embeddings(path)
+
+
+def _load_json_bank(path: str, deps: Dict[str, Any]):
+    return load_json(path)
+
+
+def _flatten_anchors(path: Optional[str], deps: Dict[str, Any]):
+    from Eliana_Heart import flatten_emotions
+    return flatten_emotions(deps["emotion_anchors"])
+
+
+def _load_emotion_embeddings(path: str, deps: Dict[str, Any]):
+    from Eliana_Heart import load_embeddings
+    return load_embeddings(path)
+
+
+def _load_emotion_map(path: str, deps: Dict[str, Any]):
+    from Eliana_Heart import load_emotion_map
+    return load_emotion_map(path)
+
+
+def _load_psych_models(path: str, deps: Dict[str, Any]):
+    from psychology_engine import load_embedded_patterns
+    return load_embedded_patterns(path)
+
+
+# === BANK TABLE ===
+class BankSpec(NamedTuple):
+    """Declarative description of one static bank."""
+    filename: Optional[str]
+    loader: Callable[[Optional[str], Dict[str, Any]], Any]
+    deps: Tuple[str, ...] = ()
+
+
+BANK_SPECS: Dict[str, BankSpec] = {
+    "core_memory": BankSpec(config.CORE_MEMORY_FILE, _load_json_bank),
+    "core_embeddings": BankSpec(config.CORE_EMBEDDINGS_FILE, _load_core_embeddings),
+    "emotion_anchors": BankSpec(config.EMOTION_ANCHORS_FILE, _load_json_bank),
+    "flat_anchors": BankSpec(None, _flatten_anchors, ("emotion_anchors",)),
+    "emotion_embeddings": BankSpec(config.EMOTION_EMBEDDINGS_FILE, _load_emotion_embeddings),
+    "emotion_map": BankSpec(config.EMOTION_MAP_FILE, _load_emotion_map),
+    "psych_models": BankSpec(config.PSYCH_MODELS_FILE, _load_psych_models),
+    "major_emotions": BankSpec(config.MAJOR_EMOTIONS_FILE, _load_json_bank),
+}
+
+# Keys exposed to the turn pipeline (the historical load_static_data dict).
+PUBLIC_BANKS = (
+    "core_memory",
+    "core_embeddings",
+    "flat_anchors",
+    "emotion_embeddings",
+    "emotion_map",
+    "psych_models",
+    "major_emotions",
+)
+ALL_BANKS = tuple(BANK_SPECS)
+
+# Banks every normal turn touches. flat_anchors is only needed by the GPT
+# fallback and is left to load on first access.
+DEFAULT_PRELOAD = (
+    "core_embeddings",
+    "emotion_embeddings",
+    "emotion_map",
+    "psych_models",
+    "major_emotions",
+)
+
+
+def record_static_bank_version(full_prompt_data: Dict[str, Any], static_data: "StaticData") -> None:
+    """Write the bank-set version a turn ran on into its full_prompt_data."""
+    full_prompt_data["static_bank_version"] = static_data.version
+
+
+# === STATIC DATA CONTAINER ===
+class StaticData(Mapping):
+    """
+    Read-only mapping of static banks with lazy, thread-safe loading.
+
+    Attributes:
+        timings: bank name → {"ms": load time, "thread": loader thread name,
+                 "lazy": True if loaded on first access rather than preload}
+        version: bank-set version, bumped by StaticBankReloader on each swap
+    """
+
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        specs: Optional[Dict[str, BankSpec]] = None,
+        public_banks: Iterable[str] = PUBLIC_BANKS,
+    ):
+        self.data_dir = data_dir
+        self.specs = dict(specs or BANK_SPECS)
+        self.public_banks = tuple(public_banks)
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self.preload_ms: Optional[float] = None
+        self._created = time.perf_counter()
+        self._values: Dict[str, Any] = {}
+        self._locks = {name: threading.Lock() for name in self.specs}
+        self._preloading = False
+        self.snapshot_path: Optional[str] = None
+        self.snapshot = None
+        # Bank-set version; incremented by hot_reload on every swap.
+        self.version = 0
+
+    # --- Mapping interface ---
+    def __getitem__(self, name: str) -> Any:
+        if name in self._values:
+            return self._values[name]
+        if name not in self.specs:
+            raise KeyError(name)
+        return self._load(name, lazy=not self._preloading)
+
+    def __iter__(self):
+        return iter(self.public_banks)
+
+    def __len__(self) -> int:
+        return len(self.public_banks)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._values
+
+    def seed(self, name: str, value: Any) -> None:
+        """
+        Install an already-built bank (e.g. from a runtime snapshot).
+
+        Seeded names need not appear in the bank table; this is how
+        derived structures such as embedding matrices are exposed.
+        """
+        self._values[name] = value
+        self.timings.setdefault(name, {"ms": 0.0, "thread": threading.current_thread().name, "lazy": False})
+
+    # --- Loading ---
+    def path_for(self, name: str) -> Optional[str]:
+        filename = self.specs[name].filename
+        return config.data_path(filename, self.data_dir) if filename else None
+
+    def _load(self, name: str, lazy: bool) -> Any:
+        with self._locks[name]:
+            if name in self._values:
+                return self._values[name]
+            spec = self.specs[name]
+            deps = {dep: self[dep] for dep in spec.deps}
+
+            start = time.perf_counter()
+            value = spec.loader(self.path_for(name), deps)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            self.timings[name] = {
+                "ms": round(elapsed_ms, 2),
+                "thread": threading.current_thread().name,
+                "lazy": lazy,
+            }
+            if lazy:
+                logger.info("Static bank '%s' loaded lazily in %.1f ms", name, elapsed_ms)
+            self._values[name] = value
+            return value
+
+    def preload(self, names: Iterable[str] = DEFAULT_PRELOAD, max_workers: Optional[int] = None) -> "StaticData":
+        """
+        Load `names` (and their dependencies) concurrently.
+
+        Banks are scheduled as soon as all their dependencies are loaded, so
+        independent files are read in parallel while dependent banks (e.g.
+        flat_anchors → emotion_anchors) still see a fully loaded input.
+        Loader exceptions propagate to the caller.
+        """
+        pending = self._with_dependencies(names)
+        pending = {name for name in pending if name not in self._values}
+        if not pending:
+            self.preload_ms = self.preload_ms or 0.0
+            return self
+
+        start = time.perf_counter()
+        self._preloading = True
+        try:
+            with ThreadPoolExecutor(
+                max_workers=max_workers or len(pending),
+                thread_name_prefix="static-loader",
+            ) as pool:
+                running = {}
+                while pending or running:
+                    ready = [
+                        name for name in pending
+                        if all(dep in self._values for dep in self.specs[name].deps)
+                    ]
+                    for name in ready:
+                        pending.discard(name)
+                        running[pool.submit(self._load, name, False)] = name
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        running.pop(future)
+                        future.result()
+        finally:
+            self._preloading = False
+        self.preload_ms = round((time.perf_counter() - start) * 1000, 2)
+        return self
+
+    def _with_dependencies(self, names: Iterable[str]) -> set:
+        resolved = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name not in self.specs:
+                raise KeyError(f"Unknown static bank: {name}")
+            if name not in resolved:
+                resolved.add(name)
+                stack.extend(self.specs[name].deps)
+        return resolved
+
+    # --- Metrics ---
+    def startup_report(self) -> Dict[str, Any]:
+        """
+        Cold-start metrics for logging/monitoring.
+
+        Returns:
+            {
+                "preload_ms": wall time of the parallel preload,
+                "serial_ms": sum of per-bank load times (what a sequential
+                             loader would have cost),
+                "since_created_ms": time since this container was created,
+                "banks": {name: {"ms", "thread", "lazy"}},
+                "pending": banks not loaded yet
+            }
+        """
+        return {
+            "preload_ms": self.preload_ms,
+            "serial_ms": round(sum(t["ms"] for t in self.timings.values()), 2),
+            "since_created_ms": round((time.perf_counter() - self._created) * 1000, 2),
+            "banks": dict(self.timings),
+            "pending": [name for name in self.specs if name not in self._values],
+            "snapshot": self.snapshot_path,
+            "version": self.version,
+        }
@@ -0,0 +1,155 @@
+"""
+===============================================================================
+    storage_stress.py
+    ---------------------------------------------------------------------------
+    Lost-update stress harness for the shared stores.
+===============================================================================
+
+Starts N writer processes that hammer one shared store concurrently and
+then checks that every single update survived. Used to validate the
+locking / atomic-replace / version-check paths in utils.py and
+relationship_store.py after changes, and on new filesystems (NFS and some
+container volumes handle flock differently).
+
+-------------------------------------------------------------------------------
+TARGETS
+-------------------------------------------------------------------------------
+    json            utils.update_json, synchronous
+    json-deferred   utils.update_json(defer=True) — write-behind with replay
+    rel-sqlite      RelationshipTracker.apply_score_delta on relationships.db
+    rel-json        RelationshipTracker.apply_score_delta on relationships.json
+
+Each writer performs `--updates` increments; JSON targets also append a
+unique marker per update. The run fails (exit code 1) if any increment or
+marker is missing.
+
+Usage
+-----
+    python storage_stress.py --target json --writers 8 --updates 200
+    python storage_stress.py --target all
+===============================================================================
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+TARGETS = ("json", "json-deferred", "rel-sqlite", "rel-json")
+
+
+# === WRITERS ===
+def _json_writer(path: str, writer: int, updates: int, defer: bool) -> None:
+    from utils import json_writer, update_json
+
+    def bump(data: Dict, marker: str) -> Dict:
+        data["count"] = data.get("count", 0) + 1
+        data.setdefault("markers", []).append(marker)
+        return data
+
+    for i in range(updates):
+        marker = f"{writer}:{i}"
+        update_json(path, lambda data, m=marker: bump(data, m), default={}, defer=defer)
+    json_writer.close()
+
+
+def _relationship_writer(path: str, writer: int, updates: int) -> None:
+    from relationship_tracker import RelationshipTracker
+
+    tracker = RelationshipTracker(path, legacy_json="")
+    for _ in range(updates):
+        tracker.apply_score_delta("shared_user", 0.01)
+        tracker.apply_score_delta(f"writer_{writer}", 0.01)
+    tracker.close()
+
+
+def _run_writer(target: str, path: str, writer: int, updates: int) -> None:
+    if target in ("json", "json-deferred"):
+        _json_writer(path, writer, updates, defer=target == "json-deferred")
+    else:
+        _relationship_writer(path, writer, updates)
+
+
+# === CHECKS ===
+def _check(target: str, path: str, writers: int, updates: int) -> List[str]:
+    problems = []
+    expected = writers * updates
+    if target in ("json", "json-deferred"):
+        from utils import load_json
+
+        data = load_json(path, default={})
+        if data.get("count") != expected:
+            problems.append(f"count {data.get('count')} != {expected}")
+        markers = set(data.get("markers", []))
+        missing = expected - len(markers)
+        if missing:
+            problems.append(f"{missing} markers missing")
+    else:
+        from relationship_tracker import RelationshipTracker
+
+        tracker = RelationshipTracker(path, legacy_json="")
+        # Scores are small and recent: no decay applies.
+        shared = tracker.get_score("shared_user")
+        if abs(shared - expected * 0.01) > 1e-6:
+            problems.append(f"shared score {shared:.4f} != {expected * 0.01:.4f}")
+        for writer in range(writers):
+            score = tracker.get_score(f"writer_{writer}")
+            if abs(score - updates * 0.01) > 1e-6:
+                problems.append(f"writer_{writer} score {score:.4f} != {updates * 0.01:.4f}")
+        tracker.close()
+    return problems
+
+
+def run(target: str, writers: int, updates: int, directory: Optional[str] = None) -> List[str]:
+    """
+    Run one target; returns a list of problems (empty = no lost updates).
+
+    Without `directory` the run uses a fresh temporary directory and removes
+    it afterwards; a caller-supplied directory is left in place.
+    """
+    owned = directory is None
+    if owned:
+        directory = tempfile.mkdtemp(prefix="eliana-stress-")
+    name = {"json": "store.json", "json-deferred": "store.json", "rel-sqlite": "relationships.db",
+            "rel-json": "relationships.json"}[target]
+    path = os.path.join(directory, name)
+
+    ctx = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    procs = [ctx.Process(target=_run_writer, args=(target, path, w, updates)) for w in range(writers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    elapsed = time.perf_counter() - start
+
+    problems = [f"writer exited with {proc.exitcode}" for proc in procs if proc.exitcode]
+    problems += _check(target, path, writers, updates)
+    status = "OK" if not problems else "LOST UPDATES"
+    print(f"{target:14s} {writers} writers × {updates} updates  {elapsed:6.2f}s  {status}")
+    for problem in problems:
+        print(f"    {problem}")
+    if owned:
+        shutil.rmtree(directory, ignore_errors=True)
+    return problems
+
+
+# === ENTRY POINT ===
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent-writer stress test for shared stores.")
+    parser.add_argument("--target", choices=TARGETS + ("all",), default="all")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--updates", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    targets = TARGETS if args.target == "all" else (args.target,)
+    failed = [target for target in targets if run(target, args.writers, args.updates)]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
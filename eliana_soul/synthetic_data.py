@@ -0,0 +1,573 @@
+"""
+=====================================================================
+Synthetic Data Generator — Schema-Correct Banks for Scaling Tests
+=====================================================================
+
+Purpose
+-------
+The real static banks behind Eliana (core memory, emotion anchors,
+emotion_map, psychological models, major emotions) and the long-term
+user stores are private. This module emits *synthetic* versions of every
+one of them, with the exact same shapes the runtime expects, so that
+performance work (benchmarks, the load harness, startup profiling) can
+be reproduced by anyone without access to proprietary content.
+
+Generated Files
+---------------
+Static banks (everything `load_static_data` reads):
+    • core_memory.json                    — core values + core fragments
+    • core_embeddings.json                — embedded value/fragment records
+    • emotion_anchors.json                — nested emotion taxonomy
+    • eliana_emotion_embeddings.json      — token → embedding vector
+    • emotion_map.json                    — token → emotional effects
+    • embedded_psych_models.json          — embedded psychological models
+    • embedded_eliana_major_emotions.json — embedded major emotions
+
+Long-term user stores:
+    • relationships.json                  — per-user trust records
+    • user_personality_fragments.json     — per-user fragment lists
+    • user_soul_sketches.json             — per-user sketch lists
+    • user_soul_picture.json              — per-user soul picture
+
+Determinism
+-----------
+Every embedding is derived from `(seed, bank, index)` alone, so:
+    • the same seed (and `--now` for the user stores) always produces
+      byte-identical files,
+    • any single record can be regenerated without generating the rest,
+    • scaling a bank up keeps the vectors of the smaller bank unchanged.
+
+Scale
+-----
+All files are written as streams; nothing is materialized in full.
+Generating millions of anchors or users is bounded by disk, not memory.
+Use a smaller `--dim` when only structure (not vector math) matters.
+
+Usage
+-----
+    python synthetic_data.py --out synthetic_banks --anchors 100000 \\
+        --users 50000 --seed 7 --dim 1536
+
+=====================================================================
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# === DEFAULT SCALE ===
+DEFAULT_SEED = 7
+DEFAULT_DIM = 1536
+DEFAULT_ANCHORS = 1429
+DEFAULT_USERS = 1000
+DEFAULT_CORE_VALUES = 120
+DEFAULT_CORE_FRAGMENTS = 240
+DEFAULT_PSYCH_MODELS = 110
+DEFAULT_MAJOR_EMOTIONS = 48
+
+# Fragments/sketches cycle every 5 entries in the personality engine.
+CONSOLIDATION_CYCLE = 5
+
+# === OUTPUT FILE NAMES ===
+"""
+File names match the names the runtime reads, so a generated directory
+can be dropped in place of the private data directory.
+"""
+STATIC_BANK_FILES = {
+    "core_memory": "core_memory.json",
+    "core_embeddings": "core_embeddings.json",
+    "emotion_anchors": "emotion_anchors.json",
+    "emotion_embeddings": "eliana_emotion_embeddings.json",
+    "emotion_map": "emotion_map.json",
+    "psych_models": "embedded_psych_models.json",
+    "major_emotions": "embedded_eliana_major_emotions.json",
+}
+USER_STORE_FILES = {
+    "relationships": "relationships.json",
+    "fragments": "user_personality_fragments.json",
+    "sketches": "user_soul_sketches.json",
+    "pictures": "user_soul_picture.json",
+}
+
+# Stable bank identifiers used to derive per-record random streams.
+_BANK_IDS = {
+    "core_value": 1,
+    "core_fragment": 2,
+    "emotion": 3,
+    "psych": 4,
+    "major": 5,
+    "user": 6,
+}
+
+# === VOCABULARY ===
+EMOTION_FAMILIES = [
+    "grief", "hope", "shame", "longing", "joy", "fear", "anger", "awe",
+    "tenderness", "loneliness", "guilt", "relief", "devotion", "envy",
+    "gratitude", "dread", "calm", "confusion", "pride", "yearning_for_god",
+]
+NUANCES = [
+    "quiet", "flickering", "sharp", "distant", "heavy", "restless", "still",
+    "tender", "buried", "raw", "soft", "burning", "fragile", "steady",
+]
+BEHAVIOR_TAGS = [
+    "soft", "slow_paced", "gentle", "direct", "grounding", "curious",
+    "hesitant", "warm", "protective", "reflective", "playful", "steady",
+]
+INTERNAL_TAGS = [
+    "heavy", "withdrawn", "open", "melancholic", "lifted", "tense",
+    "settled", "aching", "clear", "bright", "guarded", "tender",
+]
+PSYCH_THEMES = [
+    "abandonment_sensitivity", "avoidant_withdrawal", "grief_cycle",
+    "rumination", "high_functioning_depression", "emotional_shutdown",
+    "grief_anchored_resistance", "displaced_pain", "search_for_self",
+]
+WORDS = [
+    "trust", "silence", "home", "mercy", "distance", "courage", "memory",
+    "honesty", "loyalty", "growth", "patience", "forgiveness", "light",
+    "burden", "promise", "return", "discomfort", "truth", "warmth", "road",
+]
+
+
+# === DETERMINISTIC EMBEDDINGS ===
+def _rng(seed: int, bank: str, index: int) -> np.random.Generator:
+    """Random stream that depends only on (seed, bank, index)."""
+    return np.random.default_rng([seed, _BANK_IDS[bank], index])
+
+
+def synthetic_embedding(seed: int, bank: str, index: int, dim: int) -> List[float]:
+    """
+    Produce a deterministic, unit-normalized embedding vector.
+
+    Vectors are rounded to 6 decimals so JSON output stays compact and
+    byte-stable across platforms.
+    """
+    vec = _rng(seed, bank, index).standard_normal(dim).astype(np.float32)
+    vec /= np.linalg.norm(vec) or 1.0
+    return [round(float(x), 6) for x in vec]
+
+
+def _phrase(rng: np.random.Generator, n_words: int) -> str:
+    """Short pseudo-sentence assembled from the synthetic vocabulary."""
+    picks = rng.choice(len(WORDS), size=n_words)
+    return " ".join(WORDS[i] for i in picks)
+
+
+def _timestamp(rng: np.random.Generator, now: float, max_age_days: int) -> float:
+    """Epoch timestamp within the last `max_age_days` days."""
+    return round(now - float(rng.uniform(0, max_age_days * 86400)), 3)
+
+
+def _readable(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+# === STREAMING JSON WRITERS ===
+def _write_json_list(path: str, items: Iterable) -> int:
+    """Stream an iterable of JSON-serializable items as a JSON array."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for item in items:
+            f.write(",\n" if count else "\n")
+            f.write(json.dumps(item, ensure_ascii=False))
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+def _write_json_dict(path: str, pairs: Iterable[Tuple[str, object]]) -> int:
+    """Stream (key, value) pairs as a JSON object."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for key, value in pairs:
+            f.write(",\n" if count else "\n")
+            f.write(json.dumps(key, ensure_ascii=False))
+            f.write(": ")
+            f.write(json.dumps(value, ensure_ascii=False))
+            count += 1
+        f.write("\n}\n")
+    return count
+
+
+# === EMOTION TAXONOMY ===
+def emotion_token(index: int) -> Tuple[str, str]:
+    """
+    Map an anchor index to a (family, nuance) pair.
+
+    Tokens beyond the natural family × nuance grid get a numeric suffix,
+    keeping every token unique at any scale.
+    """
+    family = EMOTION_FAMILIES[index % len(EMOTION_FAMILIES)]
+    slot = index // len(EMOTION_FAMILIES)
+    nuance = NUANCES[slot % len(NUANCES)]
+    cycle = slot // len(NUANCES)
+    if cycle:
+        nuance = f"{nuance}_{cycle}"
+    return family, nuance
+
+
+def _iter_emotion_tokens(n_anchors: int) -> Iterator[Tuple[int, str, str]]:
+    for i in range(n_anchors):
+        family, nuance = emotion_token(i)
+        yield i, family, nuance
+
+
+def _anchor_description(seed: int, index: int) -> str:
+    rng = _rng(seed, "emotion", index)
+    rng.standard_normal(1)  # decorrelate from the embedding stream
+    return f"a {NUANCES[int(rng.integers(len(NUANCES)))]} feeling of {_phrase(rng, 3)}"
+
+
+def _emotion_effects(seed: int, index: int, family: str) -> Dict[str, List[str]]:
+    rng = np.random.default_rng([seed, _BANK_IDS["emotion"], index, 1])
+    secondary = EMOTION_FAMILIES[int(rng.integers(len(EMOTION_FAMILIES)))]
+    shift = [family] if secondary == family else [family, secondary]
+    return {
+        "emotional_shift": shift,
+        "behavior_tendencies": sorted({BEHAVIOR_TAGS[int(i)] for i in rng.choice(len(BEHAVIOR_TAGS), 2)}),
+        "internal_effect": sorted({INTERNAL_TAGS[int(i)] for i in rng.choice(len(INTERNAL_TAGS), 2)}),
+    }
+
+
+def write_emotion_anchors(out_dir: str, seed: int, n_anchors: int) -> int:
+    """
+    Write the nested emotion taxonomy: {family: {nuance: description}}.
+
+    Families are written one at a time so memory stays bounded by the
+    largest family rather than the whole taxonomy.
+    """
+    path = os.path.join(out_dir, STATIC_BANK_FILES["emotion_anchors"])
+    n_families = min(n_anchors, len(EMOTION_FAMILIES))
+
+    def families():
+        for f_idx in range(n_families):
+            family = EMOTION_FAMILIES[f_idx]
+            nuances = {}
+            for i in range(f_idx, n_anchors, len(EMOTION_FAMILIES)):
+                _, nuance = emotion_token(i)
+                nuances[nuance] = _anchor_description(seed, i)
+            yield family, nuances
+
+    _write_json_dict(path, families())
+    return n_anchors
+
+
+def write_emotion_embeddings(out_dir: str, seed: int, n_anchors: int, dim: int) -> int:
+    """Write token → embedding for every flattened anchor."""
+    path = os.path.join(out_dir, STATIC_BANK_FILES["emotion_embeddings"])
+    return _write_json_dict(path, (
+        (f"{family}:{nuance}", synthetic_embedding(seed, "emotion", i, dim))
+        for i, family, nuance in _iter_emotion_tokens(n_anchors)
+    ))
+
+
+def write_emotion_map(out_dir: str, seed: int, n_anchors: int) -> int:
+    """Write token → {emotional_shift, behavior_tendencies, internal_effect}."""
+    path = os.path.join(out_dir, STATIC_BANK_FILES["emotion_map"])
+    return _write_json_dict(path, (
+        (f"{family}:{nuance}", _emotion_effects(seed, i, family))
+        for i, family, nuance in _iter_emotion_tokens(n_anchors)
+    ))
+
+
+# === CORE MEMORY ===
+def _core_value(seed: int, index: int) -> Dict[str, str]:
+    rng = np.random.default_rng([seed, _BANK_IDS["core_value"], index, 1])
+    return {
+        "anchor": f"{_phrase(rng, 4).capitalize()} ({index})",
+        "principle": _phrase(rng, 8),
+        "lesson": _phrase(rng, 10),
+    }
+
+
+def _core_fragment(seed: int, index: int) -> Dict[str, str]:
+    rng = np.random.default_rng([seed, _BANK_IDS["core_fragment"], index, 1])
+    return {
+        "summary": f"{_phrase(rng, 10).capitalize()} ({index})",
+        "reason_for_love": _phrase(rng, 8),
+        "emotional_lesson": _phrase(rng, 8),
+    }
+
+
+def write_core_memory(out_dir: str, seed: int, n_values: int, n_fragments: int) -> int:
+    """Write core_memory.json with `core_values` and `core_fragments`."""
+    path = os.path.join(out_dir, STATIC_BANK_FILES["core_memory"])
+    _write_json_dict(path, [
+        ("core_values", [_core_value(seed, i) for i in range(n_values)]),
+        ("core_fragments", [_core_fragment(seed, i) for i in range(n_fragments)]),
+    ])
+    return n_values + n_fragments
+
+
+def write_core_embeddings(out_dir: str, seed: int, n_values: int, n_fragments: int, dim: int) -> int:
+    """Write embedded value/fragment records matching `load_core_embeddings`."""
+    path = os.path.join(out_dir, STATIC_BANK_FILES["core_embeddings"])
+
+    def records():
+        for i in range(n_values):
+            meta = _core_value(seed, i)
+            yield {"type": "value", "text": meta["anchor"], "metadata": meta,
+                   "embedding": synthetic_embedding(seed, "core_value", i, dim)}
+        for i in range(n_fragments):
+            meta = _core_fragment(seed, i)
+            yield {"type": "fragment", "text": meta["summary"], "metadata": meta,
+                   "embedding": synthetic_embedding(seed, "core_fragment", i, dim)}
+
+    return _write_json_list(path, records())
+
+
+# === PSYCH MODELS & MAJOR EMOTIONS ===
+def write_psych_models(out_dir: str, seed: int, n_models: int, dim: int) -> int:
+    """Write embedded psychological models: {label, embedding, metadata}."""
+    path = os.path.join(out_dir, STATIC_BANK_FILES["psych_models"])
+
+    def models():
+        for i in range(n_models):
+            rng = np.random.default_rng([seed, _BANK_IDS["psych"], i, 1])
+            yield {
+                "label": f"{PSYCH_THEMES[i % len(PSYCH_THEMES)]}_{i}",
+                "embedding": synthetic_embedding(seed, "psych", i, dim),
+                "metadata": {
+                    "description": _phrase(rng, 12),
+                    "root_cause": _phrase(rng, 8),
+                    "therapist_fix": _phrase(rng, 8),
+                    "eliana_assistance": _phrase(rng, 8),
+                },
+            }
+
+    return _write_json_list(path, models())
+
+
+def write_major_emotions(out_dir: str, seed: int, n_major: int, dim: int) -> int:
+    """Write major emotions used by `get_emotion_context_from_input`."""
+    path = os.path.join(out_dir, STATIC_BANK_FILES["major_emotions"])
+
+    def entries():
+        for i in range(n_major):
+            rng = np.random.default_rng([seed, _BANK_IDS["major"], i, 1])
+            family = EMOTION_FAMILIES[i % len(EMOTION_FAMILIES)]
+            label = family if i < len(EMOTION_FAMILIES) else f"{family}_{i}"
+            yield {
+                "label": label,
+                "embedding": synthetic_embedding(seed, "major", i, dim),
+                "metadata": {
+                    "name": label,
+                    "eliana_emotion": INTERNAL_TAGS[int(rng.integers(len(INTERNAL_TAGS)))],
+                    "eliana_trait": BEHAVIOR_TAGS[int(rng.integers(len(BEHAVIOR_TAGS)))],
+                    "associated_memory": _phrase(rng, 6),
+                },
+            }
+
+    return _write_json_list(path, entries())
+
+
+# === USER STORES ===
+def user_id_for(index: int) -> str:
+    return f"user_{index:08d}"
+
+
+def _user_profile(seed: int, index: int, now: float) -> Dict:
+    """
+    Per-user shape: relationship record plus how many fragments/sketches
+    the user has accumulated. Counts are skewed so most users are shallow
+    and a long tail is deep — the realistic case for consolidation work.
+    """
+    rng = _rng(seed, "user", index)
+    sessions = int(min(rng.pareto(1.2) * 3, 60))
+    return {
+        "name": f"Synthetic {index}",
+        "score": round(float(np.clip(sessions * 2.5 + rng.normal(0, 5), 0, 100)), 2),
+        "last_updated": _timestamp(rng, now, 90),
+        "sessions": sessions,
+        "rng": rng,
+    }
+
+
+def _fragment(rng: np.random.Generator, user_id: str, ts: float) -> Dict:
+    return {
+        "timestamp": ts,
+        "readable_time": _readable(ts),
+        "user_id": user_id,
+        "personality_snapshot": _phrase(rng, 12),
+        "eliana_emotional_understanding": _phrase(rng, 12),
+        "session_and_story": _phrase(rng, 20),
+        "relationship_score": int(rng.integers(-10, 11)),
+        "reason_for_score": _phrase(rng, 6),
+    }
+
+
+def _sketch(rng: np.random.Generator, user_id: str, ts: float) -> Dict:
+    return {
+        "timestamp": ts,
+        "readable_time": _readable(ts),
+        "user_id": user_id,
+        "soul_sketch": _phrase(rng, 24),
+        "user_story_summary": _phrase(rng, 24),
+    }
+
+
+def _iter_user_layers(seed: int, n_users: int, now: float) -> Iterator[Tuple[str, Dict, List, List, Optional[Dict]]]:
+    """
+    Yield (user_id, relationship, fragments, sketches, picture) per user.
+
+    Mirrors the consolidation cycle: every 5 fragments become a sketch
+    (fragments reset), every 5 sketches produce a picture.
+    """
+    for i in range(n_users):
+        uid = user_id_for(i)
+        profile = _user_profile(seed, i, now)
+        rng = profile.pop("rng")
+        sessions = profile.pop("sessions")
+
+        n_sketches = sessions // CONSOLIDATION_CYCLE
+        n_fragments = sessions % CONSOLIDATION_CYCLE
+        ts = profile["last_updated"]
+
+        fragments = [_fragment(rng, uid, ts - k * 86400) for k in range(n_fragments)][::-1]
+        sketches = [_sketch(rng, uid, ts - k * 5 * 86400) for k in range(n_sketches)][::-1]
+        picture = None
+        if n_sketches >= CONSOLIDATION_CYCLE:
+            picture = {
+                "timestamp": ts,
+                "readable_time": _readable(ts),
+                "user_id": uid,
+                "soul_picture": _phrase(rng, 40),
+                "user_story_summary": _phrase(rng, 80),
+                "eliana_final_reflection": _phrase(rng, 30),
+            }
+        yield uid, profile, fragments, sketches, picture
+
+
+def write_user_stores(out_dir: str, seed: int, n_users: int, now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Write relationships, fragments, sketches and pictures for `n_users`.
+
+    Each file is produced by its own streaming pass over the user
+    generator; regenerating is cheaper than holding millions of users
+    in memory to write four files at once.
+    """
+    now = time.time() if now is None else now
+    counts = {}
+
+    counts["relationships"] = _write_json_dict(
+        os.path.join(out_dir, USER_STORE_FILES["relationships"]),
+        ((uid, rel) for uid, rel, _, _, _ in _iter_user_layers(seed, n_users, now)),
+    )
+    counts["fragments"] = _write_json_dict(
+        os.path.join(out_dir, USER_STORE_FILES["fragments"]),
+        ((uid, frags) for uid, _, frags, _, _ in _iter_user_layers(seed, n_users, now) if frags),
+    )
+    counts["sketches"] = _write_json_dict(
+        os.path.join(out_dir, USER_STORE_FILES["sketches"]),
+        ((uid, sk) for uid, _, _, sk, _ in _iter_user_layers(seed, n_users, now) if sk),
+    )
+    counts["pictures"] = _write_json_dict(
+        os.path.join(out_dir, USER_STORE_FILES["pictures"]),
+        ((uid, pic) for uid, _, _, _, pic in _iter_user_layers(seed, n_users, now) if pic),
+    )
+    return counts
+
+
+# === ENTRY POINT ===
+def generate_all(
+    out_dir: str,
+    seed: int = DEFAULT_SEED,
+    dim: int = DEFAULT_DIM,
+    n_anchors: int = DEFAULT_ANCHORS,
+    n_users: int = DEFAULT_USERS,
+    n_core_values: int = DEFAULT_CORE_VALUES,
+    n_core_fragments: int = DEFAULT_CORE_FRAGMENTS,
+    n_psych_models: int = DEFAULT_PSYCH_MODELS,
+    n_major_emotions: int = DEFAULT_MAJOR_EMOTIONS,
+    include_users: bool = True,
+    now: Optional[float] = None,
+) -> Dict[str, int]:
+    """
+    Generate every static bank and (optionally) every user store.
+
+    Returns
+    -------
+    dict
+        Record counts per generated file, plus elapsed seconds under
+        "elapsed_seconds". Parameters and counts are also written to
+        `manifest.json` in `out_dir` so benchmark results can be tied back
+        to the exact generation run.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    now = time.time() if now is None else now
+    start = time.perf_counter()
+
+    counts = {
+        "core_memory": write_core_memory(out_dir, seed, n_core_values, n_core_fragments),
+        "core_embeddings": write_core_embeddings(out_dir, seed, n_core_values, n_core_fragments, dim),
+        "emotion_anchors": write_emotion_anchors(out_dir, seed, n_anchors),
+        "emotion_embeddings": write_emotion_embeddings(out_dir, seed, n_anchors, dim),
+        "emotion_map": write_emotion_map(out_dir, seed, n_anchors),
+        "psych_models": write_psych_models(out_dir, seed, n_psych_models, dim),
+        "major_emotions": write_major_emotions(out_dir, seed, n_major_emotions, dim),
+    }
+    if include_users:
+        counts.update(write_user_stores(out_dir, seed, n_users, now=now))
+
+    elapsed = round(time.perf_counter() - start, 3)
+
+    manifest = {
+        "seed": seed,
+        "dim": dim,
+        "anchors": n_anchors,
+        "users": n_users if include_users else 0,
+        "core_values": n_core_values,
+        "core_fragments": n_core_fragments,
+        "psych_models": n_psych_models,
+        "major_emotions": n_major_emotions,
+        "now": now,
+        "counts": counts,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    counts["elapsed_seconds"] = elapsed
+    return counts
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Eliana data banks for scaling tests.")
+    parser.add_argument("--out", default="synthetic_banks", help="Output directory.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="Embedding dimension.")
+    parser.add_argument("--anchors", type=int, default=DEFAULT_ANCHORS, help="Number of emotion anchors.")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS, help="Number of synthetic users.")
+    parser.add_argument("--core-values", type=int, default=DEFAULT_CORE_VALUES)
+    parser.add_argument("--core-fragments", type=int, default=DEFAULT_CORE_FRAGMENTS)
+    parser.add_argument("--psych-models", type=int, default=DEFAULT_PSYCH_MODELS)
+    parser.add_argument("--major-emotions", type=int, default=DEFAULT_MAJOR_EMOTIONS)
+    parser.add_argument("--now", type=float, default=None,
+                        help="Reference epoch for user timestamps (default: current time).")
+    parser.add_argument("--static-only", action="store_true", help="Skip relationship and personality stores.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    result = generate_all(
+        args.out,
+        seed=args.seed,
+        dim=args.dim,
+        n_anchors=args.anchors,
+        n_users=args.users,
+        n_core_values=args.core_values,
+        n_core_fragments=args.core_fragments,
+        n_psych_models=args.psych_models,
+        n_major_emotions=args.major_emotions,
+        include_users=not args.static_only,
+        now=args.now,
+    )
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,69 @@
+"""
+===============================================================================
+    token_budget.py
+    ---------------------------------------------------------------------------
+    Token counting for prompt budgeting.
+===============================================================================
+
+Prompt sections (recent chat, summaries, personality context) are sized in
+tokens, not characters. Counting is done once per piece of text — when a
+message is stored or a section is rendered — and the count is cached
+alongside it, so windows can be trimmed without re-tokenizing.
+
+• If `tiktoken` is installed, counts are exact for TOKENIZER_ENCODING.
+• Otherwise a ~4-characters-per-token heuristic is used. It is close for
+  English prose, and conservative enough for budgeting purposes.
+
+The encoder is loaded lazily on first use; importing this module costs
+nothing.
+===============================================================================
+"""
+
+import math
+import os
+import threading
+from typing import Optional
+
+TOKENIZER_ENCODING = os.getenv("ELIANA_TOKENIZER_ENCODING", "cl100k_base")
+CHARS_PER_TOKEN = 4
+# Per-message framing overhead of the chat format (role + separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoder = None
+_encoder_loaded = False
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        with _encoder_lock:
+            if not _encoder_loaded:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception:
+                    # Not installed, or the encoding file cannot be fetched.
+                    _encoder = None
+                _encoder_loaded = True
+    return _encoder
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Token count of `text` (exact with tiktoken, heuristic otherwise)."""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_message_tokens(content: Optional[str]) -> int:
+    """Tokens one chat message costs in a prompt, framing included."""
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def tokenizer_name() -> str:
+    """Which counter is active, for metrics/logging."""
+    return TOKENIZER_ENCODING if _get_encoder() is not None else f"heuristic(len/{CHARS_PER_TOKEN})"
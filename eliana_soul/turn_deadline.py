@@ -0,0 +1,230 @@
+"""
+=====================================================================
+Turn Deadlines — Per-Turn Budget with Per-Stage Timeouts
+=====================================================================
+
+Purpose
+-------
+No stage of `handle_user_input` carried a timeout, so one slow embedding
+or fallback call could stall a turn indefinitely. A `TurnDeadline` is
+created when a turn starts and passed through every subsystem call:
+
+    • each optional stage gets its own budget and a defined fallback,
+    • a stage may never eat into the time reserved for the reply,
+    • the reply call receives whatever time remains,
+    • the turn reports which stages were cut and why.
+
+Optional Stages & Fallbacks
+---------------------------
+    fragment_resonance      → []      (no resonant core fragments)
+    psych_matching          → []      (no psychological pattern matches)
+    major_emotion_context   → None    (neutral resonance section)
+    gpt_emotion_fallback    → []      (no emotional tokens)
+    gpt_emotion_interpretation → empty emotional state
+
+A stage that times out is cancelled. If it had not started yet (all pool
+workers busy) it never runs; if it had, it keeps running on its worker
+thread (Python cannot cancel a thread) and its result is discarded. Either
+way the turn continues with the fallback immediately. Stages that were
+already running when cut are marked `"abandoned": true` and counted in the
+report, since each one still holds a pool worker. Exceptions in optional
+stages are treated the same way — an optional stage never fails the turn.
+
+Nested Calls
+------------
+Inside `deadline.activate()` (and inside every stage run by
+`run_stage`), `current_deadline()` returns the active deadline, so deep
+helpers such as the embedding call can size their own HTTP timeout
+without threading a parameter through every signature.
+
+Reporting
+---------
+`deadline.record(full_prompt_data)` stores:
+
+    full_prompt_data["deadline"] = {
+        "budget_ms": 20000, "elapsed_ms": 8123.4, "remaining_ms": 11876.6,
+        "stages": {"psych_matching": {"ms": 1500.0, "status": "timeout", "abandoned": True}, ...},
+        "cut": ["psych_matching"],
+        "abandoned": 1
+    }
+
+=====================================================================
+"""
+
+import contextvars
+import copy
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TURN_BUDGET = 20.0     # seconds for the whole turn
+DEFAULT_REPLY_RESERVE = 8.0    # seconds always kept back for the reply call
+MIN_REPLY_TIMEOUT = 2.0        # never give the reply call less than this
+
+# Per-stage budgets in seconds.
+DEFAULT_STAGE_BUDGETS: Dict[str, float] = {
+    "core_resonance": 2.0,
+    "fragment_resonance": 1.5,
+    "emotion_resonance": 2.0,
+    "psych_matching": 1.5,
+    "major_emotion_context": 1.5,
+    "gpt_emotion_fallback": 4.0,
+    "gpt_emotion_interpretation": 4.0,
+}
+
+EMPTY_EMOTION_STATE = {"emotional_shift": {}, "behavior_tendencies": [], "internal_effect": []}
+
+# Defined results for each optional stage when it runs out of time.
+STAGE_FALLBACKS: Dict[str, Callable[[], Any]] = {
+    "fragment_resonance": list,
+    "psych_matching": list,
+    "major_emotion_context": lambda: None,
+    "gpt_emotion_fallback": list,
+    "gpt_emotion_interpretation": lambda: copy.deepcopy(EMPTY_EMOTION_STATE),
+}
+
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+STATUS_SKIPPED = "skipped"
+
+# Sentinel: "no explicit fallback given, use STAGE_FALLBACKS".
+_MISSING = object()
+
+# Shared pool for stage execution. Sized for several concurrent turns;
+# timed-out stages that are still running occupy a worker until they end.
+_stage_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="turn-stage")
+_current: contextvars.ContextVar[Optional["TurnDeadline"]] = contextvars.ContextVar("turn_deadline", default=None)
+
+
+def current_deadline() -> Optional["TurnDeadline"]:
+    """Deadline of the turn running on this thread/context, if any."""
+    return _current.get()
+
+
+class TurnDeadline:
+    """
+    Time budget for a single turn.
+
+    Parameters
+    ----------
+    budget : float
+        Total seconds for the turn, reply included.
+
+    reply_reserve : float
+        Seconds that optional stages may never consume.
+
+    stage_budgets : dict, optional
+        Overrides for DEFAULT_STAGE_BUDGETS.
+    """
+
+    def __init__(
+        self,
+        budget: float = DEFAULT_TURN_BUDGET,
+        reply_reserve: float = DEFAULT_REPLY_RESERVE,
+        stage_budgets: Optional[Dict[str, float]] = None,
+    ):
+        self.budget = budget
+        self.reply_reserve = min(reply_reserve, budget)
+        self.stage_budgets = dict(DEFAULT_STAGE_BUDGETS, **(stage_budgets or {}))
+        self.started = time.monotonic()
+        self.expires = self.started + budget
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    # --- Clock ---
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def stage_timeout(self, name: str, budget: Optional[float] = None) -> float:
+        """Time a stage may use: its own budget, capped by what the reply leaves."""
+        allowed = budget if budget is not None else self.stage_budgets.get(name, self.remaining())
+        return max(0.0, min(allowed, self.remaining() - self.reply_reserve))
+
+    def reply_timeout(self) -> float:
+        """Timeout for the final reply call: all remaining time, with a floor."""
+        return max(MIN_REPLY_TIMEOUT, self.remaining())
+
+    # --- Stages ---
+    @contextmanager
+    def activate(self):
+        """Make this deadline visible to nested calls via current_deadline()."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def _fallback(self, name: str, fallback: Any) -> Any:
+        if fallback is not _MISSING:
+            return fallback() if callable(fallback) else fallback
+        factory = STAGE_FALLBACKS.get(name)
+        return factory() if factory else None
+
+    def run_stage(self, name: str, fn: Callable, *args, fallback: Any = _MISSING, budget: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` under the stage's budget.
+
+        Returns the stage result, or the stage fallback (explicit
+        `fallback`, else STAGE_FALLBACKS[name]) if the stage times out,
+        raises, or has no time left at all.
+        """
+        timeout = self.stage_timeout(name, budget)
+        start = time.monotonic()
+
+        if timeout <= 0:
+            self.stages[name] = {"ms": 0.0, "status": STATUS_SKIPPED}
+            return self._fallback(name, fallback)
+
+        ctx = contextvars.copy_context()
+        ctx.run(_current.set, self)
+        future = _stage_pool.submit(ctx.run, fn, *args, **kwargs)
+        try:
+            result = future.result(timeout=timeout)
+            status = STATUS_OK
+        except FutureTimeoutError:
+            result, status = self._fallback(name, fallback), STATUS_TIMEOUT
+        except Exception:
+            logger.exception("Stage '%s' failed; using fallback", name)
+            result, status = self._fallback(name, fallback), STATUS_ERROR
+
+        self.stages[name] = {"ms": round((time.monotonic() - start) * 1000, 1), "status": status}
+        # cancel() only succeeds for a stage still queued behind busy workers;
+        # one that already started runs on, holding its worker.
+        if status == STATUS_TIMEOUT and not future.cancel():
+            self.stages[name]["abandoned"] = True
+        if status != STATUS_OK:
+            logger.warning("Stage '%s' cut (%s) after %.0f ms", name, status, self.stages[name]["ms"])
+        return result
+
+    # --- Reporting ---
+    def cut_stages(self) -> List[str]:
+        return [name for name, info in self.stages.items() if info["status"] != STATUS_OK]
+
+    def abandoned_stages(self) -> int:
+        """Timed-out stages that were already running and could not be cancelled."""
+        return sum(1 for info in self.stages.values() if info.get("abandoned"))
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "budget_ms": round(self.budget * 1000, 1),
+            "elapsed_ms": round(self.elapsed() * 1000, 1),
+            "remaining_ms": round(self.remaining() * 1000, 1),
+            "stages": dict(self.stages),
+            "cut": self.cut_stages(),
+            "abandoned": self.abandoned_stages(),
+        }
+
+    def record(self, full_prompt_data: Dict[str, Any]) -> None:
+        full_prompt_data["deadline"] = self.report()
@@ -50,7 +50,8 @@ After 5 sketches (~25 deep sessions), Eliana forms a **Soul Picture**:
 FUNCTIONAL OVERVIEW
 -------------------------------------------------------------------------------
 • add_personality_fragment()
-    Stores new fragment, triggers sketches/pictures when thresholds met.
+    Stores new fragment; enqueues sketch/picture consolidation jobs when
+    thresholds are met (run in the background by run_consolidation_job).
 
 • generate_personality_fragment()
     Calls GPT to produce structured JSON memory for the session.
@@ -65,7 +66,14 @@ FUNCTIONAL OVERVIEW
     Provide access to different levels of stored identity.
 
 • get_personality_context()
-    Returns the most relevant identity layer for prompting Eliana.
+    Returns the most relevant identity layer for prompting Eliana, from a
+    per-user LRU cache invalidated by the write paths (with its token
+    count via get_personality_context_entry()).
+
+• recall_personality_memories()
+    Top-k past fragments/sketches (archived ones included) most similar
+    to the current message, within a token budget, from the per-user
+    vector index filled at write time (memory_index.py).
 
 -------------------------------------------------------------------------------
 DESIGN PRINCIPLES
@@ -88,8 +96,11 @@ import os
 import time
 import openai
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from itertools import chain, islice
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import re
+import threading
 from utils import fix_common_json_issues,safe_parse_gpt_json
 from relationship_tracker import RelationshipTracker
 from openai import OpenAI
@@ -98,6 +109,20 @@ from openai import OpenAI
 
 from session_memory import SessionMemory
 from utils import load_json, save_json, log
+from eliana_soul.config import CONSOLIDATION_JOBS_DB, PERSONALITY_STORE_DIR, data_path
+from consolidation_jobs import (
+    INDEX,
+    PICTURE,
+    SKETCH,
+    ConsolidationJob,
+    ConsolidationJobQueue,
+    ConsolidationWorker,
+    job_key,
+)
+from personality_store import FRAGMENTS, SKETCHES, PICTURES, PersonalityStore, entry_digest
+from token_budget import count_tokens
+from load_policy import get_llm_rate_limiter, get_load_monitor
+from memory_index import Memory, MemoryIndex
 # === FILE PATHS ===
 """
 File paths for the three long-term memory layers used by Eliana’s identity engine:
@@ -111,37 +136,245 @@ SOUL_SKETCHES_FILE:
 SOUL_PICTURE_FILE:
     Stores the Level-3 long-horizon identity portrait generated after 5 sketches.
 
+    These three global files are the legacy format. Layers are now kept
+    per user in the sharded PersonalityStore (personality_store.py) under
+    ELIANA_PERSONALITY_STORE_DIR (default: PERSONALITY_STORE_DIR in the data
+    directory); `python personality_store.py migrate` converts the old files.
+
+personality_store:
+    Created on first use via get_personality_store().
+
 relationship_tracker:
     Tracks emotional closeness or distance between Eliana and each user.
+    Created on first use via get_relationship_tracker(), so importing this
+    module does not touch relationships.json.
 """
 FRAGMENTS_FILE = "TEMPLATE_FILE_PATH.json"
 SOUL_SKETCHES_FILE = "TEMPLATE_FILE_PATH_3"
 SOUL_PICTURE_FILE = "TEMPLATE_FILE_PATH_3.json"
-relationship_tracker = RelationshipTracker()
+_relationship_tracker: Optional[RelationshipTracker] = None
+_relationship_tracker_lock = threading.Lock()
+
+
+def get_relationship_tracker() -> RelationshipTracker:
+    """Return the module-wide RelationshipTracker, creating it on first call."""
+    global _relationship_tracker
+    if _relationship_tracker is None:
+        with _relationship_tracker_lock:
+            if _relationship_tracker is None:
+                _relationship_tracker = RelationshipTracker()
+    return _relationship_tracker
+
+
+_personality_store: Optional[PersonalityStore] = None
+_personality_store_lock = threading.Lock()
+
+CONSOLIDATION_CYCLE = 5   # fragments per sketch, sketches per picture
+
+
+def get_personality_store() -> PersonalityStore:
+    """Return the module-wide PersonalityStore, creating it on first call."""
+    global _personality_store
+    if _personality_store is None:
+        with _personality_store_lock:
+            if _personality_store is None:
+                root = os.getenv("ELIANA_PERSONALITY_STORE_DIR") or data_path(PERSONALITY_STORE_DIR)
+                _personality_store = PersonalityStore(root)
+    return _personality_store
+
+
+def __getattr__(name: str):
+    # Keeps `user_personality_engine.relationship_tracker` working lazily.
+    if name == "relationship_tracker":
+        return get_relationship_tracker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 
 # === PERSONALITY FRAGMENT SYSTEM ===
-def add_personality_fragment(*args,**kwargs):
+def add_personality_fragment(user_id: str, fragment: Dict) -> List[str]:
     """
-    TEMPLATE FUNCTION
+    Add a new personality fragment for a user and trigger higher-level memory updates.
+
+    Steps:
+    1. Append the fragment to that user's fragment list.
+    2. Apply relationship score changes if provided.
+    3. If the user reaches 5 fragments, enqueue a Soul Sketch job
+       (level-2 summary; the job stores it and archives those fragments).
+    4. If the user reaches 5 sketches, enqueue a Soul Picture job
+       (level-3 long-term identity; stores it and archives those sketches).
+
+    Consolidation and memory indexing run as durable background jobs
+    (CONSOLIDATION JOBS below), so this returns right after the append —
+    session end never waits on an LLM or embedding call.
+
+    This function is the entry point for Eliana’s personality growth pipeline.
+
+    Returns:
+        Keys of newly enqueued consolidation jobs (usually empty).
+    """
+    get_personality_store().append_fragment(user_id, fragment)
+    personality_context_cache.invalidate(user_id)
+    enqueue_memory_index(user_id)
+
+    delta = fragment.get("relationship_score")
+    if isinstance(delta, (int, float)) and delta:
+        get_relationship_tracker().update(user_id, float(delta))
+
+    return enqueue_consolidation(user_id)
+
+
+# === CONSOLIDATION JOBS ===
+"""
+Sketch and picture generation run from a durable SQLite job queue
+(consolidation_jobs.py) keyed by (user, level, cycle), where cycle is how
+many sketches (pictures) the user had consolidated before. Embedding new
+entries into the memory index runs from the same queue as "index" jobs
+(MEMORY RECALL below).
+
+run_consolidation_job is idempotent, so a job that is retried or resumed
+after a crash never duplicates work:
+    • The generated sketch/picture carries its job key ("consolidation_key")
+      and the digests of its source entries; if it is already stored, it
+      is not generated again.
+    • Source entries are archived by digest (PersonalityStore.archive_entries),
+      which is a no-op for entries already archived.
+
+Generation goes through the shared load_policy.get_llm_rate_limiter() (and
+is timed by get_load_monitor()), so background consolidation and bulk reruns
+(bulk_consolidation.py) stay inside the same LLM quota as live turns.
+
+The in-process worker (ELIANA_CONSOLIDATION_WORKERS threads, default 1;
+0 leaves the queue to an external runner) starts on first enqueue, or
+explicitly via start_consolidation_worker() — e.g. at process start, to
+resume jobs left by a previous run.
+"""
+CONSOLIDATION_MODEL = "gpt-4o"
+
+_consolidation_queue: Optional[ConsolidationJobQueue] = None
+_consolidation_worker: Optional[ConsolidationWorker] = None
+_consolidation_lock = threading.Lock()
+
+
+class ConsolidationError(RuntimeError):
+    """Generation returned nothing usable; the job is retried."""
+
+
+def get_consolidation_queue() -> ConsolidationJobQueue:
+    """Return the module-wide consolidation job queue, creating it on first call."""
+    global _consolidation_queue
+    if _consolidation_queue is None:
+        with _consolidation_lock:
+            if _consolidation_queue is None:
+                path = os.getenv("ELIANA_CONSOLIDATION_JOBS_DB") or data_path(CONSOLIDATION_JOBS_DB)
+                _consolidation_queue = ConsolidationJobQueue(path)
+    return _consolidation_queue
+
+
+def start_consolidation_worker(threads: Optional[int] = None) -> Optional[ConsolidationWorker]:
+    """Start the in-process worker (once). Returns None if disabled."""
+    global _consolidation_worker
+    if threads is None:
+        threads = int(os.getenv("ELIANA_CONSOLIDATION_WORKERS", "1"))
+    if threads <= 0:
+        return None
+    queue = get_consolidation_queue()
+    if _consolidation_worker is None:
+        with _consolidation_lock:
+            if _consolidation_worker is None:
+                _consolidation_worker = ConsolidationWorker(queue, run_consolidation_job, threads=threads)
+    return _consolidation_worker
+
+
+def enqueue_consolidation(user_id: str) -> List[str]:
+    """Enqueue the sketch/picture jobs the user's active layers call for."""
+    store = get_personality_store()
+    queue = get_consolidation_queue()
+    added = []
+    for level, layer, active in (
+        (SKETCH, FRAGMENTS, store.load_fragments(user_id)),
+        (PICTURE, SKETCHES, store.load_sketches(user_id)),
+    ):
+        if len(active) >= CONSOLIDATION_CYCLE:
+            cycle = store.count_archived(user_id, layer) // CONSOLIDATION_CYCLE
+            if queue.enqueue(user_id, level, cycle):
+                added.append(job_key(user_id, level, cycle))
+    if added:
+        _notify_consolidation_worker()
+    return added
+
+
+def _notify_consolidation_worker() -> None:
+    worker = start_consolidation_worker()
+    if worker is not None:
+        worker.notify()
+
+
+def _generate(generator, user_id: str, sources: List[Dict]) -> Tuple[Optional[Dict], Dict[str, int]]:
+    """
+    Call a sketch/picture generator under the shared rate limiter.
+    Token usage is estimated from the source and output JSON.
+    """
+    limiter = get_llm_rate_limiter()
+    prompt_tokens = count_tokens(json.dumps(sources, ensure_ascii=False))
+    limiter.acquire(prompt_tokens)
+    with get_load_monitor().time_backend_call():
+        result = generator(user_id, sources, model=CONSOLIDATION_MODEL)
+    completion_tokens = count_tokens(json.dumps(result, ensure_ascii=False)) if result else 0
+    limiter.record_tokens(completion_tokens)
+    return result, {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
 
-    Full docstring preserved.
-    IMPLEMENTED IN PRIVATE VERSION
-       Add a new personality fragment for a user and trigger higher-level memory updates.
-
-       Steps:
-       1. Append the fragment to that user's fragment list.
-       2. Apply relationship score changes if provided.
-       3. If the user reaches 5 fragments:
-            • Generate a Soul Sketch (level-2 summary)
-            • Store it
-            • Reset fragments for the next cycle
-       4. If the user reaches 5 sketches:
-            • Generate a Soul Picture (level-3 long-term identity)
-
-       This function is the entry point for Eliana’s personality growth pipeline.
-       """
+
+def run_consolidation_job(job: ConsolidationJob) -> Optional[Dict[str, int]]:
+    """
+    Perform one sketch or picture job (idempotent; raises to retry).
+
+    Returns the estimated token usage of the LLM call, or None if the job
+    had nothing left to generate.
+    """
+    store = get_personality_store()
+    user_id = job.user_id
+    usage = None
+
+    if job.level == INDEX:
+        index_new_personality_memory(user_id, strict=True)
+        return None
+
+    if job.level == SKETCH:
+        sketch = store.consolidated_entry(user_id, SKETCHES, job.key)
+        if sketch is None:
+            fragments = store.load_fragments(user_id)[:CONSOLIDATION_CYCLE]
+            if len(fragments) < CONSOLIDATION_CYCLE:
+                return
+            sketch, usage = _generate(generate_soul_sketch, user_id, fragments)
+            if not sketch or "error" in sketch:
+                raise ConsolidationError(f"no soul sketch generated for {user_id}")
+            sketch = dict(sketch, consolidation_key=job.key,
+                          source_digests=[entry_digest(fragment) for fragment in fragments])
+            sketch = store_soul_sketch(user_id, sketch)
+        store.archive_entries(user_id, FRAGMENTS, sketch.get("source_digests", []))
+
+    elif job.level == PICTURE:
+        picture = store.consolidated_entry(user_id, PICTURES, job.key)
+        if picture is None:
+            sketches = store.load_sketches(user_id)[:CONSOLIDATION_CYCLE]
+            if len(sketches) < CONSOLIDATION_CYCLE:
+                return
+            picture, usage = _generate(generate_soul_picture, user_id, sketches)
+            if not picture:
+                raise ConsolidationError(f"no soul picture generated for {user_id}")
+            picture = dict(picture, consolidation_key=job.key,
+                           source_digests=[entry_digest(sketch) for sketch in sketches])
+            picture = store_soul_picture(user_id, picture)
+        store.archive_entries(user_id, SKETCHES, picture.get("source_digests", []))
+
+    else:
+        raise ValueError(f"Unknown consolidation level {job.level!r}")
+
+    personality_context_cache.invalidate(user_id)
+    # Fragments may have piled up meanwhile, or the new sketch completes a set.
+    enqueue_consolidation(user_id)
+    return usage
 
 def generate_soul_sketch(*args, **kwargs):
     """
@@ -170,22 +403,37 @@ def generate_soul_sketch(*args, **kwargs):
            or an error record if generation fails.
        """
 
-def store_soul_sketch(*args, **kwargs):
+def store_soul_sketch(user_id: str, sketch: Dict) -> Dict:
     """
-    TEMPLATE FUNCTION
+    Store a generated Soul Sketch into the user's long-term sketch history.
 
-    Full docstring preserved.
-    IMPLEMENTED IN PRIVATE VERSION
-        Store a generated Soul Sketch into the user's long-term sketch history.
+    Appends one line to the user's sketch file in the PersonalityStore —
+    no other user's data is read or rewritten, so the write is cheap
+    enough to stay synchronous at session end.
 
-        Steps:
-            1. Load all existing soul sketches.
-            2. Append the new sketch to the user's list.
-            3. Save the updated dataset back to disk.
+    This function represents the persistent storage layer for Level-2
+    memory (Soul Sketches), used later to generate the Soul Picture.
 
-        This function represents the persistent storage layer for Level-2
-        memory (Soul Sketches), used later to generate the Soul Picture.
-        """
+    Returns the stored sketch: for a consolidation job that already stored
+    its sketch (consolidation_key), that earlier sketch and nothing is written.
+    """
+    stored = get_personality_store().append_sketch(user_id, sketch)
+    if stored is sketch:
+        personality_context_cache.invalidate(user_id)
+        enqueue_memory_index(user_id)
+    return stored
+
+
+def store_soul_picture(user_id: str, picture: Dict) -> Dict:
+    """
+    Persist a Soul Picture as the user's current Level-3 memory; the
+    previous picture (if any) is archived. Returns the stored picture
+    (an earlier one with the same consolidation_key, if any).
+    """
+    stored = get_personality_store().store_picture(user_id, picture)
+    if stored is picture:
+        personality_context_cache.invalidate(user_id)
+    return stored
 
 
 def generate_personality_fragment(
@@ -227,77 +475,369 @@ def generate_personality_fragment(
 
 # === PERSONALITY CONTEXT LOADERS ===
 
-def load_user_fragments(*args, **kwargs) -> List[Dict]:
+def load_user_fragments(user_id: str) -> List[Dict]:
     """
-    TEMPLATE FUNCTION
+    Loads the list of active personality fragments for a given user
+    (archived fragments are not included). Fragments reflect
+    narrative-style reflections accumulated across conversations.
+    """
+    return get_personality_store().load_fragments(user_id)
 
-    Private Version:
-        Loads the list of personality fragments for a given user.
-        Fragments reflect narrative-style reflections accumulated
-        across conversations.
 
-    Public Template:
-        Returns an empty list.
+def load_user_sketches(user_id: str) -> List[Dict]:
     """
-    return []
+    Loads the user's active “soul sketches” — mid-level personality
+    summaries generated periodically during deep sessions.
+    """
+    return get_personality_store().load_sketches(user_id)
 
 
-def load_user_sketches(*args, **kwargs) -> List[Dict]:
+def load_user_soul_picture(user_id: str) -> Dict:
     """
-    TEMPLATE FUNCTION
+    Loads the long-form “soul picture” for a user ({} if none yet).
+    This is Eliana’s highest-level, long-term internal model
+    of a user’s emotional and behavioral tendencies.
+    """
+    return get_personality_store().load_picture(user_id)
+
+def _render_fragment(fragment: Dict) -> str:
+    parts = [
+        ("Personality", fragment.get("personality_snapshot")),
+        ("Eliana's understanding", fragment.get("eliana_emotional_understanding")),
+        ("Session and story", fragment.get("session_and_story")),
+    ]
+    return "\n".join(f"{label}: {text}" for label, text in parts if text)
+
+
+def _personality_context_entries(user_id: str) -> List[Tuple[str, Dict]]:
+    """(layer, entry) pairs build_personality_context shows, in order."""
+    picture = load_user_soul_picture(user_id)
+    fragments = load_user_fragments(user_id)
+    last_fragment = [(FRAGMENTS, fragments[-1])] if fragments else []
+    if picture:
+        return [(PICTURES, picture)] + last_fragment
+    sketches = load_user_sketches(user_id)
+    if sketches:
+        return [(SKETCHES, sketches[-1])]
+    return last_fragment
+
+
+def _render_personality_context(entries: List[Tuple[str, Dict]]) -> str:
+    sections = []
+    for layer, entry in entries:
+        if layer == PICTURES:
+            sections.append(f"Soul Picture:\n{entry.get('soul_picture', '')}")
+            if entry.get("user_story_summary"):
+                sections.append(f"User Story:\n{entry['user_story_summary']}")
+            if entry.get("eliana_final_reflection"):
+                sections.append(f"Eliana's Final Reflection:\n{entry['eliana_final_reflection']}")
+        elif layer == SKETCHES:
+            sections.append(f"Soul Sketch:\n{entry.get('soul_sketch', '')}")
+            if entry.get("user_story_summary"):
+                sections.append(f"User Story So Far:\n{entry['user_story_summary']}")
+            if entry.get("eliana_final_reflection"):
+                sections.append(f"Eliana's Reflection:\n{entry['eliana_final_reflection']}")
+        elif sections:
+            sections.append(f"Most Recent Session:\n{_render_fragment(entry)}")
+        else:
+            sections.append(f"Last Personality Fragment:\n{_render_fragment(entry)}")
+    return "\n\n".join(sections)
+
+
+def build_personality_context(user_id: str) -> str:
+    """
+    Construct the full personality context used to guide Eliana's responses.
 
-    Private Version:
-        Loads “soul sketches” — mid-level personality summaries
-        generated periodically during deep sessions.
+    This function retrieves and assembles the user's long-term personality
+    memory layers in priority order:
 
-    Public Template:
-        Returns an empty list.
-    """
-    return []
+        1. Soul Picture (Level-3, if available)
+        2. Most recent Soul Sketch (Level-2)
+        3. Most recent personality fragment (Level-1)
 
+    If a Soul Picture exists, it is always returned first, optionally followed
+    by the last personality fragment for continuity.
 
-def load_user_soul_picture(*args, **kwargs) -> Dict:
-    """
-    TEMPLATE FUNCTION
+    If no picture exists but Soul Sketches do, the latest sketch is returned
+    with its story summary and final reflection.
+
+    If neither is available, the last personality fragment is returned.
 
-    Private Version:
-        Loads the long-form “soul picture” for a user.
-        This is Eliana’s highest-level, long-term internal model
-        of a user’s emotional and behavioral tendencies.
+    Always reads the store; get_personality_context() is the cached entry point.
 
-    Public Template:
-        Returns an empty dictionary.
+    Returns:
+        A string containing the merged memory context that Eliana
+        should prepend to her system prompt for stable personality-aware responses
+        ("" for a user with no personality memory yet).
     """
-    return {}
+    return _render_personality_context(_personality_context_entries(user_id))
+
+
+# === PERSONALITY CONTEXT CACHE ===
+"""
+The rendered personality context only changes when one of the user's
+layers is written, but is needed on every turn. It is cached per user in
+an in-process LRU together with its token count (for the prompt
+budgeter), so a turn costs three stat() calls instead of reading and
+parsing the user's files.
+
+Invalidation:
+    • In-process write paths — add_personality_fragment, store_soul_sketch
+      and store_soul_picture (where generate_soul_picture's result is
+      persisted) — drop the user's entry.
+    • Writes by other worker processes are caught by validating the
+      entry's file versions (PersonalityStore.layer_versions) on each hit.
+    • A per-user generation counter keeps a render that raced with a write
+      from being cached.
+
+ELIANA_PERSONALITY_CONTEXT_CACHE sets the capacity (users; default 4096).
+"""
+PERSONALITY_CONTEXT_CACHE_SIZE = int(os.getenv("ELIANA_PERSONALITY_CONTEXT_CACHE", "4096"))
+
+
+class PersonalityContext(NamedTuple):
+    text: str
+    tokens: int
+    # Digests of the fragment/sketch the text shows (recall skips them).
+    shown: Tuple[str, ...] = ()
+
+
+class PersonalityContextCache:
+    """LRU of user_id → (PersonalityContext, layer versions)."""
+
+    def __init__(self, capacity: int = PERSONALITY_CONTEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, Tuple[PersonalityContext, Tuple]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, user_id: str) -> PersonalityContext:
+        store = get_personality_store()
+        versions = store.layer_versions(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] == versions:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self.stale += 1
+            self.misses += 1
+            generation = self._generations.get(user_id, 0)
+
+        # Versions were taken before reading: if a write lands during the
+        # render, the next lookup sees new versions and re-renders.
+        entries = _personality_context_entries(user_id)
+        text = _render_personality_context(entries)
+        shown = tuple(entry_digest(entry) for layer, entry in entries if layer != PICTURES)
+        context = PersonalityContext(text, count_tokens(text), shown)
+        with self._lock:
+            if self._generations.get(user_id, 0) == generation:
+                self._entries[user_id] = (context, versions)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.capacity:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._generations.pop(evicted, None)
+                    self.evictions += 1
+        return context
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for user_id in self._entries:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._entries.clear()
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+personality_context_cache = PersonalityContextCache()
+
+
+def get_personality_context_entry(user_id: str) -> PersonalityContext:
+    """Cached personality context for `user_id` with its token count."""
+    return personality_context_cache.get(user_id)
+
 
 def get_personality_context(user_id: str) -> str:
     """
-     TEMPLATE FUNCTION
+    Personality context for Eliana's system prompt (see
+    build_personality_context for what it contains). Served from the
+    per-user cache; rebuilt only after the user's layers change.
+    """
+    return personality_context_cache.get(user_id).text
 
-    Full docstring preserved.
-    IMPLEMENTED IN PRIVATE VERSION
 
-        Construct the full personality context used to guide Eliana's responses.
+# === MEMORY RECALL ===
+"""
+The personality context shows only the newest layers. Every fragment and
+sketch is also embedded into the user's MemoryIndex, so older sessions can
+be recalled when today's message is about them. Writers
+(add_personality_fragment, store_soul_sketch) only enqueue an "index" job
+(enqueue_memory_index); the consolidation worker makes the embedding call,
+so session end does not wait on the embedding backend:
+
+    memories = recall_personality_memories(user_id, message_vector)
+    recalled = render_recalled_memories(memories)
+
+`message_vector` is the turn's input embedding (the one already computed
+for resonance); no extra embedding call is made on the turn path.
+An index job that cannot embed (backend down) fails and is retried with
+the queue's backoff; the write itself never fails. A job looks only at
+the entries written since the index last caught up — per layer, the
+newest (written − indexed) entries, active first and then the newest
+archive members — so its cost does not grow with the user's history.
+reindex_personality_memory() walks everything and is the explicit
+backfill, e.g. after migration or for an entry whose jobs all failed.
+
+    ELIANA_MEMORY_RECALL_K        memories per turn        (default 3)
+    ELIANA_MEMORY_RECALL_TOKENS   token budget for them    (default 600)
+    ELIANA_MEMORY_RECALL_MIN_SCORE  minimum cosine score   (default 0)
+"""
+MEMORY_RECALL_K = int(os.getenv("ELIANA_MEMORY_RECALL_K", "3"))
+MEMORY_RECALL_TOKENS = int(os.getenv("ELIANA_MEMORY_RECALL_TOKENS", "600"))
+MEMORY_RECALL_MIN_SCORE = float(os.getenv("ELIANA_MEMORY_RECALL_MIN_SCORE", "0"))
+
+_memory_index: Optional[MemoryIndex] = None
+_memory_index_lock = threading.Lock()
+
+
+def get_memory_index() -> MemoryIndex:
+    """Return the module-wide MemoryIndex, creating it on first call."""
+    global _memory_index
+    if _memory_index is None:
+        with _memory_index_lock:
+            if _memory_index is None:
+                _memory_index = MemoryIndex(get_personality_store())
+    return _memory_index
+
 
-        This function retrieves and assembles the user's long-term personality
-        memory layers in priority order:
+def _memory_text(layer: str, entry: Dict) -> str:
+    if layer == FRAGMENTS:
+        return _render_fragment(entry)
+    parts = [entry.get("soul_sketch"), entry.get("user_story_summary")]
+    return "\n".join(part for part in parts if part)
 
-            1. Soul Picture (Level-3, if available)
-            2. Most recent Soul Sketch (Level-2)
-            3. Most recent personality fragment (Level-1)
 
-        If a Soul Picture exists, it is always returned first, optionally followed
-        by the last personality fragment for continuity.
+def _embed_memory(text: str):
+    # Imported here: Eliana_Heart pulls in the embedding client.
+    from Eliana_Heart import embed_text
+    return embed_text(text)
 
-        If no picture exists but Soul Sketches do, the latest sketch is returned
-        with its story summary and final reflection.
 
-        If neither is available, the last personality fragment is returned.
+def enqueue_memory_index(user_id: str) -> Optional[str]:
+    """Enqueue an index job for the user's new entries; returns its key if added."""
+    store = get_personality_store()
+    written = sum(
+        len(active) + store.count_archived(user_id, layer)
+        for layer, active in ((FRAGMENTS, store.load_fragments(user_id)), (SKETCHES, store.load_sketches(user_id)))
+    )
+    if not get_consolidation_queue().enqueue(user_id, INDEX, written):
+        return None
+    _notify_consolidation_worker()
+    return job_key(user_id, INDEX, written)
+
+
+def index_personality_memory(user_id: str, layer: str, entry: Dict, strict: bool = False) -> bool:
+    """
+    Embed one fragment/sketch into the user's index. Returns True if added.
+    Embedding errors are logged and return False, or raise with `strict`.
+    """
+    index = get_memory_index()
+    digest = entry_digest(entry)
+    text = _memory_text(layer, entry)
+    if not text or index.has(user_id, digest):
+        return False
+    try:
+        vector = _embed_memory(text)
+        if vector is None:
+            return False
+        return index.add(user_id, layer, digest, text, count_tokens(text), vector)
+    except Exception as exc:
+        if strict:
+            raise
+        log(f"⚠️ Memory indexing failed for {user_id}: {exc}")
+        return False
+
+
+def index_new_personality_memory(user_id: str, strict: bool = False) -> int:
+    """
+    Index the fragments/sketches written since the index last caught up
+    (the newest written − indexed entries per layer), oldest first.
+    """
+    store = get_personality_store()
+    indexed = get_memory_index().layer_counts(user_id)
+    added = 0
+    for layer in (FRAGMENTS, SKETCHES):
+        active = store.load_fragments(user_id) if layer == FRAGMENTS else store.load_sketches(user_id)
+        missing = len(active) + store.count_archived(user_id, layer) - indexed.get(layer, 0)
+        if missing <= 0:
+            continue
+        newest = chain(reversed(active), store.iter_archived(user_id, layer, reverse=True))
+        for entry in reversed(list(islice(newest, missing))):
+            added += index_personality_memory(user_id, layer, entry, strict=strict)
+    return added
+
+
+def reindex_personality_memory(user_id: str, strict: bool = False) -> int:
+    """Index every active and archived fragment/sketch not indexed yet (full backfill)."""
+    store = get_personality_store()
+    added = 0
+    for layer in (FRAGMENTS, SKETCHES):
+        active = store.load_fragments(user_id) if layer == FRAGMENTS else store.load_sketches(user_id)
+        for entry in chain(store.iter_archived(user_id, layer), active):
+            added += index_personality_memory(user_id, layer, entry, strict=strict)
+    return added
+
+
+def recall_personality_memories(
+    user_id: str,
+    message_vector,
+    k: int = MEMORY_RECALL_K,
+    max_tokens: int = MEMORY_RECALL_TOKENS,
+    min_score: float = MEMORY_RECALL_MIN_SCORE,
+) -> List[Memory]:
+    """
+    Past fragments/sketches most similar to the current message, best
+    first, within `max_tokens`. Entries get_personality_context() already
+    shows (PersonalityContext.shown) are left out.
+    """
+    if message_vector is None:
+        return []
+    exclude = get_personality_context_entry(user_id).shown
+    return get_memory_index().search(user_id, message_vector, k=k, max_tokens=max_tokens, exclude=exclude,
+                                     min_score=min_score)
+
 
-        Returns:
-            A string containing the merged memory context that Eliana
-            should prepend to her system prompt for stable personality-aware responses.
-        """
+def render_recalled_memories(memories: List[Memory]) -> str:
+    """Prompt section for recalled memories ("" if none)."""
+    if not memories:
+        return ""
+    label = {FRAGMENTS: "Past Session", SKETCHES: "Past Soul Sketch"}
+    blocks = [f"{label.get(memory.layer, 'Memory')}:\n{memory.text}" for memory in memories]
+    return "Related Memories:\n\n" + "\n\n".join(blocks)
 
 
 # === SOUL PICTURE GENERATION ===
@@ -325,7 +865,8 @@ def generate_soul_picture(*args, **kwargs):
            1. Load the latest 5 soul sketches.
            2. Format them into a prompt for the LLM.
            3. Parse the model’s JSON output.
-           4. Persist the finished Soul Picture to disk.
+           4. Return it; the consolidation job (run_consolidation_job)
+              persists it with store_soul_picture() and archives the sketches.
 
        Returns:
            Dict containing the soul_picture, story summary, and reflection
@@ -14,15 +14,23 @@ Purpose:
     • Protect all proprietary emotion-processing, parsing, and data-handling code.
 
 NOTE:
-    All functions below intentionally contain no implementation.
-    They use docstrings + 'pass' to indicate their intended role within the system.
+    Template functions contain no implementation; they use docstrings +
+    'pass' to indicate their intended role within the system.
+    `load_json` / `save_json` / `update_json` and the file primitives
+    (`file_lock`, `file_version`, `write_file_atomic`) are implemented:
+    persistence of the shared JSON stores (see JSON STORE WRITES below).
 """
 
+import copy
 import json
 import os
 import re
 import logging
-from typing import Dict
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from write_behind import WriteBehindQueue
 
 # === DEBUG CONFIGURATION (Template) ===
 DEBUG = False
@@ -43,32 +51,297 @@ def log(*args, **kwargs):
     pass
 
 
-# === LOAD JSON (Template) ===
-def load_json(*args, **kwargs):
+# === JSON STORE WRITES ===
+"""
+Personality and memory JSON files are shared by every worker process and
+written through `json_writer`, a write-behind queue keyed by path
+(write_behind.py).
+
+Safety across processes:
+    • Advisory locks: every write (and every read-modify-write) holds an
+      exclusive flock on "<path>.lock" — a side file, because the data
+      file itself is replaced on each write.
+    • Atomic replace: data is written to a temp file and swapped in with
+      os.replace, so readers never see a half-written file and need no lock.
+    • Optimistic versions: a file's version is its (inode, mtime_ns, size);
+      atomic replace gives every write a new inode. `update_json` computes
+      without the lock and commits only if the version is unchanged,
+      retrying otherwise (a final attempt runs entirely under the lock).
+
+Entry points:
+    • load_json(path) — reads the file, or this process's queued version.
+    • save_json(path, data) — blind overwrite of the whole file; with
+      defer=True the write is queued (write-behind).
+    • update_json(path, fn) — read-modify-write that never loses another
+      writer's update. With defer=True the mutation is queued: `fn` is
+      applied immediately to the queued view, and if the file changed on
+      disk by the time the batch is flushed, the queued mutations are
+      replayed on the current file under the lock instead of overwriting it.
+"""
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+JSON_UPDATE_RETRIES = 5
+
+json_store_stats = {"conflicts": 0, "replays": 0, "locked_fallbacks": 0}
+
+_path_locks: Dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    key = os.path.abspath(path)
+    with _path_locks_guard:
+        lock = _path_locks.get(key)
+        if lock is None:
+            lock = _path_locks[key] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True):
     """
-    Template loader for JSON files.
+    Exclusive advisory lock for `path`, across threads and processes.
 
-    Private Version:
-        Loads and validates structured JSON used in memory and emotion systems.
+    Uses flock on "<path>.lock" (POSIX). Without fcntl only threads of this
+    process are serialized. With blocking=False, raises BlockingIOError
+    right away if another thread or process holds the lock.
+    """
+    lock = _thread_lock(path)
+    if not lock.acquire(blocking):
+        raise BlockingIOError(f"{path} is locked")
+    try:
+        if fcntl is None:
+            yield
+            return
+        with open(f"{path}.lock", "a") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    finally:
+        lock.release()
 
-    Public Template:
-        Placeholder with no logic.
+
+def file_version(path: str) -> Optional[Tuple[int, int, int]]:
+    """Version token of the file at `path` (None if it does not exist)."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def write_file_atomic(path: str, payload: bytes, fsync: bool = False) -> None:
+    """Write `payload` to a temp file and swap it in with os.replace."""
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if fsync and hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _encode_json(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def read_json_versioned(path: str):
     """
-    pass
+    (data, version) read consistently: retried if the file was replaced
+    mid-read. data is None for a missing or empty file.
+    """
+    while True:
+        version = file_version(path)
+        if version is None:
+            return None, None
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            continue
+        data = json.loads(raw) if raw.strip() else None
+        if file_version(path) == version:
+            return data, version
+
 
+# A version that matches no file: forces a replay at flush time.
+_STALE = ("stale",)
 
-# === SAVE JSON (Template) ===
-def save_json(*args, **kwargs):
+
+class _JsonWrite(NamedTuple):
     """
-    Template saver for JSON data.
+    Queued write of one file.
 
-    Private Version:
-        Writes validated data to disk with error handling.
+    payload:       encoded data as this process expects it (None if it
+                   must be rebuilt by replaying `ops`).
+    base_version:  file version `payload` was derived from.
+    ops:           mutations since that version (None for a blind save).
+    """
+    payload: Optional[bytes]
+    base_version: Optional[tuple]
+    ops: Optional[Tuple[Callable, ...]]
 
-    Public Template:
-        Placeholder only.
+
+def _merge_writes(older: _JsonWrite, newer: _JsonWrite) -> _JsonWrite:
+    # A failed flush is re-queued behind newer writes of the same file.
+    if newer.ops is None:
+        return newer
+    if older.ops is None:
+        return _JsonWrite(None, _STALE, (lambda _data, payload=older.payload: json.loads(payload),) + newer.ops)
+    return _JsonWrite(None, older.base_version, older.ops + newer.ops)
+
+
+def _replay(data, ops):
+    for op in ops:
+        data = op(data)
+    return data
+
+
+def _flush_json_files(batch: Dict[str, _JsonWrite], fsync: bool) -> None:
+    for path, write in batch.items():
+        with file_lock(path):
+            payload = write.payload
+            if write.ops is not None and (payload is None or file_version(path) != write.base_version):
+                # Another writer replaced the file since our view was
+                # taken: apply our mutations on top of its version.
+                data, _ = read_json_versioned(path)
+                payload = _encode_json(_replay(data, write.ops))
+                json_store_stats["replays"] += 1
+            write_file_atomic(path, payload, fsync)
+
+
+json_writer = WriteBehindQueue(_flush_json_files, name="json-write-behind", merge=_merge_writes)
+
+
+# === LOAD JSON ===
+def load_json(path: str, default=None):
     """
-    pass
+    Load a JSON file (or this process's queued, not yet written version).
+
+    Returns `default` if the file does not exist or cannot be parsed.
+    """
+    queued = json_writer.get(path)
+    try:
+        if queued is not None:
+            if queued.payload is not None:
+                return json.loads(queued.payload)
+            data, _ = read_json_versioned(path)
+            return _replay(data, queued.ops)
+        data, version = read_json_versioned(path)
+    except (OSError, json.JSONDecodeError):
+        logger.exception("Could not load JSON from %s", path)
+        return default
+    return default if version is None else data
+
+
+# === SAVE JSON ===
+def save_json(path: str, data, defer: bool = False, fsync: bool = False) -> None:
+    """
+    Write `data` as JSON to `path` (atomic replace, under the file lock).
+
+    This overwrites whatever is on disk; use `update_json` when other
+    processes may be changing the same file.
+
+    defer=True queues the write (write-behind) instead of blocking on disk.
+    `data` is serialized before returning either way, so the caller may
+    keep mutating it.
+    """
+    write = _JsonWrite(_encode_json(data), None, None)
+    if defer:
+        json_writer.put(path, write)
+    else:
+        json_writer.write_through(path, write)
+        if fsync and not json_writer.fsync:
+            _fsync_file(path)
+
+
+def _fsync_file(path: str) -> None:
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+# === UPDATE JSON ===
+def update_json(path: str, fn: Callable, default=None, defer: bool = False, retries: int = JSON_UPDATE_RETRIES):
+    """
+    Read-modify-write of a shared JSON file without lost updates.
+
+    `fn(data) -> new data` receives a private copy of the current contents
+    (a copy of `default` if the file is missing) and may mutate it. It can
+    be called more than once, so it must not have side effects.
+
+    Synchronous: optimistic — compute outside the lock, commit only if the
+    file version is unchanged, retry up to `retries` times, then run the
+    final attempt under the lock.
+
+    defer=True: the mutation is queued (see JSON STORE WRITES); returns the
+    data as this process now sees it.
+    """
+    def op(data):
+        return fn(copy.deepcopy(default) if data is None else data)
+
+    if defer:
+        return _update_deferred(path, op)
+
+    if path in json_writer:
+        json_writer.flush()
+    for _ in range(retries):
+        data, version = read_json_versioned(path)
+        payload = _encode_json(op(data))
+        with file_lock(path):
+            if file_version(path) == version:
+                write_file_atomic(path, payload)
+                return json.loads(payload)
+        json_store_stats["conflicts"] += 1
+    json_store_stats["locked_fallbacks"] += 1
+    with file_lock(path):
+        data, _ = read_json_versioned(path)
+        payload = _encode_json(op(data))
+        write_file_atomic(path, payload)
+    return json.loads(payload)
+
+
+def _update_deferred(path: str, op: Callable):
+    snapshot = json_writer.get(path)
+    if snapshot is None:
+        # Read outside the queue lock; if the file changes before the
+        # flush, the version check replays `op` on the new contents.
+        base, base_version = read_json_versioned(path)
+        base_payload = _encode_json(base)
+    else:
+        base_payload, base_version = snapshot.payload, _STALE
+
+    def queue(queued: Optional[_JsonWrite]) -> _JsonWrite:
+        if queued is None and snapshot is not None:
+            # `snapshot` is being flushed: start from it, but the file will
+            # have a new version by flush time, so our op is replayed there.
+            queued_ops, payload, version = (), base_payload, _STALE
+        elif queued is None:
+            queued_ops, payload, version = (), base_payload, base_version
+        else:
+            queued_ops, payload, version = queued.ops, queued.payload, queued.base_version
+        if queued_ops is None:
+            # After a blind save: the mutation applies to the saved data.
+            queued_ops = (lambda _data, saved=payload: json.loads(saved),)
+            version = _STALE
+        if payload is None:
+            return _JsonWrite(None, version, queued_ops + (op,))
+        return _JsonWrite(_encode_json(op(json.loads(payload))), version, queued_ops + (op,))
+
+    write = json_writer.update(path, queue)
+    return load_json(path) if write.payload is None else json.loads(write.payload)
 
 
 # === EMOTION FORMATTER (Template) ===
@@ -0,0 +1,294 @@
+"""
+===============================================================================
+    write_behind.py
+    ---------------------------------------------------------------------------
+    Write-behind batching for persistent stores.
+===============================================================================
+
+Relationship scores, soul sketches and personality fragments were written
+to disk synchronously on every turn and at every session end, so disk
+latency (and fsync stalls) showed up directly in turn latency. A
+WriteBehindQueue takes those writes off the turn path:
+
+-------------------------------------------------------------------------------
+COALESCING
+-------------------------------------------------------------------------------
+• `put(key, value)` only records the latest value for `key`: ten updates
+  to one user (or one file) between flushes become a single write.
+• `update(key, fn)` derives the queued value from the one already queued
+  (e.g. to accumulate mutations), atomically with respect to flushes.
+• `get(key)` returns a value that is queued or being flushed, so readers
+  in this process always see their own writes.
+
+-------------------------------------------------------------------------------
+FLUSH POLICY
+-------------------------------------------------------------------------------
+• A background thread (started on first use) flushes when `max_pending`
+  keys are queued or the oldest queued write is `max_delay` seconds old.
+• Each flush hands the whole batch to `sink(batch, fsync)` in one call,
+  so the sink can write it in one transaction / one pass.
+• `fsync=True` asks the sink to make each batch durable against power
+  loss; False leaves it to the OS (durable against process crashes).
+• Flushes run one at a time. A failed batch is re-queued (newer values
+  for the same keys win) and retried on the next cycle.
+• `write_through(key, value)` writes one key synchronously, ordered after
+  any batch in flight, for callers that need the write on disk now.
+
+-------------------------------------------------------------------------------
+SHUTDOWN
+-------------------------------------------------------------------------------
+• `close()` flushes everything and stops the thread. Every queue is
+  registered with `atexit`, so a clean interpreter exit loses nothing.
+• `flush_all()` / `close_all()` act on every live queue (e.g. from a
+  SIGTERM handler).
+
+-------------------------------------------------------------------------------
+METRICS
+-------------------------------------------------------------------------------
+`metrics()` reports queue depth, age of the oldest queued write, enqueued
+and coalesced counts, flushes, and flush latency (last / mean / p95 / max
+in milliseconds).
+
+Configuration (environment):
+    ELIANA_WRITE_BEHIND_MAX_PENDING   keys before a flush     (default 256)
+    ELIANA_WRITE_BEHIND_MAX_DELAY     seconds before a flush  (default 1.0)
+    ELIANA_WRITE_BEHIND_FSYNC         "1" to fsync batches    (default off)
+===============================================================================
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PENDING = int(os.getenv("ELIANA_WRITE_BEHIND_MAX_PENDING", "256"))
+DEFAULT_MAX_DELAY = float(os.getenv("ELIANA_WRITE_BEHIND_MAX_DELAY", "1.0"))
+DEFAULT_FSYNC = os.getenv("ELIANA_WRITE_BEHIND_FSYNC", "0").lower() in ("1", "true", "yes")
+LATENCY_WINDOW = 256
+
+Sink = Callable[[Dict[Hashable, Any], bool], None]
+
+_queues: "weakref.WeakSet[WriteBehindQueue]" = weakref.WeakSet()
+
+
+class WriteBehindQueue:
+    """
+    Per-key coalescing write queue in front of a batch `sink`.
+
+    Parameters
+    ----------
+    sink : callable
+        sink(batch: {key: value}, fsync: bool) persists a batch; raising
+        re-queues it.
+
+    name : str
+        Used in logs, thread name and metrics.
+
+    merge : callable, optional
+        merge(older, newer) combines a failed batch's value with a newer
+        one queued meanwhile; default: the newer value wins.
+    """
+
+    def __init__(
+        self,
+        sink: Sink,
+        name: str = "write-behind",
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        fsync: bool = DEFAULT_FSYNC,
+        merge: Optional[Callable[[Any, Any], Any]] = None,
+    ):
+        self.sink = sink
+        self.merge = merge
+        self.name = name
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self.fsync = fsync
+
+        self._pending: Dict[Hashable, Any] = {}
+        self._in_flight: Dict[Hashable, Any] = {}
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.enqueued = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.flushed_items = 0
+        self.errors = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+        _queues.add(self)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    # --- Turn path ---
+    def put(self, key: Hashable, value: Any) -> None:
+        """Queue the latest value for `key` (O(1); never touches disk)."""
+        self.update(key, lambda _queued: value)
+
+    def update(self, key: Hashable, fn: Callable[[Any], Any]) -> Any:
+        """
+        Queue fn(queued value for `key` or None), atomically with respect
+        to other puts and to flushes. `fn` runs under the queue lock and
+        must not block. Returns the queued value.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name}: write-behind queue is closed")
+            queued = self._pending.get(key)
+            value = fn(queued)
+            if key in self._pending:
+                self.coalesced += 1
+            elif not self._pending:
+                self._oldest = time.monotonic()
+            self._pending[key] = value
+            self.enqueued += 1
+            if len(self._pending) >= self.max_pending:
+                self._wakeup.notify()
+        if self._thread is None:
+            self._start()
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Queued or in-flight value for `key`, else `default`."""
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            return self._in_flight.get(key, default)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._pending or key in self._in_flight
+
+    def write_through(self, key: Hashable, value: Any) -> None:
+        """Persist one key now, superseding anything queued for it."""
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(key, None)
+                if not self._pending:
+                    self._oldest = None
+            self.sink({key: value}, self.fsync)
+
+    # --- Flushing ---
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        return len(self._pending) >= self.max_pending or time.monotonic() - self._oldest >= self.max_delay
+
+    def _loop(self) -> None:
+        while True:
+            with self._lock:
+                while not self._closed and not self._due():
+                    timeout = None
+                    if self._pending:
+                        timeout = max(0.0, self.max_delay - (time.monotonic() - self._oldest))
+                    self._wakeup.wait(timeout)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        """Write everything queued now. Returns the number of keys written."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+                self._oldest = None
+            start = time.perf_counter()
+            try:
+                self.sink(batch, self.fsync)
+            except Exception:
+                logger.exception("%s: flush of %d keys failed; re-queued", self.name, len(batch))
+                with self._lock:
+                    self.errors += 1
+                    # Keep newer values that arrived during the failed flush.
+                    for key, value in self._pending.items():
+                        batch[key] = self.merge(batch[key], value) if self.merge and key in batch else value
+                    self._pending = batch
+                    self._in_flight = {}
+                    self._oldest = time.monotonic()
+                return 0
+            elapsed = (time.perf_counter() - start) * 1000.0
+            with self._lock:
+                self._in_flight = {}
+                self.flushes += 1
+                self.flushed_items += len(batch)
+                self._latencies.append(elapsed)
+                self._latency_total += elapsed
+                self._latency_max = max(self._latency_max, elapsed)
+            return len(batch)
+
+    def close(self) -> None:
+        """Flush everything and stop the background thread (idempotent)."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        # A failing sink keeps its batch queued; try until it succeeds or
+        # stops making progress.
+        while self._pending:
+            if not self.flush() and self._pending:
+                logger.error("%s: %d keys could not be flushed at shutdown", self.name, len(self._pending))
+                break
+        _queues.discard(self)
+
+    # --- Metrics ---
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies: List[float] = sorted(self._latencies)
+            return {
+                "name": self.name,
+                "depth": len(self._pending),
+                "in_flight": len(self._in_flight),
+                "oldest_age_s": round(time.monotonic() - self._oldest, 3) if self._oldest else 0.0,
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "flushes": self.flushes,
+                "flushed_items": self.flushed_items,
+                "errors": self.errors,
+                "flush_ms_last": round(self._latencies[-1], 3) if self._latencies else 0.0,
+                "flush_ms_mean": round(self._latency_total / self.flushes, 3) if self.flushes else 0.0,
+                "flush_ms_p95": round(latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else 0.0,
+                "flush_ms_max": round(self._latency_max, 3),
+            }
+
+
+# === PROCESS-WIDE CONTROL ===
+def flush_all() -> None:
+    for queue in list(_queues):
+        queue.flush()
+
+
+def close_all() -> None:
+    for queue in list(_queues):
+        queue.close()
+
+
+def all_metrics() -> List[Dict[str, Any]]:
+    return [queue.metrics() for queue in list(_queues)]
+
+
+atexit.register(close_all)
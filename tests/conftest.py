@@ -0,0 +1,13 @@
+"""
+Test setup: modules in eliana_soul/ import each other as flat siblings
+(`from utils import ...`) and read config as `eliana_soul.config`, so both
+the package directory and the repository root go on sys.path.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT, "eliana_soul"), ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
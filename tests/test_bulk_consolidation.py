@@ -0,0 +1,70 @@
+"""Bulk consolidation: scan + drain, follow-up jobs, report, checkpoint and resume."""
+
+import json
+
+from bulk_consolidation import BulkConsolidation
+from consolidation_jobs import ConsolidationJobQueue, job_key
+
+SHARDS = {"00": ["a1", "a2"], "01": ["b1"], "02": ["c1", "c2"]}
+
+
+class FakeStore:
+    def shards(self):
+        return sorted(SHARDS)
+
+    def shard_user_ids(self, shard):
+        return list(SHARDS[shard])
+
+
+def _runner(tmp_path, queue, scanned, handled, **kwargs):
+    def enqueue(user_id):
+        scanned.append(user_id)
+        return [job_key(user_id, "sketch", 0)] if queue.enqueue(user_id, "sketch", 0) else []
+
+    def handler(job):
+        handled.append(job.key)
+        if job.level == "sketch" and job.user_id == "a1":
+            queue.enqueue(job.user_id, "picture", 0)  # a completed set of five
+        if job.user_id == "c2":
+            raise RuntimeError("model refused")
+        return {"prompt_tokens": 1000, "completion_tokens": 100}
+
+    return BulkConsolidation(FakeStore(), queue, enqueue, handler, concurrency=3,
+                             checkpoint_path=str(tmp_path / "bulk.ckpt.json"), **kwargs)
+
+
+def test_run_drains_every_user_and_follow_ups(tmp_path):
+    queue = ConsolidationJobQueue(str(tmp_path / "jobs.db"), max_attempts=1)
+    scanned, handled = [], []
+    report = _runner(tmp_path, queue, scanned, handled).run()
+
+    assert sorted(scanned) == ["a1", "a2", "b1", "c1", "c2"]
+    assert sorted(handled) == sorted([job_key(u, "sketch", 0) for u in scanned] + ["a1:picture:0"])
+    assert report["jobs_enqueued"] == 5 and report["users_scanned"] == 5
+    assert (report["jobs_done"], report["jobs_failed"]) == (5, 1)
+    assert (report["prompt_tokens"], report["completion_tokens"]) == (5000, 500)
+    assert report["est_cost_usd"] == round((5000 * 2.50 + 500 * 10.00) / 1_000_000, 4)
+    assert report["queue"] == {"done": 5, "failed": 1}
+    assert report["scan_complete"]
+
+    checkpoint = json.loads((tmp_path / "bulk.ckpt.json").read_text())
+    assert checkpoint["shard_cursor"] == "02" and checkpoint["jobs_done"] == 5
+
+
+def test_resume_skips_scanned_shards_and_keeps_counters(tmp_path):
+    queue = ConsolidationJobQueue(str(tmp_path / "jobs.db"), max_attempts=1)
+    scanned, handled = [], []
+    first = _runner(tmp_path, queue, scanned, handled, max_jobs=2, checkpoint_every=1)
+    first.run()
+    assert len(handled) == 2
+
+    cursor = json.loads((tmp_path / "bulk.ckpt.json").read_text())["shard_cursor"]
+    rescanned, handled_again = [], []
+    report = _runner(tmp_path, queue, rescanned, handled_again).run()
+
+    skipped = [user for shard in sorted(SHARDS) if cursor is not None and shard <= cursor for user in SHARDS[shard]]
+    assert not set(rescanned) & set(skipped)
+    assert not set(handled_again) & set(handled)
+    assert report["jobs_done"] + report["jobs_failed"] == 6
+    assert report["users_scanned"] == 5
+    assert report["queue"] == {"done": 5, "failed": 1}
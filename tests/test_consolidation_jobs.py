@@ -0,0 +1,93 @@
+"""Leases are renewed while a job runs and only the lease holder records its outcome."""
+
+import time
+
+from consolidation_jobs import SKETCH, ConsolidationJobQueue, run_job
+from personality_store import FRAGMENTS, SKETCHES, PersonalityStore
+
+
+def _queue(path, worker, lease_seconds=60.0):
+    queue = ConsolidationJobQueue(str(path), lease_seconds=lease_seconds)
+    queue.worker_id = worker
+    return queue
+
+
+def test_stale_lease_holder_cannot_complete_or_fail(tmp_path):
+    db = tmp_path / "jobs.db"
+    first = _queue(db, "a", lease_seconds=0.01)
+    second = _queue(db, "b")
+    first.enqueue("u1", SKETCH, 0)
+
+    stale = first.claim()
+    time.sleep(0.05)
+    current = second.claim()
+    assert current is not None and current.key == stale.key
+
+    assert first.renew(stale) is None
+    assert first.complete(stale) is False
+    assert first.fail(stale, "boom") is None
+    assert second.jobs_for("u1")[0]["status"] == "running"
+
+    assert second.complete(current) is True
+    assert second.counts() == {"done": 1}
+
+
+def test_lease_is_renewed_while_the_handler_runs(tmp_path):
+    db = tmp_path / "jobs.db"
+    worker = _queue(db, "a", lease_seconds=0.6)
+    other = _queue(db, "b")
+    worker.enqueue("u1", SKETCH, 0)
+    job = worker.claim()
+    claimed_elsewhere = []
+
+    def slow_handler(job):
+        # Runs for twice the lease; renewals every 0.2s keep it held.
+        for _ in range(6):
+            time.sleep(0.2)
+            claimed_elsewhere.append(other.claim())
+
+    assert run_job(worker, job, slow_handler) is True
+    assert claimed_elsewhere == [None] * 6
+    assert worker.counts() == {"done": 1}
+
+
+def test_sketch_with_a_stored_consolidation_key_is_not_appended_twice(tmp_path):
+    store = PersonalityStore(str(tmp_path))
+    first = {"soul_sketch": "one", "consolidation_key": "u1:sketch:0"}
+    second = {"soul_sketch": "two", "consolidation_key": "u1:sketch:0"}
+
+    assert store.append_sketch("u1", first) is first
+    assert store.append_sketch("u1", second) == first
+    assert store.load_sketches("u1") == [first]
+
+    store.archive_sketches("u1", 1)
+    assert store.append_sketch("u1", second) == first
+    assert store.load_sketches("u1") == []
+
+    picture = {"soul_picture": "p", "consolidation_key": "u1:picture:0"}
+    assert store.store_picture("u1", picture) is picture
+    assert store.store_picture("u1", dict(picture, soul_picture="q")) == picture
+    assert store.load_picture("u1") == picture
+    assert store.count_archived("u1", FRAGMENTS) == 0
+    assert store.count_archived("u1", SKETCHES) == 1
+
+
+def test_consolidation_key_lookup_never_reads_the_archive(tmp_path, monkeypatch):
+    store = PersonalityStore(str(tmp_path))
+    sketch = {"soul_sketch": "one", "consolidation_key": "u1:sketch:0", "source_digests": ["d"]}
+    store.append_sketch("u1", sketch)
+    store.archive_sketches("u1", 1)
+
+    def no_archive(*args, **kwargs):
+        raise AssertionError("archive read on a keyed append")
+
+    monkeypatch.setattr(store, "iter_archived", no_archive)
+    assert store.append_sketch("u1", dict(sketch, soul_sketch="two")) == sketch
+    assert store.consolidated_entry("u1", SKETCHES, "u1:sketch:0") == sketch
+    assert store.consolidated_entry("u1", SKETCHES, "u1:sketch:1") is None
+
+    # Crash between the sketch write and its key record: the active layer still answers.
+    unrecorded = {"soul_sketch": "three", "consolidation_key": "u1:sketch:1"}
+    store.replace_user("u1", sketches=[unrecorded])
+    assert store.append_sketch("u1", dict(unrecorded, soul_sketch="four")) == unrecorded
+    assert store.load_sketches("u1") == [unrecorded]
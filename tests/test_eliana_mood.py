@@ -0,0 +1,47 @@
+"""Weighted mood deltas: one rule on the scalar, session and batch paths."""
+
+import numpy as np
+import pytest
+
+import eliana_mood
+from eliana_mood import CompiledChangeMap, MoodState, apply_mood_delta
+from emotion_history import EmotionHistory
+from mood_simulation import deltas_for_shifts
+
+CHANGE_MAP = {"grief": -0.08, "hope": 0.04, "awe": 0.1}
+
+
+@pytest.fixture
+def change_map(monkeypatch):
+    compiled = CompiledChangeMap(CHANGE_MAP)
+    monkeypatch.setattr(eliana_mood, "_compiled_change_map", compiled)
+    return compiled
+
+
+def test_shift_moves_mood_by_weighted_sum_of_label_deltas(change_map):
+    assert change_map.delta("grief") == pytest.approx(-0.08)
+    assert change_map.delta({"grief": 0.5, "hope": 0.5}) == pytest.approx(-0.02)
+    # Unnormalized: half the weight, half the move. Unknown labels are 0.
+    assert change_map.delta({"awe": 0.5, "unmapped": 3.0}) == pytest.approx(0.05)
+
+    value, _ = eliana_mood.update_eliana_emotional_state(0.7, {"grief": 0.5, "hope": 0.5})
+    assert value == pytest.approx(apply_mood_delta(0.7, -0.02))
+
+
+def test_session_and_batch_paths_match_scalar_delta(change_map):
+    shifts = [{"grief": 0.9}, {"hope": 0.4, "awe": 0.6}, {"unmapped": 1.0}]
+    history = EmotionHistory()
+    scalar = MoodState()
+    for shift in shifts:
+        history.append(shift)
+        scalar = scalar.advance(shift)
+
+    projected = MoodState()
+    for delta in history.project(change_map, len(shifts)):
+        projected = projected.advance_by(float(delta))
+    assert projected.value == pytest.approx(scalar.value)
+
+    labels = ["awe", "grief", "hope", "unmapped"]
+    tensor = np.array([[[s.get(label, 0.0) for label in labels] for s in shifts]])
+    expected = [change_map.delta(s) for s in shifts]
+    assert deltas_for_shifts(tensor, labels)[0] == pytest.approx(expected)
@@ -0,0 +1,70 @@
+"""EmotionHistory queries match the per-dict reference and survive eviction."""
+
+import numpy as np
+import pytest
+
+from emotion_history import ROW_CHUNK, EmotionHistory, dominant_label
+
+LABELS = ["grief", "hope", "awe", "calm", "fear"]
+
+
+def _entries(n, seed=5):
+    rng = np.random.default_rng(seed)
+    entries = []
+    for _ in range(n):
+        chosen = rng.choice(LABELS, size=rng.integers(0, 4), replace=False)
+        # Multiples of 1/8 are exact in float32, so ties stay ties.
+        entries.append({str(label): int(rng.integers(0, 9)) / 8 for label in chosen})
+    return entries
+
+
+def test_queries_match_the_dict_reference():
+    entries = _entries(40)
+    history = EmotionHistory()
+    for entry in entries:
+        history.append(entry)
+
+    window = entries[-10:]
+    means = history.window_mean(10)
+    for label in history.labels:
+        assert means[label] == pytest.approx(sum(e.get(label, 0.0) for e in window) / 10, abs=1e-6)
+
+    weights = [0.5 ** (9 - i) for i in range(10)]
+    ema = history.ema(0.5, 10)
+    for label in history.labels:
+        expected = sum(w * e.get(label, 0.0) for w, e in zip(weights, window)) / sum(weights)
+        assert ema[label] == pytest.approx(expected, abs=1e-6)
+
+    assert history.dominant_sequence(10) == [dominant_label(e) for e in window]
+    summed = {}
+    for entry in window:
+        for label, weight in entry.items():
+            summed[label] = summed.get(label, 0.0) + weight
+    assert history.dominant(10) == dominant_label(summed)
+
+
+def test_ties_resolve_alphabetically_and_transitions_are_tracked():
+    history = EmotionHistory(transition_limit=2)
+    assert history.append({"hope": 0.5, "awe": 0.5}) == "awe"
+    history.append({"grief": 0.9})
+    history.append({})
+    history.append({"hope": 1.0})
+    assert history.dominant_sequence() == ["awe", "grief", None, "hope"]
+    assert list(history.transitions) == ["awe → grief", "grief → hope"]
+
+
+def test_eviction_keeps_recent_rows_and_session_totals():
+    history = EmotionHistory(max_rows=ROW_CHUNK * 2)
+    entries = [{"grief": 1.0, f"label{i % 3}": 0.5} for i in range(ROW_CHUNK * 5)]
+    for entry in entries:
+        history.append(entry)
+    assert ROW_CHUNK <= len(history) <= ROW_CHUNK * 2
+    assert history.count == len(entries)
+    assert history.totals["grief"] == pytest.approx(len(entries))
+    assert history.dominant_sequence(3) == ["grief"] * 3
+
+    restored = EmotionHistory(max_rows=ROW_CHUNK * 2)
+    restored.load_state(history.state())
+    np.testing.assert_array_equal(restored.values, history.values)
+    assert restored.totals == history.totals and restored.count == history.count
+    assert restored.trend() == history.trend()
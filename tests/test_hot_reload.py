@@ -0,0 +1,40 @@
+"""core_memory.json is a watched static bank; turns record the bank version."""
+
+import json
+import os
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")  # eliana_soul.config
+
+import hot_reload
+import synthetic_data
+from static_loader import record_static_bank_version
+
+
+def test_core_memory_edit_reloads_and_version_is_recorded(tmp_path):
+    data_dir = str(tmp_path)
+    synthetic_data.generate_all(data_dir, n_users=2, n_anchors=8, n_core_values=3, n_core_fragments=3)
+    reloader = hot_reload.StaticBankReloader(data_dir=data_dir, poll_interval=0.05)
+    assert len(reloader.current()["core_memory"]["core_values"]) == 3
+
+    path = os.path.join(data_dir, "core_memory.json")
+    with open(path, encoding="utf-8") as f:
+        core_memory = json.load(f)
+    core_memory["core_values"] = core_memory["core_values"][:1]
+    time.sleep(0.01)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(core_memory, f)
+
+    reloader.start()
+    deadline = time.time() + 5
+    while reloader.version == 0 and time.time() < deadline:
+        time.sleep(0.05)
+    reloader.stop()
+    assert reloader.version == 1
+    assert len(reloader.current()["core_memory"]["core_values"]) == 1
+
+    full_prompt_data = {}
+    record_static_bank_version(full_prompt_data, reloader.current())
+    assert full_prompt_data["static_bank_version"] == 1
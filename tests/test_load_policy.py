@@ -0,0 +1,94 @@
+"""Deferred reflections run in the background once load is back to normal."""
+
+import time
+
+import load_policy
+from load_policy import DeferredReflectionQueue, DegradationPolicy, LoadMonitor, RateLimiter
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_deferred_reflections_drain_when_policy_recovers():
+    monitor = LoadMonitor()
+    policy = DegradationPolicy(monitor, thresholds={1: (1, 1e9)})
+    queue = DeferredReflectionQueue(maxlen=3, policy=policy, poll_seconds=0.02)
+    ran = []
+    try:
+        with monitor.track_turn():
+            assert policy.plan().level == 1
+            for i in range(5):
+                queue.defer(ran.append, i)
+            time.sleep(0.1)
+            assert ran == []
+        # Oldest entries were dropped at the cap; the rest run in order.
+        assert queue.dropped == 2
+        assert _wait_for(lambda: ran == [2, 3, 4])
+        assert len(queue) == 0
+    finally:
+        queue.stop(timeout=1)
+
+
+def test_defer_after_stop_restarts_the_drain_thread():
+    policy = DegradationPolicy(LoadMonitor())
+    queue = DeferredReflectionQueue(policy=policy, poll_seconds=0.02)
+    ran = []
+    try:
+        queue.defer(ran.append, 1)
+        assert _wait_for(lambda: ran == [1])
+        queue.stop(timeout=1)
+        queue.defer(ran.append, 2)
+        assert _wait_for(lambda: ran == [1, 2])
+    finally:
+        queue.stop(timeout=1)
+
+
+def test_process_defaults_are_built_on_first_use(monkeypatch):
+    monkeypatch.setattr(load_policy, "_llm_rate_limiter", None)
+    monkeypatch.setattr(load_policy, "_load_monitor", None)
+    monkeypatch.setattr(load_policy, "_degradation_policy", None)
+    monkeypatch.setattr(load_policy, "_deferred_reflections", None)
+    monkeypatch.setenv("ELIANA_LLM_RPM", "30")
+
+    assert load_policy.get_llm_rate_limiter().requests_per_minute == 30
+    queue = load_policy.get_deferred_reflections()
+    assert queue is load_policy.get_deferred_reflections()
+    assert queue.policy is load_policy.get_degradation_policy()
+    assert queue.policy.monitor is load_policy.get_load_monitor()
+
+
+class _FakeClock:
+    """Stands in for load_policy's `time`: sleeping advances the clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_rate_limiter_paces_requests_and_tokens_per_minute(monkeypatch):
+    clock = _FakeClock()
+    monkeypatch.setattr(load_policy, "time", clock)
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=6000)
+
+    # A full bucket allows a burst, then requests are paced at 1/s.
+    assert [limiter.acquire() for _ in range(60)] == [0.0] * 60
+    assert limiter.acquire() == 1.0
+
+    # Tokens: 3000 charged after the call leave room only after 30 s.
+    limiter.record_tokens(3000)
+    clock.now += 60
+    limiter.acquire(3000)
+    limiter.record_tokens(3000)
+    assert limiter.acquire(3000) == 30.0
+    # Larger than the whole bucket: waits for a full bucket, not forever.
+    assert limiter.acquire(10_000) == 60.0
+    assert limiter.acquired == 64
@@ -0,0 +1,100 @@
+"""Writing a fragment only enqueues its embedding; the job queue runs it."""
+
+import pytest
+
+pytest.importorskip("dotenv")  # eliana_soul.config
+pytest.importorskip("openai")
+
+import user_personality_engine as engine
+from consolidation_jobs import INDEX, ConsolidationJobQueue, run_pending
+from memory_index import MemoryIndex
+from personality_store import PersonalityStore
+
+
+@pytest.fixture
+def engine_state(tmp_path, monkeypatch):
+    monkeypatch.setenv("ELIANA_CONSOLIDATION_WORKERS", "0")
+    store = PersonalityStore(str(tmp_path / "store"))
+    queue = ConsolidationJobQueue(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(engine, "_personality_store", store)
+    monkeypatch.setattr(engine, "_consolidation_queue", queue)
+    monkeypatch.setattr(engine, "_memory_index", MemoryIndex(store))
+    return store, queue
+
+
+def test_fragment_is_embedded_by_the_queue_not_the_writer(engine_state, monkeypatch):
+    store, queue = engine_state
+    embedded = []
+
+    def embed(text):
+        embedded.append(text)
+        return [1.0, 0.0, 0.0]
+
+    monkeypatch.setattr(engine, "_embed_memory", embed)
+    engine.add_personality_fragment("u1", {"personality_snapshot": "likes rain", "session_story": "walked"})
+    assert embedded == []
+    assert [job["level"] for job in queue.jobs_for("u1")] == [INDEX]
+
+    run_pending(queue, engine.run_consolidation_job)
+    assert len(embedded) == 1
+    assert engine.get_memory_index().count("u1") == 1
+    assert queue.counts() == {"done": 1}
+
+
+def test_index_job_retries_when_embedding_fails(engine_state, monkeypatch):
+    store, queue = engine_state
+
+    def down(text):
+        raise ConnectionError("embedding backend down")
+
+    monkeypatch.setattr(engine, "_embed_memory", down)
+    engine.add_personality_fragment("u1", {"personality_snapshot": "likes rain", "session_story": "walked"})
+    run_pending(queue, engine.run_consolidation_job)
+    job = queue.jobs_for("u1")[0]
+    assert job["status"] == "pending" and job["attempts"] == 1
+
+
+def _fragment(i):
+    return {"personality_snapshot": f"snapshot {i}"}
+
+
+def test_index_job_reads_only_entries_written_since_the_last_job(engine_state, monkeypatch):
+    store, queue = engine_state
+    monkeypatch.setattr(engine, "_embed_memory", lambda text: [1.0, 0.0, 0.0])
+    for i in range(6):
+        engine.add_personality_fragment("u1", _fragment(i))
+    run_pending(queue, engine.run_consolidation_job)
+    store.archive_fragments("u1", 5)
+
+    def no_archive(*args, **kwargs):
+        raise AssertionError("index job walked the archive")
+        yield
+
+    engine.add_personality_fragment("u1", _fragment(6))
+    monkeypatch.setattr(store, "iter_archived", no_archive)
+    run_pending(queue, engine.run_consolidation_job)
+    assert engine.get_memory_index().count("u1") == 7
+
+
+def test_recall_skips_what_the_personality_context_shows(engine_state, monkeypatch):
+    store, queue = engine_state
+    monkeypatch.setattr(engine, "personality_context_cache", engine.PersonalityContextCache())
+    monkeypatch.setattr(engine, "_embed_memory", lambda text: [1.0, 0.0, 0.0])
+    for i in range(2):
+        engine.add_personality_fragment("u1", _fragment(i))
+    run_pending(queue, engine.run_consolidation_job)
+
+    # The index lags: fragment 2 is shown but not indexed, fragment 1 is recallable.
+    monkeypatch.setattr(engine, "enqueue_memory_index", lambda user_id: None)
+    engine.add_personality_fragment("u1", _fragment(2))
+    recalled = engine.recall_personality_memories("u1", [1.0, 0.0, 0.0], k=5)
+    assert sorted(memory.text for memory in recalled) == ["Personality: snapshot 0", "Personality: snapshot 1"]
+
+    # With a soul picture the newest sketch is not shown, so it can be recalled.
+    sketch = {"soul_sketch": "a quiet year"}
+    engine.store_soul_sketch("u1", sketch)
+    engine.reindex_personality_memory("u1")
+    engine.store_soul_picture("u1", {"soul_picture": "whole"})
+    recalled = engine.recall_personality_memories("u1", [1.0, 0.0, 0.0], k=5)
+    assert "a quiet year" in [memory.text for memory in recalled]
+    assert "Personality: snapshot 2" not in [memory.text for memory in recalled]
@@ -0,0 +1,65 @@
+"""Batch mood trajectories match the scalar update turn by turn."""
+
+import numpy as np
+import pytest
+
+import eliana_mood
+from eliana_mood import MoodPhraseTable, update_eliana_emotional_state
+from mood_simulation import simulate_mood, simulate_mood_labels
+
+CHANGE_MAP = {"grief": -0.3, "hope": 0.04, "awe": 0.25}
+PHRASES = {0.0: "offline", 0.25: "low", 0.5: "neutral", 0.75: "warm", 1.0: "bright"}
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    monkeypatch.setattr(eliana_mood, "emotion_change_map", CHANGE_MAP)
+    monkeypatch.setattr(eliana_mood, "emotion_phrases", PHRASES)
+    # Built on first use from the patched maps, then restored.
+    monkeypatch.setattr(eliana_mood, "_compiled_change_map", None, raising=False)
+    monkeypatch.setattr(eliana_mood, "_phrase_table", None)
+
+
+def _scalar(sequence, initial=eliana_mood.ELIANA_BASELINE):
+    value, values, phrases = initial, [], []
+    for label in sequence:
+        value, phrase = update_eliana_emotional_state(value, label)
+        values.append(value)
+        phrases.append(phrase)
+    return values, phrases
+
+
+def test_labels_match_scalar_loop_including_clipping_and_ragged_rows(tables):
+    rng = np.random.default_rng(7)
+    labels = list(CHANGE_MAP) + [None, "unmapped"]
+    sequences = [[labels[i] for i in rng.integers(0, len(labels), size=n)] for n in (150, 0, 37, 150)]
+    # Long runs of one label push the value into both clip bounds.
+    sequences.append(["grief"] * 20 + ["awe"] * 40 + ["hope"] * 10)
+
+    result = simulate_mood_labels(sequences, block=16)
+    phrases = result.phrases()
+    for row, sequence in enumerate(sequences):
+        values, expected_phrases = _scalar(sequence)
+        n = len(sequence)
+        np.testing.assert_allclose(result.values[row, :n], values, atol=1e-9)
+        assert np.isnan(result.values[row, n:]).all()
+        assert list(phrases[row, :n]) == expected_phrases
+        assert result.final[row] == pytest.approx(values[-1] if values else eliana_mood.ELIANA_BASELINE)
+    assert np.nanmin(result.values[-1]) == 0.0 and np.nanmax(result.values[-1]) == 1.0
+
+
+def test_block_size_does_not_change_long_trajectories():
+    deltas = np.random.default_rng(3).normal(0.0, 0.01, size=(4, 2000))
+    reference = simulate_mood(deltas, initial=[0.1, 0.5, 0.7, 0.9], block=1)
+    for block in (7, 64, 2000):
+        result = simulate_mood(deltas, initial=[0.1, 0.5, 0.7, 0.9], block=block)
+        np.testing.assert_allclose(result.values, reference.values, atol=1e-9)
+
+
+def test_phrase_table_matches_nearest_key_search():
+    table = MoodPhraseTable(PHRASES)
+    keys = sorted(PHRASES)
+    for value in np.linspace(0.0, 1.0, 1001):
+        nearest = min(keys, key=lambda key: abs(key - value))
+        assert table.lookup(value) == PHRASES[nearest]
+    assert MoodPhraseTable({"TEMPLATE"}).lookup(0.5) == ""
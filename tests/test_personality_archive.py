@@ -0,0 +1,69 @@
+"""Archive segments: offset index, reverse streaming, compaction and sweep."""
+
+import json
+import os
+
+import personality_store
+from personality_store import FRAGMENTS, PersonalityStore
+
+
+def _archive_files(store, user_id):
+    return sorted(os.listdir(store._archive_dir(user_id)))
+
+
+def test_archive_streams_segments_in_both_directions(tmp_path, monkeypatch):
+    monkeypatch.setattr(personality_store, "ARCHIVE_SEGMENT_BYTES", 64)
+    store = PersonalityStore(str(tmp_path))
+    for i in range(12):
+        store.append_fragment("u", {"i": i})
+    for _ in range(4):
+        store.archive_fragments("u", 3)
+
+    assert store.load_fragments("u") == []
+    assert store.count_archived("u", FRAGMENTS) == 12
+    assert [e["i"] for e in store.iter_archived("u", FRAGMENTS)] == list(range(12))
+    assert [e["i"] for e in store.iter_archived("u", FRAGMENTS, reverse=True)] == list(range(11, -1, -1))
+    assert len([name for name in _archive_files(store, "u") if name.endswith(".gz")]) > 1
+
+
+def _legacy_archive(store, user_id, entries):
+    directory = store._archive_dir(user_id)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "fragments.jsonl"), "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+
+def test_compaction_keeps_files_for_readers_of_the_old_index(tmp_path):
+    store = PersonalityStore(str(tmp_path))
+    _legacy_archive(store, "u", [{"i": 0}, {"i": 1}])
+    store.append_fragment("u", {"i": 2})
+    store.archive_fragments("u", 1)
+    before = _archive_files(store, "u")
+
+    # A reader that took the index before compaction still reads it all.
+    reader = store.iter_archived("u", FRAGMENTS)
+    first = next(reader)
+    assert store.compact_archive("u") == 2
+    assert [first] + list(reader) == [{"i": 0}, {"i": 1}, {"i": 2}]
+    assert set(before) <= set(_archive_files(store, "u"))
+
+    assert store.sweep_archive("u") == 0  # retired too recently
+    assert store.sweep_archive("u", min_age=0) == 2
+    assert "fragments.jsonl" not in _archive_files(store, "u")
+    assert store.load_archived("u", FRAGMENTS) == [{"i": 0}, {"i": 1}, {"i": 2}]
+    assert store.count_archived("u", FRAGMENTS) == 3
+
+
+def test_appends_after_compaction_never_reuse_retired_segment_names(tmp_path):
+    store = PersonalityStore(str(tmp_path))
+    store.append_fragment("u", {"i": 0})
+    store.archive_fragments("u", 1)
+    _legacy_archive(store, "u", [])
+    retired = set(_archive_files(store, "u"))
+
+    store.compact_archive("u")
+    store.append_fragment("u", {"i": 1})
+    store.archive_fragments("u", 1)
+    new = set(_archive_files(store, "u")) - retired
+    assert new and all(name.startswith("fragments-") for name in new)
+    assert store.load_archived("u", FRAGMENTS) == [{"i": 0}, {"i": 1}]
@@ -0,0 +1,70 @@
+"""The cached personality context follows every write, in-process or not."""
+
+import pytest
+
+pytest.importorskip("dotenv")  # eliana_soul.config
+pytest.importorskip("openai")
+
+import user_personality_engine as engine
+from consolidation_jobs import ConsolidationJobQueue
+from personality_store import PersonalityStore
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("ELIANA_CONSOLIDATION_WORKERS", "0")
+    monkeypatch.setattr(engine, "_personality_store", PersonalityStore(str(tmp_path / "store")))
+    monkeypatch.setattr(engine, "_consolidation_queue", ConsolidationJobQueue(str(tmp_path / "jobs.db")))
+    cache = engine.PersonalityContextCache(capacity=2)
+    monkeypatch.setattr(engine, "personality_context_cache", cache)
+    return cache
+
+
+def test_write_paths_invalidate_and_hits_skip_the_render(cache, monkeypatch):
+    engine.add_personality_fragment("u1", {"personality_snapshot": "likes rain"})
+    first = engine.get_personality_context_entry("u1")
+    assert "likes rain" in first.text and first.tokens > 0
+
+    renders = []
+    original = engine.load_user_fragments
+    monkeypatch.setattr(engine, "load_user_fragments", lambda user_id: renders.append(user_id) or original(user_id))
+    assert engine.get_personality_context("u1") == first.text
+    assert renders == []
+
+    engine.store_soul_sketch("u1", {"soul_sketch": "a quiet listener"})
+    assert "a quiet listener" in engine.get_personality_context("u1")
+    assert cache.metrics()["invalidations"] == 1
+    assert cache.metrics()["hits"] == 1
+
+
+def test_writes_from_another_process_are_seen_through_file_versions(cache, tmp_path):
+    engine.add_personality_fragment("u1", {"personality_snapshot": "likes rain"})
+    assert "likes rain" in engine.get_personality_context("u1")
+
+    # A second store on the same root stands in for another worker process.
+    PersonalityStore(str(tmp_path / "store")).append_fragment("u1", {"personality_snapshot": "likes snow"})
+    assert "likes snow" in engine.get_personality_context("u1")
+    assert cache.metrics()["stale"] == 1
+
+
+def test_render_racing_a_write_is_not_cached(cache, monkeypatch):
+    engine.add_personality_fragment("u1", {"personality_snapshot": "likes rain"})
+    original = engine.load_user_fragments
+
+    def racing(user_id):
+        fragments = original(user_id)
+        cache.invalidate(user_id)  # a write lands while the old layers render
+        return fragments
+
+    monkeypatch.setattr(engine, "load_user_fragments", racing)
+    engine.get_personality_context("u1")
+    assert cache.metrics()["size"] == 0
+
+
+def test_least_recently_used_user_is_evicted(cache):
+    for user_id in ("u1", "u2", "u3"):
+        engine.add_personality_fragment(user_id, {"personality_snapshot": f"{user_id} snapshot"})
+        engine.get_personality_context(user_id)
+    metrics = cache.metrics()
+    assert metrics["size"] == 2 and metrics["evictions"] == 1
+    assert "u3 snapshot" in engine.get_personality_context("u3")
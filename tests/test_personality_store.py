@@ -0,0 +1,35 @@
+"""User directories stay inside their shard for every user id."""
+
+import os
+
+import pytest
+
+from personality_store import PersonalityStore
+
+
+@pytest.mark.parametrize("user_id", [".", "..", "...", "a/b", "%2E", "john.doe"])
+def test_user_dir_stays_in_its_shard_and_round_trips(user_id, tmp_path):
+    store = PersonalityStore(str(tmp_path))
+    directory = store.user_dir(user_id)
+    shard_dir = os.path.dirname(directory)
+    assert os.path.dirname(shard_dir) == str(tmp_path)
+    assert os.path.basename(directory) not in ("", ".", "..")
+
+    store.append_fragment(user_id, {"text": user_id})
+    assert store.load_fragments(user_id) == [{"text": user_id}]
+    assert list(store.user_ids()) == [user_id]
+    assert os.listdir(tmp_path) == [os.path.basename(shard_dir)]
+
+
+def test_dot_ids_do_not_share_a_directory(tmp_path):
+    store = PersonalityStore(str(tmp_path))
+    for user_id in (".", "..", "%2E"):
+        store.append_fragment(user_id, {"text": user_id})
+    for user_id in (".", "..", "%2E"):
+        assert store.load_fragments(user_id) == [{"text": user_id}]
+    assert sorted(store.user_ids()) == sorted([".", "..", "%2E"])
+
+
+def test_empty_user_id_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        PersonalityStore(str(tmp_path)).user_dir("")
@@ -0,0 +1,69 @@
+"""Inactivity decay is computed on read and written back only by interactions."""
+
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("dotenv")  # eliana_soul.config
+
+from relationship_store import SQLiteRelationshipStore
+from relationship_tracker import (
+    DECAY_GRACE_DAYS,
+    DECAY_HALF_LIFE_DAYS,
+    RelationshipTracker,
+    decayed_score,
+    decayed_scores,
+)
+
+DAY = 86400.0
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    tracker = RelationshipTracker(store=SQLiteRelationshipStore(str(tmp_path / "rel.db")), write_behind=False)
+    yield tracker
+    tracker.close()
+
+
+def test_no_decay_within_the_grace_period():
+    assert decayed_score(50.0, 0.0, DECAY_GRACE_DAYS * DAY) == 50.0
+    assert decayed_score(50.0, 0.0, DECAY_GRACE_DAYS * DAY - 1) == 50.0
+    assert decayed_score(50.0, 0.0, (DECAY_GRACE_DAYS + 1) * DAY) < 50.0
+
+
+def test_score_halves_every_half_life_after_the_grace_period():
+    start = (DECAY_GRACE_DAYS + DECAY_HALF_LIFE_DAYS) * DAY
+    assert decayed_score(80.0, 0.0, start) == pytest.approx(40.0)
+    assert decayed_score(80.0, 0.0, start + DECAY_HALF_LIFE_DAYS * DAY) == pytest.approx(20.0)
+
+
+def test_vectorized_pass_matches_the_scalar_formula():
+    rng = np.random.default_rng(7)
+    scores = rng.uniform(0, 100, 200)
+    updated = rng.uniform(0, 400 * DAY, 200)
+    now = 400 * DAY
+    expected = [decayed_score(s, u, now) for s, u in zip(scores, updated)]
+    np.testing.assert_allclose(decayed_scores(scores, updated, now), expected, rtol=1e-12)
+
+
+def test_decay_is_written_back_only_by_interactions(tracker):
+    idle_since = time.time() - (DECAY_GRACE_DAYS + DECAY_HALF_LIFE_DAYS) * DAY
+    tracker.store.put_many([("u1", {"name": "a", "score": 60.0, "last_updated": idle_since}),
+                            ("u2", {"name": "b", "score": 60.0, "last_updated": idle_since})])
+
+    # Reads and exports see the decayed score; the stored row is untouched.
+    assert tracker.get_score("u1") == pytest.approx(30.0, rel=1e-3)
+    assert tracker.get_user_relationship("u1")["score"] == pytest.approx(30.0, rel=1e-3)
+    tracker.register_user("u1", name="renamed")
+    exported = tracker.export_scores()
+    assert sorted(exported["stored_score"]) == [60.0, 60.0]
+    assert tracker.store.get("u1")["score"] == 60.0
+    assert tracker.store.get("u1")["last_updated"] == idle_since
+
+    # An interaction materializes the decay and restarts the clock.
+    tracker.apply_score_delta("u1", 0.0)
+    stored = tracker.store.get("u1")
+    assert stored["score"] == pytest.approx(30.0, rel=1e-3) and stored["last_updated"] > idle_since
+    assert tracker.update("u2", 0.0) == pytest.approx(30.0, rel=1e-3)
+    assert tracker.store.get("u2")["score"] == pytest.approx(30.0, rel=1e-3)
@@ -0,0 +1,79 @@
+"""SQLite relationship records: atomic modify, batch writes, one-time migration."""
+
+import json
+import threading
+
+from relationship_store import SQLiteRelationshipStore, migrate_json_to_sqlite
+
+
+def _bump(record):
+    record = dict(record or {"name": None, "score": 0.0})
+    record["score"] += 1
+    return record
+
+
+def test_concurrent_modify_loses_no_update(tmp_path):
+    store = SQLiteRelationshipStore(str(tmp_path / "rel.db"))
+
+    def worker():
+        for _ in range(25):
+            store.modify("u1", _bump)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get("u1")["score"] == 200
+    store.close()
+
+
+def test_put_many_upserts_and_restores_synchronous(tmp_path):
+    store = SQLiteRelationshipStore(str(tmp_path / "rel.db"))
+    records = [(f"u{i}", {"name": f"n{i}", "score": i, "last_updated": 10.0}) for i in range(3)]
+    assert store.put_many(records) == 3
+    assert store.put_many([("u0", {"name": "renamed", "score": 50, "last_updated": 20.0})], durable=True) == 1
+
+    assert len(store) == 3
+    assert store.get("u0") == {"name": "renamed", "score": 50.0, "last_updated": 20.0}
+    assert store.get("u2")["score"] == 2.0
+    # durable=True switches this connection to FULL for one commit only (NORMAL == 1).
+    assert store._conn().execute("PRAGMA synchronous").fetchone()[0] == 1
+    store.close()
+
+
+def _write_json(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+
+
+def test_migration_runs_once_per_source(tmp_path):
+    json_path, db_path = str(tmp_path / "rel.json"), str(tmp_path / "rel.db")
+    _write_json(json_path, {"u1": {"name": "a", "score": 10, "last_updated": 100.0}})
+    assert migrate_json_to_sqlite(json_path, db_path) == 1
+
+    _write_json(json_path, {"u1": {"name": "a", "score": 99, "last_updated": 500.0},
+                            "u2": {"name": "b", "score": 1, "last_updated": 500.0}})
+    assert migrate_json_to_sqlite(json_path, db_path) == 0
+    store = SQLiteRelationshipStore(db_path)
+    assert len(store) == 1 and store.get("u1")["score"] == 10.0
+    store.close()
+
+    assert migrate_json_to_sqlite(json_path, db_path, force=True) == 2
+
+
+def test_migration_keeps_rows_updated_more_recently_in_the_database(tmp_path):
+    json_path, db_path = str(tmp_path / "rel.json"), str(tmp_path / "rel.db")
+    store = SQLiteRelationshipStore(db_path)
+    store.put_many([("fresh", {"name": "db", "score": 80, "last_updated": 200.0}),
+                    ("stale", {"name": "db", "score": 5, "last_updated": 50.0})])
+    store.close()
+
+    _write_json(json_path, {"fresh": {"name": "json", "score": 1, "last_updated": 100.0},
+                            "stale": {"name": "json", "score": 60, "last_updated": 100.0}})
+    migrate_json_to_sqlite(json_path, db_path)
+
+    store = SQLiteRelationshipStore(db_path)
+    assert store.get("fresh") == {"name": "db", "score": 80.0, "last_updated": 200.0}
+    assert store.get("stale") == {"name": "json", "score": 60.0, "last_updated": 100.0}
+    store.close()
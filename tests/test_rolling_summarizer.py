@@ -0,0 +1,87 @@
+"""Rolling summaries: chunk → arc → gist cascade, fixed size, fallback, persistence."""
+
+import threading
+
+from rolling_summarizer import RollingSummarizer
+from token_budget import count_tokens
+
+
+def _labelled(texts, level, max_tokens):
+    return f"L{level}[{len(texts)}]"
+
+
+def test_chunks_cascade_into_arcs_and_a_single_gist():
+    calls = []
+
+    def summarize(texts, level, max_tokens):
+        calls.append((level, len(texts)))
+        return _labelled(texts, level, max_tokens)
+
+    summarizer = RollingSummarizer(summarize, chunk_size=2, fan_in=2, level_tokens=(50, 50, 50))
+    for i in range(16):
+        summarizer.add(f"User: line {i}.")
+
+    # 16 messages → 8 chunks → 4 arcs → gist merged twice (second time with itself).
+    assert calls.count((1, 2)) == 8
+    assert [c for c in calls if c[0] == 2] == [(2, 2)] * 4
+    assert [c for c in calls if c[0] == 3] == [(3, 2), (3, 3)]
+    assert summarizer.levels == [[], [], ["L3[3]"]]
+    assert summarizer.pending == [] and summarizer.render() == "L3[3]"
+
+
+def test_rendered_section_has_a_fixed_upper_size():
+    summarizer = RollingSummarizer(chunk_size=4, fan_in=3, level_tokens=(20, 30, 40))
+    sizes = []
+    for i in range(300):
+        summarizer.add(f"User: turn {i} talked at length about the garden, the rain and the old letters.")
+        sizes.append(count_tokens(summarizer.render()))
+    assert max(sizes[150:]) <= max(sizes[:150]) + 40
+    report = summarizer.report()
+    assert report["folded_messages"] == 300
+    assert report["saved_tokens"] == report["raw_tokens"] - report["summary_tokens"] > 0
+
+
+def test_failing_summarizer_falls_back_to_extractive():
+    def broken(texts, level, max_tokens):
+        raise RuntimeError("model down")
+
+    summarizer = RollingSummarizer(broken, chunk_size=2, fan_in=4)
+    summarizer.add("User: We planted tulips. It rained after.")
+    summarizer.add("Eliana: The garden will be bright in spring.")
+    assert summarizer.levels[0] == [
+        "User: We planted tulips. It rained after. Eliana: The garden will be bright in spring."
+    ]
+
+
+def test_lagging_background_jobs_keep_raw_lines_bounded():
+    release = threading.Event()
+
+    def slow(texts, level, max_tokens):
+        release.wait(5)
+        return _labelled(texts, level, max_tokens)
+
+    summarizer = RollingSummarizer(slow, chunk_size=2, fan_in=8, background=True)
+    for i in range(10):
+        summarizer.add(f"User: line {i}")
+    rendered = summarizer.render().splitlines()
+    assert rendered[0] == "(6 messages awaiting summary)"
+    assert rendered[1:] == [f"User: line {i}" for i in range(6, 10)]
+
+    release.set()
+    assert summarizer.wait(5)
+    assert summarizer.levels[0] == ["L1[2]"] * 5 and summarizer.pending == []
+
+
+def test_state_round_trip_keeps_unsummarized_messages():
+    summarizer = RollingSummarizer(_labelled, chunk_size=3, fan_in=4)
+    for i in range(5):
+        summarizer.add(f"User: line {i}", raw_tokens=7)
+
+    restored = RollingSummarizer(_labelled, chunk_size=3, fan_in=4)
+    restored.load_state(summarizer.state())
+    assert restored.render() == summarizer.render() == "L1[3]\nUser: line 3\nUser: line 4"
+    assert restored.report() == summarizer.report()
+    assert restored.report()["raw_tokens"] == 35
+
+    restored.add("User: line 5")
+    assert restored.levels[0] == ["L1[3]", "L1[3]"]
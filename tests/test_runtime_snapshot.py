@@ -0,0 +1,77 @@
+"""The mmap snapshot serves the same banks as the JSON loaders."""
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("dotenv")  # eliana_soul.config
+
+import static_loader
+import synthetic_data
+from runtime_snapshot import RuntimeSnapshot, SnapshotError, build_snapshot, load_or_build_snapshot
+from static_loader import ALL_BANKS, BankSpec, StaticData
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # The embedding/map loaders are templates in this tree; read the
+    # synthetic files as plain JSON so the banks carry real vectors.
+    for name in ("core_embeddings", "emotion_embeddings", "emotion_map", "psych_models"):
+        spec = static_loader.BANK_SPECS[name]
+        monkeypatch.setitem(static_loader.BANK_SPECS, name, BankSpec(spec.filename, static_loader._load_json_bank))
+    monkeypatch.setitem(static_loader.BANK_SPECS, "flat_anchors",
+                        BankSpec(None, lambda path, deps: dict(deps["emotion_anchors"]), ("emotion_anchors",)))
+    synthetic_data.generate_all(str(tmp_path), dim=16, n_anchors=12, n_users=2, n_core_values=4,
+                                n_core_fragments=4, n_psych_models=3, n_major_emotions=3)
+    return str(tmp_path)
+
+
+def test_snapshot_banks_match_the_json_loaders(data_dir):
+    path = os.path.join(data_dir, "test.snap")
+    build_snapshot(path, data_dir)
+    static_data = RuntimeSnapshot(path).to_static_data(data_dir)
+    loaded = StaticData(data_dir=data_dir).preload(ALL_BANKS)
+
+    for name in ("core_embeddings", "psych_models", "major_emotions", "emotion_embeddings",
+                 "core_memory", "flat_anchors", "emotion_map"):
+        assert static_data[name] == loaded[name], name
+    record = static_data["core_embeddings"][0]
+    assert isinstance(record["embedding"], list)
+
+    matrix = static_data["core_embeddings_matrix"]
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-5)
+    expected = np.asarray(record["embedding"]) / np.linalg.norm(record["embedding"])
+    np.testing.assert_allclose(matrix[0], expected, rtol=1e-5)
+    assert static_data["emotion_tokens"] == list(loaded["emotion_embeddings"])
+
+
+def test_stale_or_corrupt_snapshot_is_rebuilt(data_dir):
+    path = os.path.join(data_dir, "test.snap")
+    first = load_or_build_snapshot(path, data_dir)
+    created = first.header["created_at"]
+    first.close()
+    assert load_or_build_snapshot(path, data_dir).header["created_at"] == created
+
+    core = os.path.join(data_dir, "core_memory.json")
+    os.utime(core, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert load_or_build_snapshot(path, data_dir).header["created_at"] != created
+
+    with open(path, "r+b") as f:
+        f.write(b"garbage!")
+    assert load_or_build_snapshot(path, data_dir).is_fresh(data_dir)
+
+
+def test_checksum_is_verified_only_when_asked(data_dir):
+    path = os.path.join(data_dir, "test.snap")
+    build_snapshot(path, data_dir)
+    with open(path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+    RuntimeSnapshot(path).close()
+    with pytest.raises(SnapshotError):
+        RuntimeSnapshot(path, verify_checksum=True)
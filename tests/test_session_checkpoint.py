@@ -0,0 +1,75 @@
+"""Snapshot + WAL restore, torn tails, and session migration blobs."""
+
+import os
+import shutil
+
+from session_checkpoint import SessionCheckpointer, dump_session, load_session
+from session_memory import SessionMemory
+
+
+def _session(spill_dir, history_limit=4):
+    memory = SessionMemory("system", session_id="s1", spill_dir=str(spill_dir), history_limit=history_limit)
+    return memory
+
+
+def _fill(memory, turns):
+    for i in range(turns):
+        memory.add_user_message(f"user {i}")
+        memory.store_emotion({"joy": 0.1 * (i % 5), "fear": 0.2}, source="user")
+        memory.store_emotion({"calm": 0.5}, source="eliana")
+        memory.add_assistant_message(f"reply {i}")
+
+
+def test_resume_replays_the_wal_after_the_snapshot(tmp_path):
+    memory = _session(tmp_path / "spill")
+    checkpointer = SessionCheckpointer(memory, str(tmp_path / "ckpt"), compact_every=1000).attach()
+    _fill(memory, 6)
+    expected = memory.to_state()
+
+    restored = SessionCheckpointer.resume("s1", str(tmp_path / "ckpt"))
+    assert restored.last_restore["replayed"] == 24
+    assert restored.session.to_state() == expected
+    assert restored.session.build_summary() == memory.build_summary()
+    checkpointer.close()
+
+
+def test_torn_wal_tail_is_dropped(tmp_path):
+    memory = _session(tmp_path / "spill")
+    checkpointer = SessionCheckpointer(memory, str(tmp_path / "ckpt"), compact_every=1000).attach()
+    _fill(memory, 2)
+    checkpointer._wal.close()
+    with open(checkpointer.wal_path, "ab") as f:
+        f.write(b"\x00\x01\x02")
+
+    restored = SessionCheckpointer.resume("s1", str(tmp_path / "ckpt"))
+    assert restored.last_restore["truncated_bytes"] == 3
+    assert [m["content"] for m in restored.session.recent_messages][-1] == "reply 1"
+
+
+def test_migration_blob_carries_spilled_history(tmp_path):
+    memory = _session(tmp_path / "old_host")
+    _fill(memory, 5)
+    assert memory.spill.counts
+    history = [r["content"] for r in memory.full_chat.iter_all()]
+    blob = dump_session(memory)
+    memory.close()
+    shutil.rmtree(tmp_path / "old_host")
+
+    moved = load_session(blob, spill_dir=str(tmp_path / "new_host"))
+    assert [r["content"] for r in moved.full_chat.iter_all()] == history
+    assert moved._build_summary_from_history() == memory.build_summary()
+    moved.add_user_message("after the move")
+    assert moved.full_chat.total == memory.full_chat.total + 1
+
+
+def test_missing_spill_file_reads_as_empty(tmp_path, caplog):
+    memory = _session(tmp_path / "spill")
+    _fill(memory, 5)
+    state = memory.to_state()
+    memory.close()
+    os.remove(memory.spill.path)
+
+    restored = SessionMemory.from_state(state)
+    assert [r["content"] for r in restored.full_chat.iter_all()] == [r["content"] for r in restored.full_chat]
+    assert len(restored.get_personality_trace()) == 0
+    assert "lost" in caplog.text
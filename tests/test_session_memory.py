@@ -0,0 +1,64 @@
+"""SessionMemory turn-path regressions and record round trips."""
+
+from session_memory import SessionMemory
+from session_records import SummaryRecord, TraceRecord
+
+
+def test_eliana_emotions_update_mood_without_error(tmp_path):
+    memory = SessionMemory("system", spill_dir=str(tmp_path))
+    for emotions in ({"grief": 0.9}, {"joy": 0.6, "hope": 0.4}, {}, {"awe": 1.0}):
+        memory.store_emotion(emotions, source="eliana")
+        value, phrase = memory.eliana_mood_state
+        assert 0.0 <= value <= 1.0
+        assert isinstance(phrase, str)
+
+
+def test_unknown_record_keys_survive_round_trip():
+    data = {"user_text": "hi", "eliana_text": "hello", "schema_v2_field": [1, 2]}
+    record = SummaryRecord.from_dict(data)
+    assert record.extra == {"schema_v2_field": [1, 2]}
+    assert record.to_dict()["schema_v2_field"] == [1, 2]
+    assert SummaryRecord.from_dict(record.to_dict()) == record
+
+
+def test_unknown_keys_survive_spill(tmp_path):
+    memory = SessionMemory("system", spill_dir=str(tmp_path), history_limit=2)
+    for i in range(5):
+        memory.store_personality_trace({"timestamp": str(i), "user_input": f"m{i}", "added_later": i})
+    traces = memory.get_personality_trace()
+    assert [trace["added_later"] for trace in traces] == list(range(5))
+    assert all(isinstance(TraceRecord.from_dict(trace), TraceRecord) for trace in traces)
+
+
+def test_records_read_like_the_historical_dicts(tmp_path):
+    memory = SessionMemory("system", spill_dir=str(tmp_path))
+    memory.store_emotion({"joy": 0.7}, source="user", timestamp="t1")
+    memory.store_important_fact("likes rain", timestamp="t2")
+    entry = memory.user_emotions[-1]
+    assert entry["emotions"] == {"joy": 0.7}
+    assert entry.get("timestamp") == "t1" and entry.get("missing", 0) == 0
+    assert "emotions" in entry and "missing" not in entry
+    assert dict(entry.to_dict()) == {"emotions": {"joy": 0.7}, "timestamp": "t1"}
+    assert memory.important_facts[-1]["fact"] == "likes rain"
+    assert memory.recent_user_emotions[-1]["emotions"] == {"joy": 0.7}
+
+
+def test_recent_messages_is_a_list_of_message_dicts(tmp_path):
+    memory = SessionMemory("system", spill_dir=str(tmp_path))
+    memory.add_user_message("hi")
+    memory.add_assistant_message("hello")
+    assert memory.recent_messages == [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    assert memory.recent_messages[-1] == {"role": "assistant", "content": "hello"}
+    assert memory.recent_messages[:1] == [{"role": "user", "content": "hi"}]
+    assert len(memory.recent_messages) == 2
+    assert memory.build_prompt()[1:] == list(memory.recent_messages)
+
+
+def test_bounded_logs_spill_and_replay_full_history(tmp_path):
+    memory = SessionMemory("system", spill_dir=str(tmp_path), history_limit=3)
+    for i in range(10):
+        memory.add_user_message(f"m{i}")
+    assert len(memory.full_chat) == 3
+    assert memory.full_chat.total == 10
+    assert [record["content"] for record in memory.full_chat.iter_all()] == [f"m{i}" for i in range(10)]
+    assert memory.spill.counts == {"full_chat": 7}
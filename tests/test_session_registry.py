@@ -0,0 +1,46 @@
+"""A checkpointed session is owned by one registry at a time."""
+
+import multiprocessing
+
+import pytest
+
+from session_registry import SessionBusy, SessionRegistry
+
+
+def _try_get(checkpoint_dir, session_id, results):
+    try:
+        results.put("resumed" if SessionRegistry(checkpoint_dir=checkpoint_dir).get(session_id) else "missing")
+    except SessionBusy:
+        results.put("busy")
+
+
+def _get_in_other_process(checkpoint_dir, session_id):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_try_get, args=(checkpoint_dir, session_id, results))
+    proc.start()
+    proc.join(30)
+    return results.get(timeout=5)
+
+
+def test_owned_session_is_busy_elsewhere_until_released(tmp_path):
+    checkpoint_dir = str(tmp_path)
+    owner = SessionRegistry(checkpoint_dir=checkpoint_dir)
+    memory = owner.create("system prompt")
+    memory.add_user_message("hello")
+    session_id = memory.session_id
+
+    with pytest.raises(SessionBusy):
+        SessionRegistry(checkpoint_dir=checkpoint_dir).get(session_id)
+    assert _get_in_other_process(checkpoint_dir, session_id) == "busy"
+
+    owner.release(session_id)
+    other = SessionRegistry(checkpoint_dir=checkpoint_dir)
+    resumed = other.get(session_id)
+    assert resumed is not None and resumed.session_id == session_id
+    assert other.get(session_id) is resumed
+    with pytest.raises(SessionBusy):
+        owner.get(session_id)
+
+    other.close(session_id)
+    assert _get_in_other_process(checkpoint_dir, session_id) == "resumed"
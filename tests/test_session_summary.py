@@ -0,0 +1,55 @@
+"""
+Property test: the incrementally maintained SessionMemory.build_summary is
+byte-identical to the from-scratch _build_summary_from_history after every
+operation of a random session.
+
+Operations: facts, user/Eliana emotions (ties, empty shifts, repeats),
+spills (a tiny history_limit evicts to the spill file constantly) and
+clears (the session is rebuilt from its checkpoint state, which drops the
+summary cache and the spill handle).
+"""
+
+import random
+
+import pytest
+
+from session_memory import SessionMemory
+
+LABELS = ["grief", "hope", "joy", "fear", "awe", "shame"]
+
+
+def _random_emotions(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.1:
+        return {}
+    if roll < 0.2:
+        # Tie between two labels.
+        a, b = rng.sample(LABELS, 2)
+        return {a: 0.5, b: 0.5}
+    return {label: round(rng.random(), 3) for label in rng.sample(LABELS, rng.randint(1, 3))}
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_incremental_summary_matches_full_rebuild(tmp_path, seed):
+    rng = random.Random(seed)
+    memory = SessionMemory("system", session_id=f"s{seed}", spill_dir=str(tmp_path), history_limit=rng.randint(2, 6))
+    assert memory.build_summary() == memory._build_summary_from_history()
+
+    for step in range(200):
+        op = rng.choices(["fact", "user", "eliana", "clear"], weights=[3, 5, 3, 1])[0]
+        if op == "fact":
+            memory.store_important_fact(f"fact {step}")
+        elif op == "user":
+            memory.store_emotion(_random_emotions(rng), source="user")
+        elif op == "eliana":
+            memory.store_emotion(_random_emotions(rng), source="eliana")
+        else:
+            memory.close()
+            memory = SessionMemory.from_state(memory.to_state())
+        # Read sometimes between ops so the cache is exercised both warm and dirty.
+        if rng.random() < 0.7:
+            assert memory.build_summary() == memory._build_summary_from_history(), f"seed {seed} step {step} ({op})"
+
+    assert memory.build_summary() == memory._build_summary_from_history()
+    # The run must actually have exercised the spilled part of the history.
+    assert memory.spill.counts.get("user_emotions", 0) > 0
@@ -0,0 +1,61 @@
+"""Static banks preload in parallel in dependency order and load lazily once."""
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")  # eliana_soul.config
+
+from static_loader import BankSpec, StaticData
+
+
+def _specs(calls, delay=0.0):
+    def loader(name):
+        def load(path, deps):
+            calls.append(name)
+            time.sleep(delay)
+            return {"name": name, "deps": dict(deps)}
+        return load
+
+    return {
+        "anchors": BankSpec(None, loader("anchors")),
+        "flat": BankSpec(None, loader("flat"), ("anchors",)),
+        "map": BankSpec(None, loader("map")),
+        "rare": BankSpec(None, loader("rare")),
+    }
+
+
+def test_preload_resolves_dependencies_and_leaves_the_rest_lazy():
+    calls = []
+    data = StaticData(specs=_specs(calls), public_banks=("flat", "map", "rare")).preload(["flat", "map"])
+    assert calls.index("anchors") < calls.index("flat")
+    assert data["flat"]["deps"]["anchors"]["name"] == "anchors"
+    assert not data.is_loaded("rare")
+    assert list(data) == ["flat", "map", "rare"]
+
+    assert data["rare"]["name"] == "rare"
+    report = data.startup_report()
+    assert report["banks"]["rare"]["lazy"] is True
+    assert report["banks"]["map"]["lazy"] is False
+    assert report["pending"] == []
+
+
+def test_independent_banks_load_concurrently():
+    calls = []
+    data = StaticData(specs=_specs(calls, delay=0.2))
+    data.preload(["map", "rare"])
+    assert data.preload_ms < 350
+    assert data.startup_report()["serial_ms"] >= 400
+    assert data.timings["map"]["thread"] != data.timings["rare"]["thread"]
+
+
+def test_concurrent_first_access_loads_a_bank_once():
+    calls = []
+    data = StaticData(specs=_specs(calls, delay=0.05))
+    threads = [threading.Thread(target=lambda: data["rare"]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ["rare"]
@@ -0,0 +1,29 @@
+"""Concurrent writers lose no updates (storage_stress harness, small N)."""
+
+import os
+
+import pytest
+
+import storage_stress
+
+WRITERS = 3
+UPDATES = 15
+
+
+@pytest.mark.parametrize("target", ["json", "json-deferred"])
+def test_json_targets_lose_no_updates(target, tmp_path):
+    assert storage_stress.run(target, WRITERS, UPDATES, str(tmp_path)) == []
+
+
+@pytest.mark.parametrize("target", ["rel-sqlite", "rel-json"])
+def test_relationship_targets_lose_no_updates(target, tmp_path):
+    pytest.importorskip("dotenv")  # relationship_tracker -> eliana_soul.config
+    assert storage_stress.run(target, WRITERS, UPDATES, str(tmp_path)) == []
+
+
+def test_caller_directory_is_kept(tmp_path):
+    keep = tmp_path / "keep.txt"
+    keep.write_text("x")
+    storage_stress.run("json", 1, 1, str(tmp_path))
+    assert keep.exists()
+    assert os.path.exists(tmp_path / "store.json")
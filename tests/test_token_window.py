@@ -0,0 +1,37 @@
+"""The recent chat window is bounded by tokens and folds, not drops, older turns."""
+
+import session_memory
+from session_memory import SessionMemory
+from token_budget import count_message_tokens
+
+
+def test_window_stays_within_budget_and_folds_older_messages(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_memory, "RECENT_TOKEN_BUDGET", 60)
+    memory = SessionMemory("system", spill_dir=str(tmp_path))
+    for i in range(6):
+        memory.add_user_message(f"message {i} about the long walk by the sea.")
+
+    recent = [message["content"] for message in memory.recent_messages]
+    assert memory.recent_tokens == sum(count_message_tokens(text) for text in recent) <= 60
+    assert recent[-1] == "message 5 about the long walk by the sea."
+    assert len(memory.full_chat) == 6
+
+    prompt = memory.build_prompt()
+    assert prompt[0] == {"role": "system", "content": "system"}
+    assert prompt[1]["role"] == "system" and "message 0" in prompt[1]["content"]
+    assert prompt[2:] == list(memory.recent_messages)
+
+    restored = SessionMemory.from_state(memory.to_state())
+    assert restored.build_prompt() == prompt
+    memory.close()
+    restored.close()
+
+
+def test_newest_message_is_kept_even_over_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_memory, "RECENT_TOKEN_BUDGET", 10)
+    memory = SessionMemory("system", spill_dir=str(tmp_path))
+    memory.add_user_message("short")
+    memory.add_assistant_message("a reply far longer than the whole recent-window budget allows")
+    assert [message["role"] for message in memory.recent_messages] == ["assistant"]
+    assert memory.recent_tokens > 10
+    memory.close()
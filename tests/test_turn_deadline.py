@@ -0,0 +1,43 @@
+"""Timed-out stages are cancelled when queued and counted when already running."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import turn_deadline
+from turn_deadline import STATUS_TIMEOUT, TurnDeadline
+
+
+def test_timed_out_stages_are_cancelled_or_counted_as_abandoned(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(turn_deadline, "_stage_pool", pool)
+    release = threading.Event()
+    ran = []
+
+    deadline = TurnDeadline(budget=10.0, reply_reserve=0.0)
+    # Occupies the only worker past its budget.
+    assert deadline.run_stage("psych_matching", release.wait, budget=0.05) == []
+    # Queued behind it, so cancel() succeeds and it never runs.
+    assert deadline.run_stage("fragment_resonance", ran.append, 1, budget=0.05) == []
+
+    release.set()
+    pool.shutdown(wait=True)
+    time.sleep(0.01)
+    assert ran == []
+
+    report = deadline.report()
+    assert report["stages"]["psych_matching"] == {**report["stages"]["psych_matching"], "status": STATUS_TIMEOUT, "abandoned": True}
+    assert "abandoned" not in report["stages"]["fragment_resonance"]
+    assert report["cut"] == ["psych_matching", "fragment_resonance"]
+    assert report["abandoned"] == 1
+
+
+def test_emotion_fallbacks_do_not_share_state():
+    deadline = TurnDeadline(budget=10.0, reply_reserve=0.0)
+    first = deadline.run_stage("gpt_emotion_interpretation", lambda: 1 / 0)
+    first["behavior_tendencies"].append("withdraw")
+    first["internal_effect"].append("tension")
+    first["emotional_shift"]["fear"] = 0.5
+    second = deadline.run_stage("gpt_emotion_interpretation", lambda: 1 / 0)
+    assert second == turn_deadline.EMPTY_EMOTION_STATE
+    assert turn_deadline.EMPTY_EMOTION_STATE == {"emotional_shift": {}, "behavior_tendencies": [], "internal_effect": []}
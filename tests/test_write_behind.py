@@ -0,0 +1,94 @@
+"""WriteBehindQueue: coalescing, flush triggers, retry of failed batches, shutdown."""
+
+import threading
+import time
+
+import pytest
+
+from write_behind import WriteBehindQueue
+
+
+class RecordingSink:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        self.flushed = threading.Event()
+
+    def __call__(self, batch, fsync):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.batches.append(dict(batch))
+        self.flushed.set()
+
+
+def test_updates_to_one_key_coalesce_into_one_write():
+    sink = RecordingSink()
+    queue = WriteBehindQueue(sink, max_pending=100, max_delay=60)
+    for score in range(10):
+        queue.put("u1", score)
+    queue.update("u2", lambda queued: (queued or 0) + 1)
+    queue.update("u2", lambda queued: (queued or 0) + 1)
+    assert queue.get("u1") == 9 and len(queue) == 2
+
+    assert queue.flush() == 2
+    assert sink.batches == [{"u1": 9, "u2": 2}]
+    assert queue.metrics()["coalesced"] == 10
+    queue.close()
+
+
+def test_flush_triggers_on_size_and_on_age():
+    sink = RecordingSink()
+    queue = WriteBehindQueue(sink, max_pending=3, max_delay=60)
+    for key in ("a", "b", "c"):
+        queue.put(key, 1)
+    assert sink.flushed.wait(2)
+    assert sink.batches == [{"a": 1, "b": 1, "c": 1}]
+    queue.close()
+
+    sink = RecordingSink()
+    queue = WriteBehindQueue(sink, max_pending=100, max_delay=0.05)
+    queue.put("a", 1)
+    assert sink.flushed.wait(2)
+    assert sink.batches == [{"a": 1}]
+    queue.close()
+
+
+def test_failed_batch_is_requeued_and_newer_values_win():
+    sink = RecordingSink(failures=1)
+    queue = WriteBehindQueue(sink, max_pending=100, max_delay=60)
+    queue.put("a", 1)
+    queue.put("b", 1)
+    assert queue.flush() == 0
+    assert queue.get("a") == 1 and len(queue) == 2
+    queue.put("a", 2)
+
+    assert queue.flush() == 2
+    assert sink.batches == [{"a": 2, "b": 1}]
+    assert queue.metrics()["errors"] == 1
+    queue.close()
+
+
+def test_close_drains_and_rejects_later_writes():
+    sink = RecordingSink()
+    queue = WriteBehindQueue(sink, max_pending=100, max_delay=60)
+    queue.put("a", 1)
+    queue.put("b", 2)
+    queue.close()
+    assert sink.batches == [{"a": 1, "b": 2}] and len(queue) == 0
+    with pytest.raises(RuntimeError):
+        queue.put("a", 3)
+
+
+def test_metrics_report_depth_and_flush_latency():
+    sink = RecordingSink()
+    queue = WriteBehindQueue(sink, name="scores", max_pending=100, max_delay=60)
+    queue.put("a", 1)
+    time.sleep(0.01)
+    before = queue.metrics()
+    assert before["name"] == "scores" and before["depth"] == 1 and before["oldest_age_s"] > 0
+    queue.flush()
+    after = queue.metrics()
+    assert after["depth"] == 0 and after["flushes"] == 1 and after["flushed_items"] == 1
+    assert after["flush_ms_max"] >= after["flush_ms_last"] >= 0
+    queue.close()